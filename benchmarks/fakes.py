@@ -0,0 +1,112 @@
+"""
+Stand-ins for the executors, so that benchmarks measure resqui itself
+rather than Docker or pip.
+
+The fakes implement the interface of `DockerExecutor` and
+`PythonExecutor`. Their latency and the size of their output are set
+with `fake_executors()`, which swaps them into the plugin modules.
+"""
+
+from contextlib import contextmanager, ExitStack
+import json
+import subprocess
+import time
+from unittest.mock import patch
+
+# Plugins using an executor, mapped to the executor they import
+PATCHED = {
+    "resqui.plugins.openssfscorecard.DockerExecutor": "FakeDockerExecutor",
+    "resqui.plugins.howfairis.PythonExecutor": "FakePythonExecutor",
+    "resqui.plugins.cffconvert.PythonExecutor": "FakePythonExecutor",
+}
+
+SCORECARD_CHECKS = [
+    "CI-Tests",
+    "SAST",
+    "Maintained",
+    "Fuzzing",
+    "Dependency-Update-Tool",
+    "Vulnerabilities",
+    "Code-Review",
+    "Packaging",
+]
+
+
+def scorecard_report(size):
+    """A Scorecard JSON report of (roughly) `size` bytes."""
+    checks = [
+        {"name": name, "score": 5, "reason": f"{name} reason", "details": []}
+        for name in SCORECARD_CHECKS
+    ]
+    report = {"checks": checks}
+    padding = max(size - len(json.dumps(report)), 0)
+    # Scorecard's details are lists of short lines, so pad with those.
+    line = "Info: detail line of a check -- " + "x" * 32
+    checks[0]["details"] = [line] * (padding // (len(line) + 4))
+    return json.dumps(report)
+
+
+class FakeDockerExecutor:
+    latency = 0.0
+    pull_latency = 0.0
+    output_size = 0
+
+    def __init__(self, image_url, pull_args=None):
+        self.url = image_url
+        time.sleep(self.pull_latency)
+
+    def run(self, command, run_args=None, timeout=None):
+        time.sleep(self.latency)
+        stdout = scorecard_report(self.output_size)
+        return subprocess.CompletedProcess(command, 0, stdout, "")
+
+    def cancel(self):
+        pass
+
+
+class FakePythonExecutor:
+    latency = 0.0
+    install_latency = 0.0
+    output_size = 0
+
+    def __init__(self, packages=None, environment=None):
+        self.environment = environment if environment is not None else {}
+
+    def install(self, package):
+        time.sleep(self.install_latency)
+
+    def execute(self, script, timeout=None):
+        time.sleep(self.latency)
+        stdout = "True\n" + " " * self.output_size
+        return subprocess.CompletedProcess(script, 0, stdout, "")
+
+    def cancel(self):
+        pass
+
+
+@contextmanager
+def fake_executors(latency=0.0, setup_latency=0.0, output_size=0):
+    """
+    Swap the fake executors into the plugin modules. `latency` is the
+    duration of each run, `setup_latency` the one of each image pull or
+    package installation, `output_size` the size of each output in bytes.
+    """
+    settings = {
+        FakeDockerExecutor: {
+            "latency": latency,
+            "pull_latency": setup_latency,
+            "output_size": output_size,
+        },
+        FakePythonExecutor: {
+            "latency": latency,
+            "install_latency": setup_latency,
+            "output_size": output_size,
+        },
+    }
+    with ExitStack() as stack:
+        for cls, attributes in settings.items():
+            for name, value in attributes.items():
+                stack.enter_context(patch.object(cls, name, value))
+        for target, fake in PATCHED.items():
+            stack.enter_context(patch(target, globals()[fake]))
+        yield
@@ -0,0 +1,229 @@
+"""
+Synthetic git repositories with tunable shapes, to measure how the clone,
+repository scan and secret-scan paths scale.
+
+Repositories are written with `git fast-import`, so even deep histories
+are generated in seconds. The same shape and seed always give the same
+repository (and commit hashes).
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import os
+import pathlib
+import random
+import socket
+import subprocess
+import time
+
+# File extension -> (directory, line template) of the generated sources
+LANGUAGES = {
+    "py": ("src", "def function_{i}(x):\n    return x * {i}\n"),
+    "js": ("web", "export function f{i}(x) {{ return x * {i}; }}\n"),
+    "c": ("lib", "int f{i}(int x) {{ return x * {i}; }}\n"),
+    "md": ("docs", "Paragraph {i} of the documentation.\n"),
+    "yaml": ("config", "key_{i}: value_{i}\n"),
+}
+
+# Fake secrets in formats detected by Gitleaks' default rules
+SECRET_TEMPLATES = [
+    "aws_access_key_id = AKIA{upper16}",
+    'github_token = "ghp_{alnum36}"',
+    'slack_webhook = "https://hooks.slack.com/services/T{upper8}/B{upper8}/{alnum24}"',
+]
+
+AUTHOR = "Synthetic Author <synthetic@example.com>"
+
+
+@dataclass(frozen=True)
+class RepoShape:
+    """
+    The shape of a synthetic repository.
+
+    `commits` commits each change `changes_per_commit` of the `files`
+    source files (spread over `languages`, a mapping of extension to
+    weight) of about `file_size` bytes. `binary_blobs` random binary files
+    of `binary_size` bytes are added along the history and `secrets` fake
+    secrets are planted in random commits; about half of them are removed
+    again later, so only a full-history scan finds them.
+    """
+
+    commits: int = 50
+    files: int = 100
+    file_size: int = 2048
+    changes_per_commit: int = 5
+    languages: dict = field(default_factory=lambda: {"py": 3, "js": 1, "md": 1})
+    binary_blobs: int = 0
+    binary_size: int = 1024**2
+    secrets: int = 0
+    seed: int = 0
+
+    @property
+    def name(self):
+        return (
+            f"c{self.commits}-f{self.files}-b{self.binary_blobs}-s{self.secrets}"
+            f"-r{self.seed}"
+        )
+
+
+def _source(rng, extension, size, revision):
+    _, template = LANGUAGES[extension]
+    lines = []
+    length = 0
+    i = revision
+    while length < size:
+        line = template.format(i=i)
+        lines.append(line)
+        length += len(line)
+        i += rng.randint(1, 9)
+    return "".join(lines)
+
+
+def _secret(rng):
+    def chars(alphabet, n):
+        return "".join(rng.choice(alphabet) for _ in range(n))
+
+    upper = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    alnum = upper + "abcdefghijklmnopqrstuvwxyz"
+    return rng.choice(SECRET_TEMPLATES).format(
+        upper16=chars(upper, 16),
+        upper8=chars(upper, 8),
+        alnum36=chars(alnum, 36),
+        alnum24=chars(alnum, 24),
+    )
+
+
+def _data(content):
+    if isinstance(content, str):
+        content = content.encode()
+    return b"data %d\n" % len(content) + content + b"\n"
+
+
+def fast_import_stream(shape):
+    """Yield the `git fast-import` stream of a repository of `shape`."""
+    rng = random.Random(shape.seed)
+    extensions = list(shape.languages)
+    weights = [shape.languages[e] for e in extensions]
+    paths = []
+    for i in range(shape.files):
+        extension = rng.choices(extensions, weights)[0]
+        directory, _ = LANGUAGES[extension]
+        paths.append(f"{directory}/module_{i}.{extension}")
+
+    commits = max(shape.commits, 1)
+    binary_commits = sorted(rng.randrange(commits) for _ in range(shape.binary_blobs))
+    secret_commits = sorted(rng.randrange(commits) for _ in range(shape.secrets))
+    planted = []  # paths of secret files which are removed later
+
+    timestamp = 1_700_000_000
+    for n in range(commits):
+        changes = []
+        if n == 0:
+            changes.append(("README.md", "# Synthetic repository\n"))
+            changes += [
+                (path, _source(rng, path.rsplit(".", 1)[1], shape.file_size, 0))
+                for path in paths
+            ]
+        else:
+            for path in rng.sample(paths, min(shape.changes_per_commit, len(paths))):
+                changes.append(
+                    (path, _source(rng, path.rsplit(".", 1)[1], shape.file_size, n))
+                )
+        for i in range(binary_commits.count(n)):
+            blob = rng.randbytes(shape.binary_size)
+            changes.append((f"assets/blob_{n}_{i}.bin", blob))
+        for i in range(secret_commits.count(n)):
+            path = f"config/credentials_{n}_{i}.ini"
+            changes.append((path, _secret(rng) + "\n"))
+            if rng.random() < 0.5:
+                planted.append(path)
+        deletions = []
+        if planted and rng.random() < 0.2:
+            deletions.append(planted.pop(0))
+
+        timestamp += 3600
+        message = f"Commit {n}\n"
+        yield b"commit refs/heads/main\n"
+        yield f"committer {AUTHOR} {timestamp} +0000\n".encode()
+        yield _data(message)
+        for path, content in changes:
+            yield f"M 100644 inline {path}\n".encode()
+            yield _data(content)
+        for path in deletions:
+            yield f"D {path}\n".encode()
+        yield b"\n"
+
+
+def generate_repo(path, shape):
+    """Create a non-bare repository of `shape` at `path`, with `main` checked out."""
+    subprocess.run(
+        ["git", "init", "-q", "-b", "main", path], check=True, capture_output=True
+    )
+    process = subprocess.Popen(
+        ["git", "-C", path, "fast-import", "--quiet"],
+        stdin=subprocess.PIPE,
+    )
+    for chunk in fast_import_stream(shape):
+        process.stdin.write(chunk)
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError(f"git fast-import failed for {path}")
+    subprocess.run(
+        ["git", "-C", path, "checkout", "-q", "-f", "main"],
+        check=True,
+        capture_output=True,
+    )
+    return path
+
+
+def file_url(path):
+    """The `file://` URL of a local repository."""
+    return pathlib.Path(path).resolve().as_uri()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def git_daemon(base_path):
+    """
+    Serve all repositories below `base_path` with `git daemon`. Yields a
+    function returning the `git://` URL of a repository directory.
+    """
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            "git",
+            "daemon",
+            "--reuseaddr",
+            "--export-all",
+            "--listen=127.0.0.1",
+            f"--port={port}",
+            f"--base-path={base_path}",
+            base_path,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("git daemon did not start")
+                time.sleep(0.05)
+
+        def url(path):
+            relpath = os.path.relpath(path, base_path)
+            return f"git://127.0.0.1:{port}/{relpath}"
+
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
@@ -0,0 +1,291 @@
+"""
+Usage:
+    benchmarks [options] [<profile>...]
+
+Measures the overhead of resqui's orchestration by running the `resqui`
+command in a local repository with fake executors, and compares it against
+the stored baseline. Run it from the repository root with
+`python -m benchmarks.run` or `make bench`.
+
+Profiles: default (6 indicators), wide (500 indicators), nightly (50
+indicators, 100 repositories), fleet (6 indicators, 1000 repositories),
+profiles (3 configurations of 50 indicators, 10 repositories). The cold
+start of `resqui --version` and `resqui indicators` in a new interpreter is
+measured as well.
+
+Options:
+    --repeat <n>         Number of repetitions, the fastest is kept [default: 3].
+    --latency <seconds>  Duration of each fake executor run [default: 0].
+    --output-size <n>    Size of each fake executor output in bytes [default: 4096].
+    --tolerance <ratio>  Slowdown relative to the baseline considered a
+                         regression [default: 1.3].
+    --save-baseline      Store the results as the new baseline.
+    --help               Show this help message.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from resqui.cli import resqui
+from resqui.docopt import docopt
+from resqui.plugins import HowFairIs, OpenSSFScorecard
+from resqui.trace import tracer
+
+from benchmarks.fakes import fake_executors
+from benchmarks.repos import RepoShape, generate_repo
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+HISTORY_FILE = os.path.join(BENCHMARKS_DIR, "history.jsonl")
+
+# name -> (number of indicators, number of repositories, number of configurations)
+PROFILES = {
+    "default": (6, 1, 1),
+    "wide": (500, 1, 1),
+    "nightly": (50, 100, 1),
+    "fleet": (6, 1000, 1),
+    "profiles": (50, 10, 3),
+}
+
+# Phases of a run, taken from its trace spans; "other" is the rest of the
+# command (configuration, plan, journal, progress output)
+PHASES = ["metadata", "indicators", "summary", "other"]
+SPAN_PHASES = {
+    "metadata": "metadata",
+    "plugin.init": "indicators",
+    "indicator": "indicators",
+    "summary.write": "summary",
+}
+
+# The repository the command is run in
+REPO_SHAPE = RepoShape(commits=3, files=20, file_size=512)
+
+# name -> arguments of the CLI commands whose cold start is measured
+STARTUP = {
+    "version": ["--version"],
+    "indicators": ["indicators"],
+}
+
+
+def make_configuration(n_indicators, first=0):
+    """
+    A configuration with `n_indicators`, cycling through the plugins from
+    the `first` one on.
+    """
+    providers = [(OpenSSFScorecard, name) for name in OpenSSFScorecard.indicators]
+    providers.append((HowFairIs, "has_license"))
+    indicators = []
+    for i in range(first, first + n_indicators):
+        plugin, name = providers[i % len(providers)]
+        indicators.append(
+            {
+                "name": name,
+                "plugin": plugin.__name__,
+                "@id": f"https://w3id.org/everse/i/indicators/{name}-{i}",
+            }
+        )
+    return {"indicators": indicators}
+
+
+@contextmanager
+def working_directory(path):
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def run_command(argv):
+    """Run the `resqui` command once and return the time spent in each phase."""
+    timings = dict.fromkeys(PHASES, 0.0)
+    tracer.start()
+    try:
+        start = time.perf_counter()
+        with patch("sys.argv", argv):
+            resqui()
+        total = time.perf_counter() - start
+    finally:
+        tracer.enabled = False
+    for s in tracer.spans:
+        if s.name in SPAN_PHASES:
+            timings[SPAN_PHASES[s.name]] += s.duration
+    timings["other"] = max(total - sum(timings.values()), 0.0)
+    return timings
+
+
+def run_profile(n_indicators, n_repos, latency, output_size, n_configurations=1):
+    """
+    Run `resqui` for each of the repositories of the profile and return the
+    time spent in each phase.
+    """
+    timings = dict.fromkeys(PHASES, 0.0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        argv = ["resqui", "-t", "ghp-benchmark"]
+        for i in range(n_configurations):
+            config_file = os.path.join(tmp_dir, f"config-{i}.json")
+            with open(config_file, "w") as f:
+                first = i * n_indicators // 2
+                json.dump(make_configuration(n_indicators, first), f)
+            argv += ["-c", config_file]
+        argv += ["-o", os.path.join(tmp_dir, "summary.json")]
+        repo = generate_repo(os.path.join(tmp_dir, "repo"), REPO_SHAPE)
+        user_dirs = {
+            "XDG_CACHE_HOME": os.path.join(tmp_dir, "cache"),
+            "XDG_STATE_HOME": os.path.join(tmp_dir, "state"),
+        }
+
+        with open(os.devnull, "w") as devnull, fake_executors(
+            latency=latency, output_size=output_size
+        ), patch.dict(os.environ, user_dirs), patch("sys.stdout", devnull):
+            # Summaries are not uploaded
+            os.environ.pop("DASHVERSE_TOKEN", None)
+            with working_directory(repo):
+                for i in range(n_repos):
+                    url = f"https://github.com/example/repo-{i}"
+                    subprocess.run(
+                        ["git", "config", "remote.origin.url", url], check=True
+                    )
+                    for phase, seconds in run_command(argv).items():
+                        timings[phase] += seconds
+
+    return timings
+
+
+def measure(profiles, repeat, latency, output_size):
+    results = {}
+    for name in profiles:
+        n_indicators, n_repos, n_configurations = PROFILES[name]
+        runs = [
+            run_profile(n_indicators, n_repos, latency, output_size, n_configurations)
+            for _ in range(repeat)
+        ]
+        best = {phase: min(run[phase] for run in runs) for phase in PHASES}
+        best["total"] = min(sum(run.values()) for run in runs)
+        results[name] = best
+    return results
+
+
+def measure_startup(repeat):
+    """The fastest cold start of each STARTUP command in seconds."""
+    results = {}
+    for name, args in STARTUP.items():
+        code = (
+            f"import sys; sys.argv = ['resqui'] + {args!r}; "
+            "from resqui.cli import resqui; resqui()"
+        )
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-c", code], stdout=subprocess.DEVNULL, check=False
+            )
+            runs.append(time.perf_counter() - start)
+        results[name] = min(runs)
+    return results
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "-C", BENCHMARKS_DIR, "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results, baseline, tolerance):
+    """Print the results and return the names of regressed profiles."""
+    regressions = []
+    print(f"{'profile':<10}" + "".join(f"{p:>12}" for p in PHASES + ["total"]))
+    for name, timings in results.items():
+        row = f"{name:<10}" + "".join(
+            f"{timings[p] * 1000:>10.1f}ms" for p in PHASES + ["total"]
+        )
+        reference = (baseline or {}).get("results", {}).get(name)
+        if reference:
+            ratio = timings["total"] / reference["total"]
+            row += f"  {ratio:.2f}x baseline"
+            if ratio > tolerance:
+                row += "  REGRESSION"
+                regressions.append(name)
+        print(row)
+    return regressions
+
+
+def report_startup(startup, baseline, tolerance):
+    """Print the cold starts and return the names of regressed commands."""
+    regressions = []
+    reference = (baseline or {}).get("startup", {})
+    for name, seconds in startup.items():
+        row = f"{'startup':<10}{name:>12}{seconds * 1000:>10.1f}ms"
+        if name in reference:
+            ratio = seconds / reference[name]
+            row += f"  {ratio:.2f}x baseline"
+            if ratio > tolerance:
+                row += "  REGRESSION"
+                regressions.append(f"startup {name}")
+        print(row)
+    return regressions
+
+
+def main(argv=None):
+    args = docopt(__doc__, argv=argv)
+    profiles = args["<profile>"] or list(PROFILES)
+    unknown = set(profiles) - set(PROFILES)
+    if unknown:
+        sys.exit(f"Unknown profile(s): {', '.join(sorted(unknown))}")
+
+    results = measure(
+        profiles,
+        int(args["--repeat"]),
+        float(args["--latency"]),
+        int(args["--output-size"]),
+    )
+    startup = measure_startup(int(args["--repeat"]))
+    record = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "latency": float(args["--latency"]),
+        "output_size": int(args["--output-size"]),
+        "results": results,
+        "startup": startup,
+    }
+    with open(HISTORY_FILE, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    baseline = None if args["--save-baseline"] else load_baseline()
+    regressions = report(results, baseline, float(args["--tolerance"]))
+    regressions += report_startup(startup, baseline, float(args["--tolerance"]))
+    if args["--save-baseline"]:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(record, f, indent=2)
+            f.write("\n")
+        print(f"Baseline has been written to {BASELINE_FILE}")
+    elif regressions:
+        sys.exit(f"Regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
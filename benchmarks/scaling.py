@@ -0,0 +1,157 @@
+"""
+Usage:
+    scaling [options] [<profile>...]
+
+Measures how the clone, repository scan and plugin paths scale with the
+shape of the assessed repository, using synthetic repositories. Run it
+from the repository root with `python -m benchmarks.scaling` or
+`make bench-scaling`.
+
+Profiles: commits, files, blobs, secrets (all by default).
+
+Options:
+    --serve <mode>       Serve the repositories via "file" URLs or a local
+                         "daemon" (git daemon) [default: file].
+    --plugins <names>    Comma-separated plugins to run against each
+                         repository, e.g. Gitleaks,SuperLinter (needs Docker).
+    --workdir <path>     Keep the generated repositories in <path> and reuse
+                         them in later runs (default: a temporary directory).
+    --output <file>      Also write the results as JSON to <file>.
+    --help               Show this help message.
+"""
+
+from contextlib import ExitStack
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from resqui.core import Context
+from resqui.docopt import docopt
+from resqui.facts import repo_facts
+from resqui.plugins.base import PluginInitError
+from resqui.executors import ExecutorInitError
+import resqui.plugins
+
+from benchmarks.repos import RepoShape, file_url, generate_repo, git_daemon
+
+PROFILES = {
+    "commits": [RepoShape(commits=n, files=50) for n in (10, 100, 1000, 5000)],
+    "files": [RepoShape(commits=10, files=n) for n in (100, 1000, 10000)],
+    "blobs": [
+        RepoShape(commits=20, files=50, binary_blobs=n, binary_size=1024**2)
+        for n in (0, 10, 50)
+    ],
+    "secrets": [RepoShape(commits=200, files=50, secrets=n) for n in (0, 10, 100)],
+}
+
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, f))
+        for root, _, files in os.walk(path)
+        for f in files
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def clone(url, path):
+    subprocess.run(
+        ["git", "clone", "-q", url, path],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def load_plugins(names):
+    """Instantiate the plugins, skipping the ones which cannot initialise."""
+    plugins = {}
+    for name in names:
+        try:
+            plugins[name] = getattr(resqui.plugins, name)(Context())
+        except (ExecutorInitError, PluginInitError) as e:
+            print(f"Skipping {name}: {e}", file=sys.stderr)
+    return plugins
+
+
+def measure(shape, path, url, plugins):
+    row = {"repository": shape.name, "commits": shape.commits, "files": shape.files}
+    row["size_mb"] = round(directory_size(os.path.join(path, ".git")) / 1024**2, 1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clone_path = os.path.join(tmp_dir, "clone")
+        row["clone"], _ = timed(clone, url, clone_path)
+        row["facts"], _ = timed(repo_facts, clone_path, "main")
+    for name, plugin in plugins.items():
+        indicator = plugin.indicators[0]
+        row[name], result = timed(getattr(plugin, indicator), url, "main")
+        row[f"{name}.output"] = result.output
+    return row
+
+
+def print_table(rows):
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    print("  ".join(f"{c:>14}" for c in columns))
+    for row in rows:
+        cells = []
+        for c in columns:
+            value = row.get(c, "")
+            if isinstance(value, float) and c != "size_mb":
+                value = f"{value * 1000:.0f}ms"
+            cells.append(f"{value!s:>14}")
+        print("  ".join(cells))
+
+
+def main(argv=None):
+    args = docopt(__doc__, argv=argv)
+    profiles = args["<profile>"] or list(PROFILES)
+    unknown = set(profiles) - set(PROFILES)
+    if unknown:
+        sys.exit(f"Unknown profile(s): {', '.join(sorted(unknown))}")
+    if args["--serve"] not in ("file", "daemon"):
+        sys.exit(f"Unknown serve mode '{args['--serve']}'")
+
+    with ExitStack() as stack:
+        workdir = args["--workdir"]
+        if workdir is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(workdir, exist_ok=True)
+        if args["--serve"] == "daemon":
+            url_of = stack.enter_context(git_daemon(workdir))
+        else:
+            url_of = file_url
+
+        plugin_names = [n for n in (args["--plugins"] or "").split(",") if n]
+        plugins = load_plugins(plugin_names)
+
+        rows = []
+        for profile in profiles:
+            for shape in PROFILES[profile]:
+                path = os.path.join(workdir, shape.name)
+                if not os.path.isdir(path):
+                    print(f"Generating {shape.name} ...", file=sys.stderr)
+                    try:
+                        generate_repo(path, shape)
+                    except BaseException:
+                        shutil.rmtree(path, ignore_errors=True)
+                        raise
+                rows.append(
+                    {"profile": profile, **measure(shape, path, url_of(path), plugins)}
+                )
+
+    print_table(rows)
+    if args["--output"]:
+        with open(args["--output"], "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,339 @@
 #!/usr/bin/env python3
 
-import http.client
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+import gzip
 import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
 from resqui.version import version
 
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Methods which can be repeated without side effects, so they are retried
+# even if the connection failed after the request was sent
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class APIError(RuntimeError):
+    """Thrown if an API request fails for good"""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        # Seconds the server asked to wait before trying again, if it did
+        self.retry_after = retry_after
+
+
+class RequestNotSent(Exception):
+    """A request failed before it was sent completely, so it can be retried."""
+
+
+@dataclass
+class UploadResult:
+    """The outcome of uploading one assessment of a batch."""
+
+    index: int
+    ok: bool
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait according to a Retry-After header (delay in seconds
+    or HTTP date), or None if it is missing or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0)
+
 
 class APIClient:
-    endpoint_url = "api.dashverse.cloud"
+    """
+    A client for the DashVerse API.
+
+    Connections are kept alive and pooled per host (shared by all
+    clients), so consecutive uploads reuse the TLS session. Request
+    bodies are gzip-compressed unless the server rejects that (HTTP 415),
+    in which case they are sent uncompressed from then on.
+
+    Requests which fail with a status in `RETRY_STATUSES` or before they
+    were sent (e.g. the connection was refused) are retried up to
+    `max_retries` times, waiting for the server's `Retry-After` or else an
+    exponential backoff with full jitter (at most `max_backoff` seconds).
+    If the server asks to wait longer than `max_backoff`, the request fails
+    with the `retry_after` of the APIError set. A POST whose connection
+    failed after it was sent is not retried, as the server may have stored
+    it already.
+    """
+
+    endpoint_url = "https://api.dashverse.cloud"
+    max_retries = 3
+    backoff = 0.5
+    max_backoff = 30
 
-    def __init__(self, bearer_token=None):
+    _idle = {}  # (scheme, netloc) -> [idle connections]
+    _pool_lock = threading.Lock()
+    _uncompressed = set()  # (scheme, netloc) of servers without gzip support
+    _no_arrays = set()  # (scheme, netloc) of servers rejecting JSON arrays
+
+    def __init__(self, bearer_token=None, endpoint_url=None, prefer="return=minimal"):
         if bearer_token is None:
             bearer_token = os.environ.get("DASHVERSE_TOKEN")
         if bearer_token is None or bearer_token == "":
             raise ValueError("Missing authentication token")
+        if endpoint_url is not None:
+            self.endpoint_url = endpoint_url
+        url = urlsplit(self.endpoint_url)
+        self._server = (url.scheme, url.netloc)
+        self._base_path = url.path.rstrip("/")
         self.headers = {
             "accept": "application/json",
             "Authorization": f"Bearer {bearer_token}",
             "Content-Type": "application/json",
-            # TODO: turn this into minimal in production
-            "Prefer": "return=representation",
+            "Prefer": prefer,
             "User-Agent": f"resqui/{version}",
         }
 
+    def _connect(self, reuse=True):
+        """Return an idle pooled connection (if `reuse`) or a new one."""
+        # http.client (and ssl) are imported on first use, as they are slow
+        # to import and not needed by e.g. `resqui indicators`
+        import http.client
+
+        if reuse:
+            with self._pool_lock:
+                idle = self._idle.get(self._server)
+                if idle:
+                    return idle.pop(), True
+        scheme, netloc = self._server
+        if scheme == "http":
+            return http.client.HTTPConnection(netloc, timeout=60), False
+        return http.client.HTTPSConnection(netloc, timeout=60), False
+
+    def _release(self, conn):
+        with self._pool_lock:
+            self._idle.setdefault(self._server, []).append(conn)
+
+    def _request_once(self, method, path, body, headers, reuse=True):
+        """
+        Send one request and return (status, reason, Retry-After, body).
+        Raises RequestNotSent if it failed before it was sent completely.
+        """
+        import http.client
+
+        conn, reused = self._connect(reuse)
+        try:
+            if conn.sock is None:
+                conn.connect()
+            conn.request(method, self._base_path + path, body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            if reused:
+                # The server may have closed the idle connection meanwhile.
+                return self._request_once(method, path, body, headers, reuse=False)
+            raise RequestNotSent(f"{type(e).__name__}: {e}") from e
+        try:
+            res = conn.getresponse()
+            data = res.read().decode("utf-8")
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            if reused and isinstance(e, http.client.RemoteDisconnected):
+                # The server closed the idle connection without reading the
+                # request (the keep-alive race), so it was not received.
+                return self._request_once(method, path, body, headers, reuse=False)
+            raise
+        if res.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return res.status, res.reason, res.getheader("Retry-After"), data
+
+    def retry_delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before retry number `attempt` (starting at 0): the
+        server's `retry_after` if given, else the jittered backoff.
+        """
+        delay = parse_retry_after(retry_after)
+        if delay is not None:
+            return delay
+        return random.uniform(0, min(self.backoff * 2**attempt, self.max_backoff))
+
+    def request(self, method, path, payload, content_type=None):
+        """
+        Send `payload` (str or bytes) and return the response body. Raises
+        APIError if the request fails for good.
+        """
+        import http.client
+
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        attempt = 0
+        while True:
+            headers = dict(self.headers)
+            if content_type is not None:
+                headers["Content-Type"] = content_type
+            body = payload
+            compressed = self._server not in self._uncompressed
+            if compressed:
+                headers["Content-Encoding"] = "gzip"
+                body = gzip.compress(payload)
+
+            retry_after = None
+            try:
+                status, reason, retry_after, data = self._request_once(
+                    method, path, body, headers
+                )
+            except RequestNotSent as e:
+                status, reason, data = None, "connection error", str(e)
+            except (OSError, http.client.HTTPException) as e:
+                if method not in IDEMPOTENT_METHODS:
+                    raise APIError(
+                        f"Request failed with {type(e).__name__} after it was "
+                        f"sent, not retried as it may have been received: {e}"
+                    )
+                status, reason, data = None, type(e).__name__, str(e)
+
+            if status == 415 and compressed:
+                self._uncompressed.add(self._server)
+                continue
+            if status is not None and 200 <= status < 300:
+                return data
+            if attempt >= self.max_retries or (
+                status is not None and status not in RETRY_STATUSES
+            ):
+                if status is None:
+                    raise APIError(f"Request failed with {reason}: {data}")
+                raise APIError(f"Request failed with {status} {reason}: {data}", status)
+            delay = self.retry_delay(attempt, retry_after)
+            if delay > self.max_backoff:
+                raise APIError(
+                    f"Request failed with {status} {reason}, the server asks to "
+                    f"retry after {delay:.0f}s: {data}",
+                    status,
+                    retry_after=delay,
+                )
+            time.sleep(delay)
+            attempt += 1
+
     def post(self, payload):
-        conn = http.client.HTTPSConnection(self.endpoint_url)
-        conn.request("POST", "/assessment", payload, self.headers)
-        res = conn.getresponse()
-        status = res.status
-        reason = res.reason
-        data = res.read().decode("utf-8")
-        if not (200 <= status < 300):
-            raise RuntimeError(f"Request failed with {status} {reason}: {data}")
+        return self.request("POST", "/assessment", payload)
+
+    def post_many(self, payloads, max_workers=4):
+        """
+        Post several assessments (JSON strings) in one request, as a JSON
+        array to `/assessment` (stored all at once by PostgREST-style APIs),
+        and return an UploadResult per payload, in order.
+
+        If the server rejects the array with a client error, the assessments
+        are posted one by one (see `post_each()`), which tells the rejected
+        ones apart. A server which accepts all of them on their own does not
+        take arrays, and gets single posts from then on.
+        """
+        if len(payloads) <= 1 or self._server in self._no_arrays:
+            return self.post_each(payloads, max_workers)
+        try:
+            self.post("[" + ",".join(payloads) + "]")
+        except APIError as e:
+            if e.status is None or e.status in RETRY_STATUSES or e.status >= 500:
+                return [
+                    UploadResult(index, False, e.status, str(e))
+                    for index in range(len(payloads))
+                ]
+        else:
+            return [UploadResult(index, True) for index in range(len(payloads))]
+        results = self.post_each(payloads, max_workers)
+        if all(result.ok for result in results):
+            self._no_arrays.add(self._server)
+        return results
+
+    def post_each(self, payloads, max_workers=4):
+        """
+        Post several assessments, each with its own request to
+        `/assessment`, over up to `max_workers` pooled connections at a
+        time, and return an UploadResult per payload, in order.
+        """
+
+        def post(item):
+            index, payload = item
+            try:
+                self.post(payload)
+            except APIError as e:
+                return UploadResult(index, False, e.status, str(e))
+            return UploadResult(index, True)
+
+        if max_workers <= 1 or len(payloads) <= 1:
+            return [post(item) for item in enumerate(payloads)]
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(min(max_workers, len(payloads))) as pool:
+            return list(pool.map(post, enumerate(payloads)))
+
+
+class BulkUploader:
+    """
+    Accumulates assessments and uploads them with `APIClient.post_many()`,
+    one request per batch of at most `max_items` assessments and
+    `max_bytes` bytes (a larger assessment is sent in a batch of its own).
+    If the server does not take batches, up to `max_workers` assessments
+    of a batch are posted at a time.
+
+    `results` holds an UploadResult per added assessment, indexed in the
+    order they were added, once its batch was sent. Use it as a context
+    manager, or call `flush()` to send the last batch.
+    """
+
+    def __init__(self, client, max_items=100, max_bytes=4 * 1024**2, max_workers=4):
+        self.client = client
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.results = []
+        self._batch = []
+        self._size = 0
+
+    def add(self, payload):
+        size = len(payload.encode("utf-8")) + 1  # with the "," of the array
+        if self._batch and self._size + size > self.max_bytes:
+            self.flush()
+        self._batch.append(payload)
+        self._size += size
+        if len(self._batch) >= self.max_items:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        offset = len(self.results)
+        for result in self.client.post_many(self._batch, self.max_workers):
+            result.index += offset
+            self.results.append(result)
+        self._batch = []
+        self._size = 0
+
+    @property
+    def failures(self):
+        return [result for result in self.results if not result.ok]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,209 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import json
+import threading
+import weakref
+import zlib
+
+from resqui.trace import span
+
+
+# Defaults for the report caches of the plugins
+REPORT_CACHE_MAXSIZE = 32
+REPORT_CACHE_MAX_BYTES = 64 * 1024**2
+REPORT_CACHE_COMPRESS_THRESHOLD = 256 * 1024
+
+_missing = object()
+_caches = weakref.WeakSet()
+
+
+class LRUCache(MutableMapping):
+    """
+    A thread-safe mapping which evicts the least recently used entries.
+
+    The cache holds at most `maxsize` entries and, if `max_bytes` is set,
+    at most `max_bytes` of (JSON-serialised) values. Values of at least
+    `compress_threshold` bytes are stored zlib-compressed and decompressed
+    on access, which requires them to be JSON-serialisable.
+
+    Hits, misses (counted by `get()`) and evictions are recorded. Named
+    caches are listed by `cache_stats()`.
+    """
+
+    def __init__(
+        self, maxsize=None, max_bytes=None, compress_threshold=None, name=None
+    ):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()  # key -> (compressed, value, size)
+        self._lock = threading.RLock()
+        if name is not None:
+            _caches.add(self)
+
+    # Caches are compared by identity, unlike other mappings.
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def _encode(self, value):
+        if self.max_bytes is None and self.compress_threshold is None:
+            return False, value, 0
+        data = json.dumps(value).encode()
+        threshold = self.compress_threshold
+        if threshold is not None and len(data) >= threshold:
+            data = zlib.compress(data)
+            return True, data, len(data)
+        return False, value, len(data)
+
+    def __setitem__(self, key, value):
+        entry = self._encode(value)
+        with self._lock:
+            if key in self._entries:
+                del self[key]
+            self._entries[key] = entry
+            self.nbytes += entry[2]
+            self._evict()
+
+    def _evict(self):
+        # The newest entry is always kept, even if it exceeds max_bytes on its own.
+        while len(self._entries) > 1 and (
+            (self.maxsize is not None and len(self._entries) > self.maxsize)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def __getitem__(self, key):
+        with self._lock:
+            compressed, value, _ = self._entries[key]
+            self._entries.move_to_end(key)
+        if compressed:
+            return json.loads(zlib.decompress(value))
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self[key]
+
+    def __delitem__(self, key):
+        with self._lock:
+            _, _, size = self._entries.pop(key)
+            self.nbytes -= size
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "bytes": self.nbytes,
+        }
+
+
+class _Call:
+    """An in-flight computation other callers can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    A thread-safe memoizer which coalesces concurrent calls.
+
+    `do(key, fn, ...)` returns the cached result for `key` if there is one.
+    Otherwise the first caller runs `fn` while concurrent callers for the
+    same key wait for it and receive the same result. If `fn` raises, the
+    exception is propagated to all waiting callers and nothing is cached,
+    so a later call will try again.
+
+    The results are kept in `cache`, which can be any mapping (a plain dict
+    by default).
+    """
+
+    def __init__(self, cache=None):
+        self.cache = {} if cache is None else cache
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with span("cache.do", cache=getattr(self.cache, "name", None)) as s:
+            return self._do(s, key, fn, *args, **kwargs)
+
+    def _do(self, s, key, fn, *args, **kwargs):
+        with self._lock:
+            result = self.cache.get(key, _missing)
+            if result is not _missing:
+                s.set(hit=True)
+                return result
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        # Waiting for another caller's computation counts as a hit as well.
+        s.set(hit=not is_leader)
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None:
+                    self.cache[key] = call.result
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self.cache
+
+
+def cache_stats():
+    """Return the statistics of all named caches, sorted by name."""
+    return {c.name: c.stats() for c in sorted(_caches, key=lambda c: c.name)}
+
+
+def report_cache(name):
+    """
+    Create the bounded, single-flight cache used by plugins to hold the raw
+    reports of their backends.
+    """
+    return SingleFlight(
+        LRUCache(
+            maxsize=REPORT_CACHE_MAXSIZE,
+            max_bytes=REPORT_CACHE_MAX_BYTES,
+            compress_threshold=REPORT_CACHE_COMPRESS_THRESHOLD,
+            name=name,
+        )
+    )
@@ -1,88 +1,187 @@
 """
 Usage:
-    resqui [options]
+    resqui [-c <config_file>]... [-t <github_token>]... [options]
     resqui indicators
+    resqui plan [-c <config_file>]... [-t <github_token>]... [options]
+    resqui outbox (flush | status) [options]
 
 Options:
-    -u <repository_url>   URL of the repository to be analyzed (GitHub URLs, Zenodo DOIs and URLs accepted).
-    -c <config_file>      Path to the configuration file.
-    -o <output_file>      Path to the output file [default: resqui_summary.json].
-    -t <github_token>     GitHub API token.
-    -d <dashverse_token>  DashVerse API token.
-    -b <branch>           The Git branch to be checked.
-    -v                    Verbose output.
-    --version             Show the version of the script.
-    --help                Show this help message.
+    -u <repository_url>    URL of the repository to be analyzed (GitHub URLs, Zenodo DOIs and URLs accepted).
+    -c <config_file>       Path to the configuration file. Given several times, the union of
+                           their indicators is run once and each gets its own output file.
+    -o <output_file>       Path to the output file [default: resqui_summary.json].
+    --compact              Write the output file without indentation.
+    --resume               Resume an interrupted run with the same configuration,
+                           repository and commit from its journal (<output_file>.journal).
+    -t <github_token>      GitHub API token. Given several times, each tool run uses the token
+                           with the most remaining requests.
+    -d <dashverse_token>   DashVerse API token.
+    -b <branch>            The Git branch to be checked.
+    -v                     Verbose output.
+    --timeout <duration>   Time budget for the whole run, e.g. 30m (overrides the configuration).
+    --deadline <duration>  Like --timeout, but run the cheapest indicators first and skip
+                           the ones which are not expected to finish in time.
+    --trace <trace_file>   Write a Chrome trace of the run and the flat timings
+                           of its phases (<trace_file>.timings.json).
+    --record <cassette>    Record all tool runs (output and report files) to a cassette.
+    --replay <cassette>    Replay the tool runs from a cassette instead of running them.
+    --version              Show the version of the script.
+    --help                 Show this help message.
 """
 
-import itertools
-import time
-import threading
-import importlib
+from datetime import datetime
 import os
 import shutil
 import subprocess
 import sys
 import tempfile
 
+from resqui.api import APIClient
+from resqui.cache import cache_stats
 from resqui.core import Context, Summary
-from resqui.config import Configuration
+from resqui.config import Configuration, merge_configurations
+from resqui.journal import Journal, journal_path, step_key
+from resqui.outbox import Outbox, OutboxFlusher
+from resqui.plan import compile_plan
+from resqui.progress import Progress
+from resqui.providers import ALL, choose
+from resqui.runner import Runner
+from resqui.timings import TimingHistory
+from resqui.tokens import TokenPool
+from resqui.trace import span, tracer, timings_path
 from resqui.tools import (
     indented,
     is_zenodo_url,
     to_https,
     project_name_from_url,
     ensure_list,
+    parse_duration,
     zenodo_url_to_git,
+    CallTimeoutError,
 )
-from resqui.plugins import IndicatorPlugin, PluginInitError
-from resqui.executors import ExecutorInitError
+from resqui.plugins import PluginInitError, plugin_errors, plugin_registry
+from resqui.executors import Cassette, CassetteError, ExecutorInitError, use_cassette
 from resqui.docopt import docopt
 from resqui.version import __version__
 
+# Seconds to wait for the upload of the summary at the end of a run, before
+# leaving it in the outbox
+UPLOAD_WAIT = 60
 
-class Spinner:
+
+class Profile:
     """
-    A simple spinner class to indicate progress in the console.
-    Use it as a context manager.
+    One configuration of a run with its summary, the file it is written to
+    and the journal of its finished steps.
+
+    When several configurations share a run (see `merge_configurations`),
+    the results are added with the indicators (and `@id`s) each of them
+    lists, and only to the ones which list the indicator at all.
     """
 
-    def __init__(self, print_time=True):
-        self.spinning = False
-        self.spinner_thread = None
-        self.start_time = time.time()
-        self.print_time = print_time
-
-    def start(self):
-        self.spinning = True
-        self.spinner_thread = threading.Thread(target=self._spinner)
-        self.spinner_thread.start()
-
-    def stop(self):
-        self.spinning = False
-        elapsed_time = time.time() - self.start_time
-        if self.spinner_thread:
-            self.spinner_thread.join()
-        if self.print_time:
-            print(f"({elapsed_time:.1f}s)", end=": ")
-
-    def _spinner(self):
-        for char in itertools.cycle("|/-\\"):
-            sys.stdout.write(char)
-            sys.stdout.flush()
-            time.sleep(0.1)
-            sys.stdout.write("\b")
-            if not self.spinning:
-                break
-
-    def __enter__(self):
-        if not sys.stdout.isatty():
-            return self
-        self.start()
-        return self
-
-    def __exit__(self, exc_type, exc_value, traceback):
-        self.stop()
+    def __init__(self, configuration, summary, output_file, shared=False):
+        self.configuration = configuration
+        self.summary = summary
+        self.output_file = output_file
+        self.shared = shared
+        self.writer = None
+        self.journal = None
+        self.finished = {}
+
+    def start(self, run_key, compact=False, resume=False):
+        """
+        Start streaming the summary to the output file and journaling the
+        finished steps. Returns the steps already finished (with `resume`).
+        """
+        # Each check is written to the output file as soon as it is done
+        self.writer = self.summary.stream(self.output_file, compact=compact)
+        # Finished steps are checkpointed, so that an interrupted run can
+        # be resumed with --resume
+        self.journal = Journal(journal_path(self.output_file), run_key)
+        self.finished = self.journal.open(resume=resume)
+        return self.finished
+
+    def indicators_for(self, indicator, step):
+        """
+        The configured indicators which take the results of `indicator`, run
+        in `step` (its list of indicators). For a provider of alternatives
+        which is not listed, these are the ones of the first listed provider.
+        """
+        if not self.shared:
+            return [indicator]
+        for candidate in [indicator] + step:
+            indicators = self.configuration.indicators_for(
+                candidate["plugin"], candidate["name"]
+            )
+            if indicators:
+                return indicators
+        return []
+
+    def add_result(self, indicator, step, plugin_class, result):
+        """Add a result to the summary and return the checks it added."""
+        return [
+            self.summary.add_indicator_result(own, plugin_class, result)
+            for own in self.indicators_for(indicator, step)
+        ]
+
+    def add_outcomes(self, mode, step, outcomes):
+        """
+        Add the outcomes of a step, as (indicator, plugin class, results) of
+        each provider which ran, and return the checks they added.
+        """
+        checks = []
+        if mode == ALL:
+            for own, plugin_class, results in self.chosen(outcomes):
+                for result in ensure_list(results):
+                    checks.append(
+                        self.summary.add_indicator_result(own, plugin_class, result)
+                    )
+            return checks
+        for indicator, plugin_class, results in outcomes:
+            for result in ensure_list(results):
+                checks += self.add_result(indicator, step, plugin_class, result)
+        return checks
+
+    def chosen(self, outcomes):
+        """
+        The outcomes this profile takes from a step which ran all providers
+        of an @id, with its own indicators: for each of its @ids, the one
+        its mode of alternatives picks (see `providers.choose`), or those of
+        all providers it lists if it declares none.
+        """
+        by_pair = {
+            (indicator["plugin"], indicator["name"]): (plugin_class, results)
+            for indicator, plugin_class, results in outcomes
+        }
+        indicator_ids = dict.fromkeys(
+            own["@id"]
+            for indicator, _, _ in outcomes
+            for own in self.configuration.indicators_for(
+                indicator["plugin"], indicator["name"]
+            )
+        )
+        chosen = []
+        for indicator_id in indicator_ids:
+            listed = [
+                (own, *by_pair[own["plugin"], own["name"]])
+                for own in self.configuration.providers_of(indicator_id)
+                if (own["plugin"], own["name"]) in by_pair
+            ]
+            if self.configuration.alternatives_mode(indicator_id) is None:
+                chosen += listed
+            else:
+                chosen.append(choose(listed))
+        return chosen
+
+
+def profile_output_file(output_file, config_file):
+    """
+    The output file of one of several configurations: the name of the
+    configuration file is inserted before the extension.
+    """
+    base, extension = os.path.splitext(output_file)
+    name = os.path.splitext(os.path.basename(config_file))[0]
+    return f"{base}.{name}{extension}"
 
 
 class GitInspector:
@@ -134,13 +233,86 @@ def resqui():
         print_indicator_plugins()
         exit(0)
 
-    configuration = Configuration(args["-c"])
+    if args["outbox"]:
+        exit(manage_outbox(args["flush"], args["-d"]))
+
+    configurations = [Configuration(path) for path in args["-c"]]
+    if not configurations:
+        configurations = [Configuration()]
+    if len(configurations) == 1:
+        configuration = configurations[0]
+    else:
+        configuration = merge_configurations(configurations)
     output_file = args["-o"]
+    if len(configurations) > 1:
+        output_files = {}
+        for profile_configuration in configurations:
+            path = profile_output_file(output_file, profile_configuration.path)
+            if path in output_files:
+                print(
+                    f"Error: {output_files[path]} and {profile_configuration.path} "
+                    f"would both be written to {path}; rename one of them"
+                )
+                exit(1)
+            output_files[path] = profile_configuration.path
     url = args["-u"]
     branch = args["-b"]
-    github_token = args["-t"]
+    github_tokens = args["-t"]
+    github_token = github_tokens[0] if github_tokens else None
+    token_pool = TokenPool(github_tokens) if len(github_tokens) > 1 else None
     dashverse_token = args["-d"]
     verbose = args["-v"]
+    run_timeout = parse_duration(args["--timeout"])
+    if run_timeout is None:
+        run_timeout = configuration.timeout
+    deadline = parse_duration(args["--deadline"])
+    if deadline is not None and (run_timeout is None or deadline < run_timeout):
+        run_timeout = deadline
+
+    # Configuration errors are reported before anything expensive happens
+    history = TimingHistory()
+    plan = compile_plan(
+        configuration,
+        Context(github_token=github_token, dashverse_token=dashverse_token),
+        history,
+    )
+    if args["plan"]:
+        print("\n".join(plan.describe()))
+        exit(1 if plan.errors else 0)
+    for warning in plan.warnings:
+        print(f"Warning: {warning}")
+    if plan.errors:
+        for error in plan.errors:
+            print(f"Error: {error}")
+        exit(1)
+
+    cassette = None
+    if args["--record"] is not None:
+        cassette = Cassette(
+            args["--record"], record=True, secrets=[*github_tokens, dashverse_token]
+        )
+    elif args["--replay"] is not None:
+        try:
+            cassette = Cassette(
+                args["--replay"], secrets=[*github_tokens, dashverse_token]
+            )
+        except CassetteError as e:
+            print(f"Error: {e}")
+            exit(1)
+    trace_file = args["--trace"]
+    if trace_file is not None:
+        tracer.start()
+
+    # Summaries are uploaded from the outbox by a background thread, which
+    # starts with the summaries left over from previous runs.
+    outbox = Outbox()
+    try:
+        flusher = OutboxFlusher(outbox, APIClient(dashverse_token))
+    except ValueError as e:
+        flusher = None
+        upload_error = e
+    else:
+        flusher.start()
 
     temp_dir = None
     if url is None:
@@ -152,120 +324,274 @@ def resqui():
             exit(1)
     else:
         if is_zenodo_url(url):
-            url, branch = zenodo_url_to_git(url)
+            try:
+                url, ref = zenodo_url_to_git(url)
+            except (ValueError, OSError) as e:
+                print(f"Error: cannot resolve {url}: {e}")
+                exit(1)
+            if ref is not None:
+                branch = ref
 
         temp_dir = tempfile.mkdtemp()
         try:
-            subprocess.run(
-                ["git", "clone", url, temp_dir],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+            with span("clone", url=url):
+                subprocess.run(
+                    ["git", "clone", url, temp_dir],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
         except subprocess.CalledProcessError as e:
             print(f"Error cloning {url}: {e}")
             raise
         gitinspector = GitInspector(temp_dir)
 
-    url = gitinspector.remote_https_url
-    project_name = gitinspector.project_name_from_url
-    author = gitinspector.author
-    email = gitinspector.email
-    software_version = gitinspector.version
-
-    branch_hash_or_tag = gitinspector.current_commit_hash if branch is None else branch
-
-    if temp_dir is not None:
-        shutil.rmtree(temp_dir)
-
-    if github_token is not None:
-        print("GitHub API token \033[92m✔\033[0m")
-    else:
-        print("GitHub API token \033[91m✖\033[0m")
-
-    context = Context(github_token=github_token, dashverse_token=dashverse_token)
-
-    print(f"Repository URL: {url}")
-    print(f"Project name: {project_name}")
-    print(f"Author: {author}")
-    print(f"Email: {email}")
-    print(f"Version: {software_version}")
-    print(f"Branch, tag or commit hash: {branch_hash_or_tag}")
-    print("Checking indicators ...")
+    try:
+        with span("metadata"):
+            url = gitinspector.remote_https_url
+            project_name = gitinspector.project_name_from_url
+            author = gitinspector.author
+            email = gitinspector.email
+            software_version = gitinspector.version
+            commit_hash = gitinspector.current_commit_hash
+
+            branch_hash_or_tag = commit_hash if branch is None else branch
+
+        if token_pool is not None:
+            print(f"GitHub API tokens ({len(token_pool)}) \033[92m✔\033[0m")
+        elif github_token is not None:
+            print("GitHub API token \033[92m✔\033[0m")
+        else:
+            print("GitHub API token \033[91m✖\033[0m")
 
-    summary = Summary(
-        author, email, project_name, url, software_version, branch_hash_or_tag
-    )
-    plugin_instances = {}
-    for indicator in configuration._cfg["indicators"]:
-        print(
-            f"  {indicator['name']}/{indicator['plugin']}",
-            end=" ",
+        context = Context(
+            github_token=github_token,
+            dashverse_token=dashverse_token,
+            repo_path=gitinspector.path,
+            github_tokens=token_pool,
         )
-        sys.stdout.flush()
 
-        base_package = __name__.rsplit(".", 1)[0]
-        plugin_class_name = indicator["plugin"]
-
-        if plugin_class_name not in plugin_instances:
-            plugin_module = importlib.import_module(base_package + ".plugins")
-            plugin_class = getattr(plugin_module, plugin_class_name)
-            with Spinner(print_time=False):
-                try:
-                    plugin_instances[plugin_class_name] = plugin_class(context)
-                except (ExecutorInitError, PluginInitError) as e:
-                    print(f"⚠️  {e} (skipping its indicators)")
+        print(f"Repository URL: {url}")
+        print(f"Project name: {project_name}")
+        print(f"Author: {author}")
+        print(f"Email: {email}")
+        print(f"Version: {software_version}")
+        print(f"Branch, tag or commit hash: {branch_hash_or_tag}")
+        print("Checking indicators ...")
+
+        shared = len(configurations) > 1
+        profiles = []
+        for profile_configuration in configurations:
+            summary = Summary(
+                author, email, project_name, url, software_version, branch_hash_or_tag
+            )
+            profile = Profile(
+                profile_configuration,
+                summary,
+                (
+                    profile_output_file(output_file, profile_configuration.path)
+                    if shared
+                    else output_file
+                ),
+                shared=shared,
+            )
+            profile.start(
+                Journal.make_run_key(profile_configuration.digest, url, commit_hash),
+                compact=args["--compact"],
+                resume=args["--resume"],
+            )
+            profiles.append(profile)
+
+        runner = Runner(
+            configuration,
+            context,
+            url,
+            branch_hash_or_tag,
+            timeout=run_timeout,
+            history=history,
+            plan=plan,
+        )
+        steps = runner.steps()
+        if deadline is not None:
+            steps = runner.schedule(steps)
+        with use_cassette(cassette), Progress() as progress:
+            for mode, indicators in steps:
+                indicator = indicators[0]
+                key = step_key(mode, indicators)
+                label = f"  {key}"
+
+                # The profiles which list the step and have not finished it
+                pending = []
+                for profile in profiles:
+                    if not profile.indicators_for(indicator, indicators):
+                        continue
+                    if key in profile.finished:
+                        for check in profile.finished[key]:
+                            profile.summary.add_check(check)
+                    else:
+                        pending.append(profile)
+                if not pending:
+                    progress.log(f"{label} resumed")
                     continue
 
-        plugin_instance = plugin_instances[plugin_class_name]
-        plugin_method = indicator["name"]
-
-        with Spinner():
-            results = getattr(plugin_instance, plugin_method)(url, branch_hash_or_tag)
+                if deadline is not None and not runner.fits(mode, indicators):
+                    progress.log(f"{label} skipped")
+                    result = runner.skip(mode, indicators)
+                    outcomes = [
+                        (provider, runner.plugin_class(provider["plugin"]), result)
+                        for provider in (indicators if mode == ALL else [indicator])
+                    ]
+                    for profile in pending:
+                        profile.add_outcomes(mode, indicators, outcomes)
+                    continue
 
-        for result in ensure_list(results):
-            status = "\033[92m✔\033[0m" if result else "\033[91m✖\033[0m"
-            if verbose:
-                print(indented("\n" + result.evidence + status, 4), end="")
+                progress.start(label, label)
+                if mode == ALL:
+                    outcomes = runner.run_alternatives(mode, indicators)
+                    prefix = ""
+                elif mode is not None:
+                    outcomes = [runner.run_alternatives(mode, indicators)]
+                    prefix = f"[{outcomes[0][0]['plugin']}] "
+                else:
+                    prefix = ""
+                    plugin_class_name = indicator["plugin"]
+                    plugin_class = runner.plugin_class(plugin_class_name)
+                    try:
+                        runner.load_plugin(plugin_class_name)
+                    except (ExecutorInitError, PluginInitError) as e:
+                        progress.finish(label, f"⚠️  {e} (skipping its indicators)")
+                        continue
+                    except CallTimeoutError:
+                        pass  # recorded as timed out by the runner
+                    results = runner.run_indicator(indicator)
+                    outcomes = [(indicator, plugin_class, results)]
+
+                statuses = []
+                evidence = []
+                for provider, _, results in outcomes:
+                    if mode == ALL:
+                        statuses.append(f"[{provider['plugin']}]")
+                    for result in ensure_list(results):
+                        status = "\033[92m✔\033[0m" if result else "\033[91m✖\033[0m"
+                        statuses.append(status)
+                        evidence.append(indented(result.evidence + status, 4))
+                for profile in pending:
+                    checks = profile.add_outcomes(mode, indicators, outcomes)
+                    profile.journal.record(key, checks)
+                progress.finish(label, prefix + " ".join(statuses))
+                if verbose:
+                    progress.log("\n".join(evidence))
+
+        runner.record_indicators()
+        history.save()
+        print_cache_stats()
+
+        checks = sum(len(profile.summary.checks) for profile in profiles)
+        with span("summary.write", checks=checks):
+            for profile in profiles:
+                profile.writer.close()
+        for profile in profiles:
+            profile.journal.remove()
+            print(f"Summary has been written to {profile.output_file}")
+
+        print("Publishing summary " if not shared else "Publishing summaries ", end="")
+        sys.stdout.flush()
+        if flusher is None:
+            print(f"\033[91m✖\033[0m {upload_error}")
+        else:
+            try:
+                with span("summary.upload"):
+                    payloads = [
+                        profile.summary.to_json(indent=None) for profile in profiles
+                    ]
+                    for payload in payloads:
+                        outbox.add(payload)
+                    flusher.stop(UPLOAD_WAIT)
+            except OSError as e:
+                print(f"\033[91m✖\033[0m cannot write to the outbox: {e}")
             else:
-                print(status, end=" ")
-
-            summary.add_indicator_result(indicator, plugin_class, result)
-        print()
+                entries = [outbox.entry(outbox.key(payload)) for payload in payloads]
+                left = [entry for entry in entries if entry is not None]
+                if not left:
+                    print("\033[92m✔\033[0m")
+                else:
+                    error = left[0]["error"] or f"not done after {UPLOAD_WAIT}s"
+                    if len(left) == 1:
+                        stays = "The summary stays in the outbox"
+                    else:
+                        stays = f"{len(left)} summaries stay in the outbox"
+                    print(
+                        f"\033[91m✖\033[0m {error}\n"
+                        f"{stays} ({outbox.path}), "
+                        "upload with 'resqui outbox flush'"
+                    )
+    finally:
+        # The clone is shared with the plugins, so it lives until the end of the run.
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        if trace_file is not None:
+            tracer.write(trace_file)
+            print(
+                f"Trace has been written to {trace_file} and {timings_path(trace_file)}"
+            )
 
-    summary.write(output_file)
-    print(f"Summary has been written to {output_file}")
 
-    print("Publishing summary ", end="")
-    sys.stdout.flush()
-    try:
-        summary.upload(context.dashverse_token)
-    except (RuntimeError, ValueError) as e:
-        print(f"\033[91m✖\033[0m {e}")
-    else:
-        print("\033[92m✔\033[0m")
+def manage_outbox(flush, dashverse_token=None):
+    """
+    Uploads the summaries in the outbox (`flush`) or lists them. Returns
+    the exit code.
+    """
+    outbox = Outbox()
+    if flush:
+        try:
+            api = APIClient(dashverse_token)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        sent, failed = outbox.flush(api, force=True)
+        print(f"{len(sent)} summaries uploaded, {len(failed)} failed")
+        return 1 if failed else 0
+
+    entries = outbox.entries()
+    print(f"{len(entries)} summaries pending in {outbox.path}")
+    for key, entry in entries:
+        queued = datetime.fromtimestamp(entry["queued"]).isoformat(" ", "seconds")
+        line = f"  {key[:12]} queued {queued}, {entry['attempts']} failed attempts"
+        if entry["error"]:
+            line += f", last error: {entry['error']}"
+        print(line)
+    return 0
+
+
+def print_cache_stats():
+    """
+    Prints the hit, miss and eviction counts of the caches used in the run.
+    """
+    for name, stats in cache_stats().items():
+        if stats["hits"] or stats["misses"]:
+            print(
+                f"Cache {name}: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['evictions']} evictions, {stats['entries']} entries"
+            )
 
 
 def print_indicator_plugins():
     """
-    Prints a list of available indicator plugins.
+    Prints a list of available indicator plugins, from their metadata in the
+    plugin registry (without importing them).
     """
-
-    def subclasses(cls):
-        return set(cls.__subclasses__()).union(
-            s for c in cls.__subclasses__() for s in subclasses(c)
-        )
-
-    for cls in sorted(subclasses(IndicatorPlugin), key=lambda c: c.__name__):
-        print(f"Class: {cls.__name__}")
+    plugins = plugin_registry().values()
+    for info in sorted(plugins, key=lambda info: info.class_name):
+        print(f"Class: {info.class_name}")
         for attr in ["name", "version", "id"]:
-            value = getattr(cls, attr, None)
+            value = getattr(info, attr)
             print(f"  {attr.capitalize()}: {value}")
-        indicators = getattr(cls, "indicators", [])
         print("  Indicators:")
-        if indicators:
-            for ind in indicators:
+        if info.indicators:
+            for ind in info.indicators:
                 print(f"    - {ind}")
         else:
             print("    (none)")
         print()
+    for error in plugin_errors():
+        print(f"Warning: {error}")
@@ -1,5 +1,9 @@
+import hashlib
 import json
 
+from resqui.providers import ALL
+from resqui.tools import parse_duration
+
 DEFAULT_CONFIG = {
     "indicators": [
         {
@@ -34,6 +38,7 @@ class Configuration:
     """
 
     def __init__(self, filepath=None):
+        self.path = filepath
         if filepath is None:
             print("Loading default configuration.")
             self._cfg = DEFAULT_CONFIG
@@ -41,3 +46,91 @@ class Configuration:
             print(f"Loading configuration from '{filepath}'.")
             with open(filepath) as f:
                 self._cfg = json.load(f)
+
+    @property
+    def digest(self):
+        """A hash of the configuration, to recognise runs with the same one."""
+        text = json.dumps(self._cfg, sort_keys=True)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @property
+    def timeout(self):
+        """The time budget of the whole run in seconds, or None."""
+        return parse_duration(self._cfg.get("timeout"))
+
+    def plugin_timeout(self, plugin_name):
+        """
+        The time budget of a plugin: initialising it and running all of its
+        indicators.
+        """
+        plugin_cfg = self._cfg.get("plugins", {}).get(plugin_name, {})
+        return parse_duration(plugin_cfg.get("timeout"))
+
+    def indicator_timeout(self, indicator):
+        """
+        The timeout of a single indicator, or None. The budget of its plugin
+        applies as well.
+        """
+        return parse_duration(indicator.get("timeout"))
+
+    def indicators_for(self, plugin_name, name):
+        """The configured indicators run by `name` of a plugin, one per @id."""
+        found = {}
+        for indicator in self._cfg.get("indicators", []):
+            if indicator.get("plugin") == plugin_name and indicator.get("name") == name:
+                found.setdefault(indicator.get("@id"), indicator)
+        return list(found.values())
+
+    def providers_of(self, indicator_id):
+        """The configured indicators with an @id, one per (plugin, name)."""
+        found = {}
+        for indicator in self._cfg.get("indicators", []):
+            if indicator.get("@id") == indicator_id:
+                found.setdefault(
+                    (indicator.get("plugin"), indicator.get("name")), indicator
+                )
+        return list(found.values())
+
+    def alternatives_mode(self, indicator_id):
+        """The mode of the alternative providers of an @id, or None."""
+        return self._cfg.get("alternatives", {}).get(indicator_id)
+
+
+def merge_configurations(configurations):
+    """
+    Merge several configurations (profiles) into one which runs every
+    (plugin, indicator) pair of their union once, as configured by the first
+    profile listing it. Plugin settings and all other settings are taken
+    from the first profile which has them.
+
+    The providers of an @id are alternatives only if every profile listing
+    the @id declares the same mode for it. Otherwise all of them are run
+    (mode `providers.ALL`), and each profile picks the results it asked for.
+    """
+    merged = Configuration.__new__(Configuration)
+    merged.path = None
+    cfg = {"indicators": [], "alternatives": {}, "plugins": {}}
+    seen = set()
+    modes = {}  # @id -> modes declared by the profiles listing it
+    for configuration in configurations:
+        for key, value in configuration._cfg.items():
+            if key == "indicators":
+                for indicator in value:
+                    pair = (indicator.get("plugin"), indicator.get("name"))
+                    if None in pair or pair not in seen:
+                        seen.add(pair)
+                        cfg["indicators"].append(indicator)
+                    mode = configuration.alternatives_mode(indicator.get("@id"))
+                    modes.setdefault(indicator.get("@id"), set()).add(mode)
+            elif key == "plugins":
+                for name, setting in value.items():
+                    cfg[key].setdefault(name, setting)
+            elif key != "alternatives":
+                cfg.setdefault(key, value)
+    for indicator_id, declared in modes.items():
+        if len(declared) > 1:
+            cfg["alternatives"][indicator_id] = ALL
+        elif declared != {None}:
+            cfg["alternatives"][indicator_id] = declared.pop()
+    merged._cfg = cfg
+    return merged
@@ -3,8 +3,30 @@ from datetime import datetime
 from dataclasses import dataclass
 from typing import Optional
 import json
+import textwrap
 
-from resqui.api import APIClient
+from resqui.api import APIClient, BulkUploader
+from resqui.tokens import TokenPool
+
+try:
+    import orjson
+except ImportError:  # optional, only makes compact serialisation faster
+    orjson = None
+
+
+def dumps(obj, indent=None):
+    """
+    Serialise `obj` as JSON with sorted keys, compact if `indent` is None.
+    Compact JSON is produced with orjson if it is installed (the output
+    is the same as without it).
+    """
+    if indent is None:
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+        return json.dumps(
+            obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+    return json.dumps(obj, sort_keys=True, indent=indent)
 
 
 @dataclass(frozen=True)
@@ -13,6 +35,10 @@ class Context:
 
     github_token: Optional[str] = None
     dashverse_token: Optional[str] = None
+    # Path to a local clone of the assessed repository, if available
+    repo_path: Optional[str] = None
+    # Several GitHub tokens to choose from for each tool run, if given
+    github_tokens: Optional[TokenPool] = None
 
 
 @dataclass
@@ -52,47 +78,134 @@ class Summary:
         self.software_version = software_version
         self.branch_hash_or_tag = branch_hash_or_tag
         self.checks = []
+        self._writers = []
 
     def add_indicator_result(self, indicator, checking_software, result):
-        self.checks.append(
-            {
-                "@type": "CheckResult",
-                "assessesIndicator": {"@id": indicator["@id"]},
-                "checkingSoftware": {
-                    "name": checking_software.name,
-                    "version": checking_software.version,
-                },
-                "process": result.process,
-                "status": {"@id": result.status_id},
-                "output": result.output,
-                "evidence": result.evidence,
-            }
-        )
+        check = {
+            "@type": "CheckResult",
+            "assessesIndicator": {"@id": indicator["@id"]},
+            "checkingSoftware": {
+                "name": checking_software.name,
+                "version": checking_software.version,
+            },
+            "process": result.process,
+            "status": {"@id": result.status_id},
+            "output": result.output,
+            "evidence": result.evidence,
+        }
+        self.add_check(check)
+        return check
 
-    def to_json(self):
-        return json.dumps(
-            {
-                "@context": "https://w3id.org/everse/rsqa/0.0.1/",
-                "@type": "SoftwareQualityAssessment",
-                "dateCreated": str(datetime.now()),
-                "license": "CC0-1.0",
-                "author": {"@type": "Person", "name": "Quality Pipeline"},
-                "assessedSoftware": {
-                    "@type": "SoftwareApplication",
-                    "name": self.project_name,
-                    "softwareVersion": self.software_version,
-                    "url": self.repo_url,
-                },
-                "checks": self.checks,
+    def add_check(self, check):
+        """Add a check as returned by `add_indicator_result()`."""
+        self.checks.append(check)
+        for writer in self._writers:
+            writer.add(check)
+
+    def document(self, checks=None):
+        """The JSON-LD document, with `checks` instead of all checks if given."""
+        return {
+            "@context": "https://w3id.org/everse/rsqa/0.0.1/",
+            "@type": "SoftwareQualityAssessment",
+            "dateCreated": str(datetime.now()),
+            "license": "CC0-1.0",
+            "author": {"@type": "Person", "name": "Quality Pipeline"},
+            "assessedSoftware": {
+                "@type": "SoftwareApplication",
+                "name": self.project_name,
+                "softwareVersion": self.software_version,
+                "url": self.repo_url,
             },
-            sort_keys=True,
-            indent=4,
-        )
+            "checks": self.checks if checks is None else checks,
+        }
+
+    def to_json(self, indent=4):
+        return dumps(self.document(), indent)
+
+    def stream(self, filename, compact=False):
+        """
+        Write the summary to `filename` now and every check added later as
+        soon as it is added. Returns the SummaryWriter, which has to be
+        closed.
+        """
+        writer = SummaryWriter(self, filename, compact)
+        for check in self.checks:
+            writer.add(check)
+        self._writers.append(writer)
+        return writer
 
-    def write(self, filename):
-        with open(filename, "w") as f:
-            f.write(self.to_json())
+    def write(self, filename, compact=False):
+        with SummaryWriter(self, filename, compact) as writer:
+            for check in self.checks:
+                writer.add(check)
 
     def upload(self, dashverse_token=None):
         api = APIClient(dashverse_token)
-        api.post(self.to_json())
+        api.post(self.to_json(indent=None))
+
+    @staticmethod
+    def upload_all(summaries, dashverse_token=None, **options):
+        """
+        Upload several summaries in batches (see BulkUploader for the
+        options) and return an UploadResult per summary.
+        """
+        api = APIClient(dashverse_token)
+        with BulkUploader(api, **options) as uploader:
+            for summary in summaries:
+                uploader.add(summary.to_json(indent=None))
+        return uploader.results
+
+
+class SummaryWriter:
+    """
+    Writes a summary to a file check by check, so that the serialised
+    document is never held in memory as a whole and finished checks are
+    on disk right away.
+
+    The file is valid JSON after every check: the document is written up
+    to the end of the `checks` array, followed by its closing part, which
+    is overwritten by the next check and then written again.
+    """
+
+    def __init__(self, summary, filename, compact=False):
+        self.summary = summary
+        self.indent = None if compact else 4
+        text = dumps(summary.document(checks=[]), self.indent)
+        marker = '"checks":[]' if compact else '"checks": []'
+        split = text.index(marker) + len(marker) - 1
+        self._tail = text[split:].encode("utf-8")
+        self._count = 0
+        self._file = open(filename, "wb")
+        self._file.write(text[:split].encode("utf-8"))
+        self._end = self._file.tell()
+        self._write_tail()
+
+    def add(self, check):
+        text = dumps(check, self.indent)
+        if self.indent is not None:
+            text = "\n" + textwrap.indent(text, " " * 2 * self.indent)
+        if self._count:
+            text = "," + text
+        self._file.seek(self._end)
+        self._file.write(text.encode("utf-8"))
+        self._end = self._file.tell()
+        self._count += 1
+        self._write_tail()
+
+    def _write_tail(self):
+        if self.indent is not None and self._count:
+            self._file.write(b"\n" + b" " * self.indent)
+        self._file.write(self._tail)
+        self._file.truncate()
+        self._file.flush()
+
+    def close(self):
+        if self in self.summary._writers:
+            self.summary._writers.remove(self)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
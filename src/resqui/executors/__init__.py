@@ -1,5 +1,13 @@
 from .base import ExecutorInitError
+from .cassette import Cassette, CassetteError, use_cassette
 from .docker import DockerExecutor
 from .python import PythonExecutor
 
-__all__ = ["ExecutorInitError", "DockerExecutor", "PythonExecutor"]
+__all__ = [
+    "ExecutorInitError",
+    "Cassette",
+    "CassetteError",
+    "use_cassette",
+    "DockerExecutor",
+    "PythonExecutor",
+]
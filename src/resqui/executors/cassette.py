@@ -0,0 +1,196 @@
+import base64
+from contextlib import contextmanager
+import gzip
+import json
+import os
+import subprocess
+import threading
+
+REDACTED = "<secret>"
+
+_active = None
+
+
+class CassetteError(Exception):
+    """Thrown if a cassette cannot be read or has no recording of a run"""
+
+    pass
+
+
+def active_cassette():
+    """The cassette executors record to or replay from, if any."""
+    return _active
+
+
+def is_replaying():
+    """Whether executors are to replay runs instead of running them."""
+    return _active is not None and not _active.recording
+
+
+@contextmanager
+def use_cassette(cassette):
+    """
+    Make all executors record to or replay from `cassette` (a recording
+    is saved at the end). Does nothing if `cassette` is None.
+    """
+    global _active
+    _active = cassette
+    try:
+        yield cassette
+    finally:
+        _active = None
+        if cassette is not None and cassette.recording:
+            cassette.save()
+
+
+def host_mounts(run_args):
+    """The host directories mounted into a container with `-v host:container`."""
+    mounts = []
+    for flag, value in zip(run_args, run_args[1:]):
+        if flag in ("-v", "--volume"):
+            host_path = value.split(":")[0]
+            if os.path.isdir(host_path):
+                mounts.append(host_path)
+    return mounts
+
+
+def env_keys(run_args):
+    """The names of the environment variables passed with `-e KEY=value`."""
+    return [
+        value.split("=")[0]
+        for flag, value in zip(run_args, run_args[1:])
+        if flag in ("-e", "--env")
+    ]
+
+
+def snapshot(directories):
+    """The size and modification time of all files in the directories."""
+    files = {}
+    for directory in directories:
+        for root, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if d != ".git"]
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class Cassette:
+    """
+    Recorded executor runs: the command, its arguments and the names of
+    the environment variables, the exit code, stdout and stderr and the
+    files the run wrote to mounted directories (e.g. `report.json`).
+
+    In record mode (`record=True`) the executors run as usual and append
+    their runs; `save()` writes them as gzip-compressed JSON. In replay
+    mode the executors neither pull images nor create virtual
+    environments, and each run is served from the cassette, including
+    the files it wrote. Runs are matched by executor, image and command,
+    in recorded order.
+
+    `secrets` (e.g. tokens) are replaced by a placeholder before anything
+    is stored or matched, as are the paths of mounted temporary
+    directories, so recordings match runs with other tokens and paths.
+    """
+
+    version = 1
+
+    def __init__(self, path, record=False, secrets=()):
+        self.path = path
+        self.recording = record
+        self.secrets = [s for s in secrets if s]
+        self.interactions = []
+        self._queues = {}
+        self._lock = threading.Lock()
+        if not record:
+            self.load()
+
+    def load(self):
+        try:
+            with gzip.open(self.path, "rt") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CassetteError(f"cannot read cassette '{self.path}': {e}")
+        if data.get("version") != self.version:
+            raise CassetteError(f"unsupported cassette version in '{self.path}'")
+        self.interactions = data["interactions"]
+        for interaction in self.interactions:
+            key = self._key(
+                interaction["executor"], interaction["image"], interaction["command"]
+            )
+            self._queues.setdefault(key, []).append(interaction)
+
+    def save(self):
+        with gzip.open(self.path, "wt") as f:
+            json.dump({"version": self.version, "interactions": self.interactions}, f)
+
+    def redact(self, text, mounts=()):
+        for secret in self.secrets:
+            text = text.replace(secret, REDACTED)
+        for i, mount in enumerate(mounts):
+            text = text.replace(mount, f"<mount{i}>")
+        return text
+
+    def _key(self, executor, image, command):
+        return json.dumps([executor, image, command])
+
+    def snapshot(self, run_args):
+        """Call before a recorded run to detect the files it writes."""
+        return snapshot(host_mounts(run_args))
+
+    def record(self, executor, image, command, run_args, env, result, before=None):
+        """Store a finished run (`result` is a CompletedProcess)."""
+        mounts = host_mounts(run_args)
+        files = {}
+        if before is not None:
+            for path, state in snapshot(mounts).items():
+                if before.get(path) == state:
+                    continue
+                index, mount = next(
+                    (i, m) for i, m in enumerate(mounts) if path.startswith(m)
+                )
+                with open(path, "rb") as f:
+                    content = base64.b64encode(f.read()).decode()
+                files[f"{index}/{os.path.relpath(path, mount)}"] = content
+        interaction = {
+            "executor": executor,
+            "image": image,
+            "command": [self.redact(arg, mounts) for arg in command],
+            "run_args": [self.redact(arg, mounts) for arg in run_args],
+            "env_keys": sorted(env),
+            "returncode": result.returncode,
+            "stdout": self.redact(result.stdout),
+            "stderr": self.redact(result.stderr),
+            "files": files,
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def replay(self, executor, image, command, run_args=()):
+        """Return the CompletedProcess of a recorded run and restore its files."""
+        mounts = host_mounts(run_args)
+        key = self._key(executor, image, [self.redact(arg, mounts) for arg in command])
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise CassetteError(
+                    f"no recorded {executor} run of {' '.join(command)[:200]!r} "
+                    f"in '{self.path}'"
+                )
+            # The last recording of a command is served again once the
+            # others have been used up.
+            interaction = queue.pop(0) if len(queue) > 1 else queue[0]
+
+        for name, content in interaction["files"].items():
+            index, relpath = name.split("/", 1)
+            path = os.path.join(mounts[int(index)], relpath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(base64.b64decode(content))
+        return subprocess.CompletedProcess(
+            command,
+            interaction["returncode"],
+            interaction["stdout"],
+            interaction["stderr"],
+        )
@@ -1,5 +1,10 @@
 import subprocess
+import threading
+import uuid
+
 from resqui.executors.base import ExecutorInitError
+from resqui.executors.cassette import active_cassette, env_keys, is_replaying
+from resqui.trace import span
 
 
 class DockerExecutor:
@@ -7,17 +12,22 @@ class DockerExecutor:
 
     def __init__(self, image_url, pull_args=None):
         self.url = image_url
+        self._running = set()
+        self._lock = threading.Lock()
         if pull_args is None:
             pull_args = []
+        if is_replaying():
+            return
         command = ["docker", "pull"] + pull_args + [self.url]
         try:
-            subprocess.run(
-                command,
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-        except subprocess.CalledProcessError:
+            with span("docker.pull", image=self.url):
+                subprocess.run(
+                    command,
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+        except (FileNotFoundError, subprocess.CalledProcessError):
             raise ExecutorInitError(
                 f"failed to initialise Docker executor: '{' '.join(command)}'"
             )
@@ -29,8 +39,53 @@ class DockerExecutor:
 
         Extra arguments to the command can be passed as a list of
         strings via `run_args`.
+
+        The container gets a unique name, so that it can be killed when
+        `cancel()` is called.
+
+        With an active cassette (see `cassette.use_cassette`), the run is
+        recorded or, in replay mode, served from the cassette.
         """
         if run_args is None:
             run_args = []
-        cmd = ["docker", "run"] + run_args + [self.url] + command
-        return subprocess.run(cmd, capture_output=True, text=True)
+        cassette = active_cassette()
+        if is_replaying():
+            return cassette.replay("docker", self.url, command, run_args)
+        before = cassette.snapshot(run_args) if cassette is not None else None
+        name = f"resqui-{uuid.uuid4().hex[:12]}"
+        cmd = ["docker", "run", "--name", name] + run_args + [self.url] + command
+        with self._lock:
+            self._running.add(name)
+        try:
+            with span("docker.run", image=self.url, container=name) as s:
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                s.set(exit_code=result.returncode, output_size=len(result.stdout))
+            if cassette is not None:
+                cassette.record(
+                    "docker",
+                    self.url,
+                    command,
+                    run_args,
+                    env_keys(run_args),
+                    result,
+                    before,
+                )
+            return result
+        finally:
+            with self._lock:
+                self._running.discard(name)
+
+    def kill(self, name):
+        """Kill a container started by this executor."""
+        subprocess.run(
+            ["docker", "kill", name],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def cancel(self):
+        """Kill all containers which are currently run by this executor."""
+        with self._lock:
+            names = list(self._running)
+        for name in names:
+            self.kill(name)
@@ -3,9 +3,12 @@ import os
 import tempfile
 import shutil
 import subprocess
+import threading
 
 from resqui.tools import normalized
 from resqui.executors.base import ExecutorInitError
+from resqui.executors.cassette import active_cassette, is_replaying
+from resqui.trace import span
 
 
 class PythonExecutor:
@@ -23,8 +26,13 @@ class PythonExecutor:
         """Instantiates a virtual environment in a temporary folder."""
         self.temp_dir = tempfile.mkdtemp()
         self.environment = environment if environment is not None else {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self.replaying = is_replaying()
         try:
-            venv.create(self.temp_dir, with_pip=True)
+            if not self.replaying:
+                with span("venv.create"):
+                    venv.create(self.temp_dir, with_pip=True)
             if packages is None:
                 return
             for package in packages:
@@ -33,13 +41,16 @@ class PythonExecutor:
             raise ExecutorInitError(f"failed to initialise Python executor: {e}")
 
     def install(self, package):
+        if self.replaying:
+            return
         try:
-            subprocess.run(
-                [f"{self.temp_dir}/bin/pip", "install", package],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+            with span("pip.install", package=package):
+                subprocess.run(
+                    [f"{self.temp_dir}/bin/pip", "install", package],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
         except (FileNotFoundError, subprocess.CalledProcessError) as e:
             raise ExecutorInitError(f"failed to initialise Python executor: {e}")
 
@@ -59,15 +70,43 @@ class PythonExecutor:
         return package in out.stdout
 
     def execute(self, script):
-        """Run the script in the virtual environment."""
+        """
+        Run the script in the virtual environment. The process is killed
+        when `cancel()` is called.
+        """
+        cassette = active_cassette()
+        if self.replaying:
+            return cassette.replay("python", None, [script])
         env = os.environ.copy()
         env.update(self.environment)
-        return subprocess.run(
-            [f"{self.temp_dir}/bin/python", "-c", script],
-            capture_output=True,
-            text=True,
-            env=env,
-        )
+        args = [f"{self.temp_dir}/bin/python", "-c", script]
+        with span("python.execute") as s:
+            process = subprocess.Popen(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=env,
+            )
+            with self._lock:
+                self._running.add(process)
+            try:
+                stdout, stderr = process.communicate()
+            finally:
+                with self._lock:
+                    self._running.discard(process)
+            s.set(exit_code=process.returncode, output_size=len(stdout))
+        result = subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+        if cassette is not None:
+            cassette.record("python", None, [script], [], self.environment, result)
+        return result
+
+    def cancel(self):
+        """Kill all scripts which are currently run by this executor."""
+        with self._lock:
+            processes = list(self._running)
+        for process in processes:
+            process.kill()
 
     def __del__(self):
         """Cleanup the temporary virtual environment on destruction."""
@@ -0,0 +1,204 @@
+import fnmatch
+import posixpath
+from functools import cached_property
+
+from resqui.cache import LRUCache
+from resqui.git import ls_tree, resolve_commit, tree_hash
+
+
+LICENSE_NAMES = {
+    "license",
+    "license.md",
+    "license.txt",
+    "license.rst",
+    "licence",
+    "licence.md",
+    "licence.txt",
+    "copying",
+    "copying.md",
+    "copying.txt",
+}
+CITATION_NAMES = {"citation.cff", "citation", "citation.bib", "citation.md"}
+CONTRIBUTING_NAMES = {
+    "contributing",
+    "contributing.md",
+    "contributing.rst",
+    "contributing.txt",
+}
+CONTRIBUTING_DIRS = {"", "docs", ".github"}
+CONTAINER_PATTERNS = [
+    "dockerfile",
+    "dockerfile.*",
+    "*.dockerfile",
+    "containerfile",
+    "docker-compose.yml",
+    "docker-compose.yaml",
+    "compose.yml",
+    "compose.yaml",
+    "singularity",
+    "singularity.*",
+]
+TEST_DIRS = {"test", "tests", "testing", "spec", "__tests__"}
+TEST_FILE_PATTERNS = [
+    "test_*.py",
+    "*_test.py",
+    "*_test.go",
+    "*.test.js",
+    "*.test.ts",
+    "*.spec.js",
+    "*.spec.ts",
+    "*test.java",
+    "*_test.rb",
+    "*_spec.rb",
+]
+CI_PATTERNS = [
+    ".github/workflows/*.yml",
+    ".github/workflows/*.yaml",
+    ".gitlab-ci.yml",
+    ".travis.yml",
+    ".circleci/config.yml",
+    "azure-pipelines.yml",
+    ".drone.yml",
+    "jenkinsfile",
+    "bitbucket-pipelines.yml",
+]
+REQUIREMENTS_PATTERNS = [
+    "requirements*.txt",
+    "pyproject.toml",
+    "setup.py",
+    "setup.cfg",
+    "pipfile",
+    "environment.yml",
+    "environment.yaml",
+    "package.json",
+    "cargo.toml",
+    "go.mod",
+    "pom.xml",
+    "build.gradle",
+    "build.gradle.kts",
+    "gemfile",
+    "composer.json",
+    "description",  # R packages
+    "project.toml",  # Julia packages
+]
+
+
+class RepoFacts:
+    """
+    Indexed file layout of a single commit tree.
+
+    The index is built in a single pass over `git ls-tree -r`, so no
+    checkout is needed, and the derived facts are computed on first access
+    only. Use `repo_facts()` to obtain an instance, which caches the scans
+    by tree hash.
+    """
+
+    def __init__(self, tree, files):
+        self.tree = tree
+        self.files = frozenset(files)
+        self.directories = set()
+        self._by_name = {}
+        for path in self.files:
+            dirname, basename = posixpath.split(path)
+            self._by_name.setdefault(basename.lower(), []).append(path)
+            while dirname and dirname not in self.directories:
+                self.directories.add(dirname)
+                dirname = posixpath.dirname(dirname)
+
+    @cached_property
+    def root_files(self):
+        return sorted(f for f in self.files if "/" not in f)
+
+    def is_file(self, path):
+        return path in self.files
+
+    def is_dir(self, path):
+        return path.rstrip("/") in self.directories
+
+    def named(self, *names, dirs=None):
+        """
+        Return the sorted paths of all files whose (case-insensitive) name
+        is one of `names`, optionally restricted to the parent directories
+        in `dirs` ("" is the repository root).
+        """
+        paths = [p for n in names for p in self._by_name.get(n.lower(), [])]
+        if dirs is not None:
+            paths = [p for p in paths if posixpath.dirname(p) in dirs]
+        return sorted(paths)
+
+    def glob(self, *patterns, basename=False):
+        """
+        Return the sorted paths matching any of the (case-insensitive) shell
+        `patterns`, which are applied to the file name instead of the full
+        path if `basename` is set.
+        """
+        matches = set()
+        for pattern in patterns:
+            pattern = pattern.lower()
+            if basename:
+                for name, paths in self._by_name.items():
+                    if fnmatch.fnmatchcase(name, pattern):
+                        matches.update(paths)
+            else:
+                matches.update(
+                    p for p in self.files if fnmatch.fnmatchcase(p.lower(), pattern)
+                )
+        return sorted(matches)
+
+    @cached_property
+    def license_files(self):
+        return self.named(*LICENSE_NAMES, dirs={""})
+
+    @cached_property
+    def citation_files(self):
+        return self.named(*CITATION_NAMES, dirs={""})
+
+    @cached_property
+    def contribution_guidelines(self):
+        return self.named(*CONTRIBUTING_NAMES, dirs=CONTRIBUTING_DIRS)
+
+    @cached_property
+    def container_files(self):
+        return self.glob(*CONTAINER_PATTERNS, basename=True)
+
+    @cached_property
+    def test_paths(self):
+        """Test directories and files following common test naming schemes."""
+        dirs = sorted(
+            d for d in self.directories if posixpath.basename(d).lower() in TEST_DIRS
+        )
+        return dirs + self.glob(*TEST_FILE_PATTERNS, basename=True)
+
+    @cached_property
+    def ci_workflows(self):
+        return self.glob(*CI_PATTERNS)
+
+    @cached_property
+    def requirements_files(self):
+        return [
+            p for p in self.glob(*REQUIREMENTS_PATTERNS, basename=True) if "/" not in p
+        ]
+
+
+_cache = LRUCache(maxsize=16, name="RepoFacts")
+
+
+def repo_facts(path, ref):
+    """
+    Return the `RepoFacts` for `ref` in the repository at `path`, or None if
+    the ref cannot be resolved locally.
+
+    Scans are cached by tree hash (for the most recently used trees), so
+    the tree of a commit is read only once per run, regardless of how many
+    plugins ask for it.
+    """
+    commit = resolve_commit(path, ref)
+    if commit is None:
+        return None
+    tree = tree_hash(path, commit)
+    facts = _cache.get(tree)
+    if facts is None:
+        entries = ls_tree(path, commit, recursive=True)
+        files = [name for name, obj_type in entries.items() if obj_type == "blob"]
+        facts = _cache[tree] = RepoFacts(tree, files)
+    return facts
@@ -0,0 +1,78 @@
+import subprocess
+
+
+def git(path, *args):
+    """Run a git command in the repository at `path` and return its stdout."""
+    return subprocess.check_output(
+        ["git", "-C", path] + list(args), text=True, stderr=subprocess.DEVNULL
+    ).strip()
+
+
+def resolve_commit(path, ref):
+    """
+    Resolve a branch, tag or commit hash to a full commit hash in the
+    repository at `path`.
+
+    Branches which only exist on the remote (as it is the case in a fresh
+    clone) are looked up under `origin/`. Returns None if the ref is unknown.
+    """
+    for candidate in [ref, f"origin/{ref}"]:
+        try:
+            return git(
+                path, "rev-parse", "--verify", "--quiet", f"{candidate}^{{commit}}"
+            )
+        except subprocess.CalledProcessError:
+            continue
+    return None
+
+
+def clone_commit(path, commit, target):
+    """
+    Clone the local repository at `path` into the empty directory `target`
+    and check out `commit` (detached), without network access.
+
+    The objects are hard-linked or copied (`git clone --local`) rather than
+    borrowed from `path` (`--shared`), so that the clone stays complete when
+    it is mounted into a container which cannot see `path`.
+    """
+    source = git(path, "rev-parse", "--show-toplevel")
+    git(source, "clone", "--quiet", "--local", "--no-checkout", source, target)
+    git(target, "checkout", "--quiet", "--detach", commit)
+
+
+def is_shallow(path):
+    """Whether the repository at `path` lacks history (`git clone --depth`)."""
+    return git(path, "rev-parse", "--is-shallow-repository") == "true"
+
+
+def unshallow(path, url):
+    """Fetch the history missing from the shallow repository at `path` from `url`."""
+    git(path, "fetch", "--quiet", "--unshallow", url)
+
+
+def tree_hash(path, commit):
+    """Return the hash of the root tree of `commit`."""
+    return git(path, "rev-parse", f"{commit}^{{tree}}")
+
+
+def ls_tree(path, commit, recursive=False):
+    """
+    List the entries in the tree of `commit` without checking it out.
+
+    Returns a dict which maps file names to their object type
+    ("blob", "tree" or "commit" for submodules). Only the root tree is
+    listed unless `recursive` is set, in which case the keys are the full
+    paths of all files (subtrees are not listed).
+    """
+    args = ["ls-tree", "-z"]
+    if recursive:
+        args.append("-r")
+    out = git(path, *args, commit)
+    entries = {}
+    for line in out.split("\0"):
+        if not line:
+            continue
+        info, name = line.split("\t", 1)
+        _, obj_type, _ = info.split()
+        entries[name] = obj_type
+    return entries
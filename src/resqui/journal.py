@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+
+from resqui.tools import write_atomic
+
+
+def journal_path(output_file):
+    """The path of the journal which belongs to an output file."""
+    return output_file + ".journal"
+
+
+def step_key(mode, indicators):
+    """Identifies a step of a run (see `Runner.steps()`) in the journal."""
+    plugins = "|".join(indicator["plugin"] for indicator in indicators)
+    key = f"{indicators[0]['name']}/{plugins}"
+    return key if mode is None else f"{key} ({mode})"
+
+
+class Journal:
+    """
+    An append-only file of the finished steps of a run and the checks
+    they added to the summary, so that an interrupted run can be resumed.
+
+    The first line identifies the run by a hash of the configuration, the
+    repository URL and the commit; each following line is one finished
+    step, written and synced to disk as soon as it is done. A journal of
+    another run is discarded, as is a truncated last line.
+    """
+
+    def __init__(self, path, run_key):
+        self.path = path
+        self.run_key = run_key
+        self._file = None
+
+    @staticmethod
+    def make_run_key(config_digest, url, commit):
+        text = json.dumps([config_digest, url, commit])
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def load(self):
+        """
+        The checks of the steps recorded for this run, by step key. Empty
+        if there is no journal or it belongs to another run.
+        """
+        try:
+            with open(self.path) as f:
+                lines = f.read().split("\n")
+        except OSError:
+            return {}
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break  # the rest was not written completely
+        if not records or records[0].get("run") != self.run_key:
+            return {}
+        return {record["step"]: record["checks"] for record in records[1:]}
+
+    def open(self, resume=False):
+        """
+        Start writing the journal. With `resume`, the steps recorded for
+        this run are kept (and returned), otherwise the journal starts empty.
+        """
+        steps = self.load() if resume else {}
+        records = [{"run": self.run_key}]
+        records += [{"step": key, "checks": checks} for key, checks in steps.items()]
+        write_atomic(self.path, "".join(json.dumps(r) + "\n" for r in records))
+        self._file = open(self.path, "a")
+        return steps
+
+    def record(self, key, checks):
+        """Checkpoint a finished step and the checks it added."""
+        self._append({"step": key, "checks": checks})
+
+    def _append(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Close and delete the journal, once the run has finished."""
+        self.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from resqui.api import APIError, BulkUploader
+from resqui.tools import user_state_dir, write_atomic
+
+
+class Outbox:
+    """
+    Summaries waiting to be uploaded to DashVerse, stored on disk so that
+    an unreachable or slow API neither blocks nor loses them.
+
+    Each summary is one file named by the SHA-256 hash of its content
+    without its `dateCreated` (see `key`), written atomically, with the number of failed upload attempts and the
+    last error. A summary is only queued once: adding it again while it is
+    pending or after it was uploaded does nothing. Failed uploads are
+    retried after an exponential backoff (at most `max_backoff` seconds).
+
+    Several processes may flush the same outbox (e.g. parallel CI jobs, or
+    `resqui outbox flush` during a run). Before uploading a summary, a
+    process claims it by moving its file into `inflight/` with an atomic
+    rename, which only one of them can do; it is moved back with the
+    failed attempt recorded if the upload fails. Claims older than
+    `claim_timeout` seconds, left by a process which died, are given up.
+    """
+
+    backoff = 60
+    max_backoff = 6 * 3600
+    keep_sent = 1000  # hashes of uploaded summaries remembered
+    claim_timeout = 3600
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(user_state_dir(), "outbox")
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(payload):
+        """
+        The hash of a summary, which leaves out when it was created so that
+        the same assessment made by another run is recognised.
+        """
+        document = json.loads(payload)
+        if isinstance(document, dict):
+            document.pop("dateCreated", None)
+        content = json.dumps(document, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, f"{key}.json")
+
+    def _inflight_path(self, key):
+        return os.path.join(self.path, "inflight", f"{key}.json")
+
+    def _sent_path(self):
+        return os.path.join(self.path, "sent")
+
+    def _sent(self):
+        try:
+            with open(self._sent_path()) as f:
+                return f.read().split()
+        except OSError:
+            return []
+
+    def add(self, payload):
+        """
+        Queue a summary (JSON string) and return its key, or None if it is
+        already pending or was uploaded before.
+        """
+        key = self.key(payload)
+        with self._lock:
+            if (
+                os.path.exists(self._entry_path(key))
+                or os.path.exists(self._inflight_path(key))
+                or key in self._sent()
+            ):
+                return None
+            os.makedirs(self.path, exist_ok=True)
+            entry = {
+                "queued": time.time(),
+                "attempts": 0,
+                "next_attempt": 0,
+                "error": None,
+                "payload": payload,
+            }
+            write_atomic(self._entry_path(key), json.dumps(entry))
+        return key
+
+    def entries(self):
+        """The pending entries as (key, entry) pairs, oldest first."""
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.path, name)) as f:
+                    entries.append((name[: -len(".json")], json.load(f)))
+            except (OSError, ValueError):
+                continue  # removed meanwhile or not written by us
+        return sorted(entries, key=lambda item: item[1].get("queued", 0))
+
+    def entry(self, key):
+        """
+        The pending (or currently uploading) entry of a key, or None if there
+        is none.
+        """
+        for path in [self._entry_path(key), self._inflight_path(key)]:
+            try:
+                with open(path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def _claim(self, key):
+        """
+        Move a pending entry to `inflight/` and return it, or None if another
+        process claimed it first.
+        """
+        path = self._inflight_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.rename(self._entry_path(key), path)
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # the claim time, see _release_stale_claims()
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            self._requeue(key, None)
+            return None
+
+    def _requeue(self, key, entry):
+        """Move a claimed entry back, with the `entry` data if given."""
+        path = self._inflight_path(key)
+        if entry is not None:
+            write_atomic(path, json.dumps(entry))
+        os.replace(path, self._entry_path(key))
+
+    def _release_stale_claims(self):
+        directory = os.path.dirname(self._inflight_path("-"))
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.claim_timeout:
+                    os.rename(path, os.path.join(self.path, name))
+            except OSError:
+                continue  # released by another process meanwhile
+
+    def _done(self, keys):
+        with self._lock:
+            for key in keys:
+                try:
+                    os.unlink(self._inflight_path(key))
+                except FileNotFoundError:
+                    pass
+            sent = self._sent() + keys
+            write_atomic(self._sent_path(), "\n".join(sent[-self.keep_sent :]) + "\n")
+
+    def _failed(self, key, entry, error):
+        entry["attempts"] += 1
+        delay = min(self.backoff * 2 ** (entry["attempts"] - 1), self.max_backoff)
+        entry["next_attempt"] = time.time() + delay
+        entry["error"] = error
+        self._requeue(key, entry)
+
+    def flush(self, client, force=False, max_items=100):
+        """
+        Upload the pending summaries with `client` (an APIClient), in
+        batches if there are several, and return the keys of the uploaded and the
+        failed ones. Summaries still in backoff are left alone unless
+        `force` is set, and so are those claimed by another process.
+        """
+        self._release_stale_claims()
+        now = time.time()
+        due = []
+        for key, entry in self.entries():
+            if not force and entry["next_attempt"] > now:
+                continue
+            entry = self._claim(key)
+            if entry is None:
+                continue
+            if not force and entry["next_attempt"] > now:
+                # Failed in another process since it was listed
+                self._requeue(key, None)
+                continue
+            due.append((key, entry))
+        if len(due) == 1:
+            key, entry = due[0]
+            try:
+                client.post(entry["payload"])
+            except APIError as e:
+                results = [(False, str(e))]
+            else:
+                results = [(True, None)]
+        else:
+            with BulkUploader(client, max_items=max_items) as uploader:
+                for _, entry in due:
+                    uploader.add(entry["payload"])
+            results = [(result.ok, result.error) for result in uploader.results]
+
+        sent = []
+        failed = []
+        for (key, entry), (ok, error) in zip(due, results):
+            if ok:
+                sent.append(key)
+            else:
+                failed.append(key)
+                self._failed(key, entry, error)
+        if sent:
+            self._done(sent)
+        return sent, failed
+
+
+class OutboxFlusher:
+    """
+    Flushes an outbox in a background thread: once when started, whenever
+    woken with `wake()` (e.g. after adding a summary) and every `interval`
+    seconds. `stop()` lets it do a last flush and waits at most `timeout`
+    seconds for it.
+    """
+
+    def __init__(self, outbox, client, interval=60):
+        self.outbox = outbox
+        self.client = client
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="outbox-flusher", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        """Flush once more and return whether the flusher finished in time."""
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                self.outbox.flush(self.client)
+            except OSError:
+                pass  # an unwritable outbox must not kill the flusher
+            if self._stopping.is_set() and not self._wake.is_set():
+                return
+            self._wake.wait(self.interval)
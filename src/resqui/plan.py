@@ -0,0 +1,196 @@
+"""
+Compiles a configuration into the plan of a run: the validated, deduplicated
+indicators in the order they are run and their expected costs.
+"""
+
+from dataclasses import dataclass, field
+import importlib
+
+from resqui.journal import step_key
+from resqui.providers import ALL, group_alternatives
+from resqui.timings import TimingHistory
+
+
+def plugin_class(name):
+    """The plugin class of the given name, raises AttributeError if unknown."""
+    base_package = __name__.rsplit(".", 1)[0]
+    plugin_module = importlib.import_module(base_package + ".plugins")
+    return getattr(plugin_module, name)
+
+
+@dataclass
+class Plan:
+    """
+    The steps of a run as (mode, [indicators]) like `Runner.steps()`,
+    with the estimated duration of each step in seconds (None if it was
+    never measured), and the problems found in the configuration. Errors
+    are indicators which cannot be run, warnings are indicators which are
+    expected to fail or were dropped as duplicates.
+    """
+
+    steps: list = field(default_factory=list)
+    estimates: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+
+    @property
+    def backends(self):
+        """The indicator names of each plugin, in the order they are run."""
+        backends = {}
+        for _, indicators in self.steps:
+            for indicator in indicators:
+                backends.setdefault(indicator["plugin"], []).append(indicator["name"])
+        return backends
+
+    @property
+    def total(self):
+        """The estimated duration of all steps with a known duration."""
+        return sum(estimate for estimate in self.estimates if estimate is not None)
+
+    def describe(self):
+        """The plan as printable lines."""
+        lines = ["Steps:"]
+        for i, ((mode, indicators), estimate) in enumerate(
+            zip(self.steps, self.estimates), 1
+        ):
+            cost = "unknown" if estimate is None else f"~{estimate:.0f}s"
+            lines.append(f"  {i:2d}. {step_key(mode, indicators):<60} {cost}")
+        unknown = self.estimates.count(None)
+        lines.append(
+            f"Estimated duration: ~{self.total:.0f}s"
+            + (f" (without {unknown} steps never measured)" if unknown else "")
+        )
+        lines.append("Plugins:")
+        for name, indicator_names in self.backends.items():
+            lines.append(f"  {name}: {', '.join(indicator_names)}")
+        lines += [f"Warning: {warning}" for warning in self.warnings]
+        lines += [f"Error: {error}" for error in self.errors]
+        return lines
+
+
+def validate(indicator, lookup=plugin_class):
+    """
+    Return the error of a configured indicator, or None: its plugin (found
+    with `lookup`) and method must exist and be listed in the plugin's
+    `indicators`.
+    """
+    name = indicator.get("name")
+    plugin_name = indicator.get("plugin")
+    if name is None or plugin_name is None or "@id" not in indicator:
+        return f"indicator {indicator} needs a 'name', 'plugin' and '@id'"
+    try:
+        cls = lookup(plugin_name)
+    except (AttributeError, KeyError):
+        return f"unknown plugin '{plugin_name}' of indicator '{name}'"
+    if name not in cls.indicators or not callable(getattr(cls, name, None)):
+        available = ", ".join(cls.indicators) or "none"
+        return (
+            f"plugin '{plugin_name}' has no indicator '{name}' (available: {available})"
+        )
+    return None
+
+
+def group_by_plugin(steps):
+    """
+    Move the single indicators of a plugin right behind its first one,
+    so that the indicators sharing a backend invocation (e.g. one report
+    which is cached by the plugin) run one after another. Steps with
+    alternative providers keep their position.
+    """
+    grouped = []
+    positions = {}  # plugin name -> index after its last single step
+    for mode, indicators in steps:
+        plugin_name = indicators[0]["plugin"]
+        if mode is not None or plugin_name not in positions:
+            grouped.append((mode, indicators))
+            if mode is None:
+                positions[plugin_name] = len(grouped)
+            continue
+        index = positions[plugin_name]
+        grouped.insert(index, (mode, indicators))
+        for name, position in positions.items():
+            if position >= index:
+                positions[name] = position + 1
+    return grouped
+
+
+def estimate_steps(steps, history):
+    """
+    The expected duration of each step. The first step of a plugin counts
+    its initialisation and all of its indicators, which share its backend
+    run, so its later steps cost nothing. A fallback is estimated by its
+    first provider, a race by its fastest one, a step running all providers
+    by their sum.
+    """
+    initialised = set()
+    estimates = []
+    for mode, indicators in steps:
+        costs = []
+        for indicator in indicators:
+            name = indicator["plugin"]
+            cost = history.estimate(TimingHistory.indicators_key(name))
+            if cost is not None:
+                cost = (
+                    0 if name in initialised else cost + (history.estimate(name) or 0)
+                )
+            costs.append(cost)
+        if mode == "race":
+            known = [cost for cost in costs if cost is not None]
+            estimate = min(known) if len(known) == len(costs) else None
+        elif mode == ALL:
+            known = [cost for cost in costs if cost is not None]
+            estimate = sum(known) if len(known) == len(costs) else None
+        else:
+            estimate = costs[0]
+        estimates.append(estimate)
+        initialised.update(indicator["plugin"] for indicator in indicators)
+    return estimates
+
+
+def compile_plan(configuration, context=None, history=None, lookup=plugin_class):
+    """
+    Compile the configuration into a Plan. Invalid indicators are reported
+    as errors and left out, repeated ones are run only once. Plugin classes
+    are found with `lookup`.
+    """
+    cfg = configuration._cfg
+    plan = Plan()
+    indicators = []
+    seen = set()
+    for indicator in cfg.get("indicators", []):
+        error = validate(indicator, lookup)
+        if error is not None:
+            plan.errors.append(error)
+            continue
+        key = (indicator["plugin"], indicator["name"], indicator["@id"])
+        if key in seen:
+            plan.warnings.append(
+                f"'{indicator['name']}' of {indicator['plugin']} is configured "
+                "more than once, it is run only once"
+            )
+            continue
+        seen.add(key)
+        indicators.append(indicator)
+
+    if context is not None:
+        plugin_names = dict.fromkeys(indicator["plugin"] for indicator in indicators)
+        for plugin_name in plugin_names:
+            requires = getattr(lookup(plugin_name), "requires", [])
+            missing = [key for key in requires if not getattr(context, key, None)]
+            if missing:
+                plan.warnings.append(
+                    f"{plugin_name} needs the {' and '.join(missing)}, "
+                    "its indicators will fail"
+                )
+
+    try:
+        steps = group_alternatives(indicators, cfg.get("alternatives", {}))
+    except ValueError as e:
+        plan.errors.append(str(e))
+        return plan
+    plan.steps = group_by_plugin(steps)
+    if history is None:
+        plan.estimates = [None] * len(plan.steps)
+    else:
+        plan.estimates = estimate_steps(plan.steps, history)
+    return plan
@@ -1,21 +1,35 @@
 from .base import IndicatorPlugin, PluginInitError
-
-from .cffconvert import CFFConvert
-from .howfairis import HowFairIs
-from .gitleaks import Gitleaks
-from .openssfscorecard import OpenSSFScorecard
-from .superlinter import SuperLinter
-from .rsfc import RSFC
-from .oebfair import OEBFAIR
+from .registry import PLUGINS, PluginInfo, plugin_errors, plugin_registry
 
 __all__ = [
     "IndicatorPlugin",
     "PluginInitError",
+    "PluginInfo",
+    "PLUGINS",
+    "plugin_errors",
+    "plugin_registry",
     "CFFConvert",
     "HowFairIs",
     "Gitleaks",
     "OpenSSFScorecard",
     "SuperLinter",
     "RSFC",
-    "OEBFAIR"
+    "OEBFAIR",
+    "RepoFiles",
 ]
+
+
+def __getattr__(name):
+    # The plugin classes are imported on first access (see registry.py)
+    info = PLUGINS.get(name)
+    if info is None and not name.startswith("_"):
+        info = plugin_registry().get(name)
+    if info is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    plugin_class = info.load()
+    globals()[name] = plugin_class
+    return plugin_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(plugin_registry()))
@@ -1,3 +1,9 @@
+import subprocess
+
+from resqui.git import clone_commit, is_shallow, resolve_commit, unshallow
+from resqui.trace import span
+
+
 class PluginInitError(Exception):
     """Thrown if the initialisation of a plugin fails (e.g. missing GITHUB token)"""
 
@@ -11,3 +17,65 @@ class IndicatorPlugin:
     version = None
     id = None
     indicators = []
+    # Context fields (e.g. "github_token") without which the plugin fails
+    requires = []
+
+    def github_token(self):
+        """
+        The GitHub token for the next tool run: the one with the most
+        remaining requests if the context has several (see
+        `resqui.tokens.TokenPool`), otherwise `context.github_token`.
+        """
+        if self.context.github_tokens is not None:
+            return self.context.github_tokens.acquire()
+        return self.context.github_token
+
+    def clone_repository(self, url, branch_hash_or_tag, target):
+        """
+        Clone the assessed repository into the empty directory `target`.
+
+        If the local clone (`context.repo_path`) contains the assessed
+        revision, it is cloned without network access and the revision is
+        checked out. Otherwise the default branch of `url` is cloned.
+
+        A shallow local clone (e.g. the depth 1 checkout of GitHub Actions)
+        lacks the history scanned by tools like Gitleaks, so the missing
+        history is fetched from `url`.
+        """
+        repo_path = self.context.repo_path
+        if repo_path is not None:
+            commit = resolve_commit(repo_path, branch_hash_or_tag)
+            if commit is not None:
+                with span("clone", url=repo_path, commit=commit):
+                    clone_commit(repo_path, commit, target)
+                if is_shallow(target):
+                    try:
+                        with span("clone", url=url, unshallow=True):
+                            unshallow(target, url)
+                    except subprocess.CalledProcessError as e:
+                        print(
+                            f"Warning: cannot fetch the history of {url} ({e}), "
+                            "only the commits of the shallow clone are scanned"
+                        )
+                return
+        try:
+            with span("clone", url=url):
+                subprocess.run(
+                    ["git", "clone", url, target],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+        except subprocess.CalledProcessError as e:
+            print(f"Error cloning {url}: {e}")
+            raise
+
+    def cancel(self):
+        """
+        Stop the running backend processes of this plugin, e.g. when an
+        indicator timed out. Plugins using other executors than
+        `self.executor` should override this.
+        """
+        executor = getattr(self, "executor", None)
+        if executor is not None:
+            executor.cancel()
@@ -1,5 +1,4 @@
 import json
-import subprocess
 import os
 
 from resqui.plugins.base import IndicatorPlugin
@@ -24,16 +23,7 @@ class Gitleaks(IndicatorPlugin):
 
 
         with create_workspace(prefix="resqui-gitleaks-") as workspace:
-            try:
-                subprocess.run(
-                    ["git", "clone", url, workspace.local_path],
-                    check=True,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                )
-            except subprocess.CalledProcessError as e:
-                print(f"Error cloning {url}: {e}")
-                raise
+            self.clone_repository(url, branch_hash_or_tag, workspace.local_path)
 
             plugin_path = workspace.container_path("/path")
             report_path = f"{plugin_path}/{report_fname}"
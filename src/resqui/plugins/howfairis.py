@@ -1,6 +1,7 @@
 from resqui.plugins.base import IndicatorPlugin, PluginInitError
 from resqui.executors import PythonExecutor
 from resqui.core import CheckResult
+from resqui.facts import repo_facts
 from resqui.tools import normalized
 
 
@@ -10,17 +11,46 @@ class HowFairIs(IndicatorPlugin):
     python_package_name = "howfairis"
     id = "https://w3id.org/everse/tools/howfairis"
     indicators = ["has_license"]
+    license_filenames = ["LICENSE", "LICENSE.md"]
 
     def __init__(self, context):
         self.context = context
-        if not context.github_token:
+        self.executor = None
+        # With a local clone at hand, the GitHub API is only needed as a
+        # fallback, so the executor is created on demand.
+        if context.repo_path is None:
+            self.executor = self.create_executor()
+
+    def create_executor(self):
+        if not self.context.github_token:
             raise PluginInitError("missing GITHUB_ACTION_TOKEN")
-        self.executor = PythonExecutor(
-            environment={"GITHUB_ACTION_TOKEN": context.github_token}
+        executor = PythonExecutor(
+            environment={"GITHUB_ACTION_TOKEN": self.context.github_token}
         )
-        self.executor.install(f"{self.python_package_name}=={self.version}")
+        executor.install(f"{self.python_package_name}=={self.version}")
+        return executor
 
-    def has_license(self, url, branch_hash_or_tag):
+    def find_local_license(self, branch_hash_or_tag):
+        """
+        Look up the license file in the root tree of the local clone.
+
+        Returns the file name, an empty string if no license file exists or
+        None if the local clone cannot answer (no clone or unknown ref).
+        """
+        if self.context.repo_path is None:
+            return None
+        facts = repo_facts(self.context.repo_path, branch_hash_or_tag)
+        if facts is None:
+            return None
+        for filename in self.license_filenames:
+            if facts.is_file(filename):
+                return filename
+        return ""
+
+    def find_remote_license(self, url, branch_hash_or_tag):
+        """Ask howfairis (GitHub API) whether a license file exists."""
+        if self.executor is None:
+            self.executor = self.create_executor()
         url = url.removesuffix(".git")
         script = normalized(
             f"""
@@ -30,17 +60,36 @@ class HowFairIs(IndicatorPlugin):
             print(checker.has_license())
         """
         )
+        self.executor.environment["GITHUB_ACTION_TOKEN"] = self.github_token()
         result = self.executor.execute(script)
-        output = "valid" if result.stdout.strip() == "True" else "invalid"
-        if output == "valid":
-            evidence = "Found license file: 'LICENSE'."
+        return "LICENSE" if result.stdout.strip() == "True" else ""
+
+    def has_license(self, url, branch_hash_or_tag):
+        process = "Searches for a file named 'LICENSE' or 'LICENSE.md' in the repository root."
+
+        license_file = self.find_local_license(branch_hash_or_tag)
+        if license_file is None:
+            try:
+                license_file = self.find_remote_license(url, branch_hash_or_tag)
+            except PluginInitError as e:
+                return CheckResult(
+                    process=process,
+                    output="missing",
+                    evidence=f"Revision not found in local clone and {e}.",
+                    success=False,
+                )
+
+        if license_file:
+            output = "valid"
+            evidence = f"Found license file: '{license_file}'."
             success = True
         else:
+            output = "invalid"
             evidence = "No license file found."
             success = False
 
         return CheckResult(
-            process="Searches for a file named 'LICENSE' or 'LICENSE.md' in the repository root.",
+            process=process,
             status_id="schema:CompletedActionStatus",
             output=output,
             evidence=evidence,
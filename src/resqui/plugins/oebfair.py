@@ -6,6 +6,7 @@ import shutil
 from resqui.plugins.base import IndicatorPlugin
 from resqui.executors import DockerExecutor
 from resqui.core import CheckResult
+from resqui.cache import report_cache
 
 
 class OEBFAIR(IndicatorPlugin):
@@ -28,17 +29,18 @@ class OEBFAIR(IndicatorPlugin):
         "repository_workflows",
         "archived_in_software_heritage"
     ]
+    requires = ["github_token"]
 
     def __init__(self, context):
         self.context = context
         self.executor = DockerExecutor(self.image_url)
-        self._cache = {}
+        self._cache = report_cache(self.name)
 
     def execute(self, url, commit_hash):
-        cache_key = (url, commit_hash)
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        """Run the assessment once per (url, commit_hash), even for concurrent callers."""
+        return self._cache.do((url, commit_hash), self.run_assessment, url, commit_hash)
 
+    def run_assessment(self, url, commit_hash):
         tempdir = tempfile.mkdtemp()
 
         url = url.removesuffix(".git")
@@ -49,7 +51,7 @@ class OEBFAIR(IndicatorPlugin):
             f"{tempdir}:/oebfair/oebfair_output"
         ]
 
-        _ = self.executor.run(["--repo", url, "-t", f"{self.context.github_token}"], run_args=run_args)
+        _ = self.executor.run(["--repo", url, "-t", f"{self.github_token()}"], run_args=run_args)
 
         assessment_filename = "oebfair_assessment.json"
         assessment_fpath = os.path.join(tempdir, assessment_filename)
@@ -62,8 +64,6 @@ class OEBFAIR(IndicatorPlugin):
 
         shutil.rmtree(tempdir)
 
-        self._cache[cache_key] = report
-
         return report
 
     def unique_identifier(self, url, branch_hash_or_tag):
@@ -1,7 +1,9 @@
 import json
 import subprocess
 from resqui.plugins.base import IndicatorPlugin, PluginInitError
+from resqui.executors import DockerExecutor
 from resqui.core import CheckResult
+from resqui.cache import report_cache
 
 
 class OpenSSFScorecard(IndicatorPlugin):
@@ -19,43 +21,29 @@ class OpenSSFScorecard(IndicatorPlugin):
         "project_is_active",
         "has_no_binary_artifacts"
     ]
+    requires = ["github_token"]
 
     def __init__(self, context):
         self.context = context
         if not context.github_token:
             raise PluginInitError("missing GITHUB_ACTION_TOKEN")
         self.instantiate()
-        self._cache = {}
+        self._cache = report_cache(self.name)
 
     def instantiate(self):
-        try:
-            subprocess.run(
-                ["docker", "pull", f"gcr.io/openssf/scorecard:{self.version}"],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"Error pulling OpenSSF Scorecard image: {e}")
-            raise
+        self.executor = DockerExecutor(f"gcr.io/openssf/scorecard:{self.version}")
 
     def execute(self, url, commit_hash):
-        cache_key = (url, commit_hash)
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        """Run the assessment once per (url, commit_hash), even for concurrent callers."""
+        return self._cache.do((url, commit_hash), self.run_assessment, url, commit_hash)
 
+    def run_assessment(self, url, commit_hash):
         url = url[:-4] if url.endswith(".git") else url
         
         check_values = ["CI-Tests", "SAST", "Maintained", "Fuzzing", "Dependency-Update-Tool", "Vulnerabilities", "Code-Review", "Packaging"]
         check_args = [arg for check in check_values for arg in ("--checks", check)]
 
-        cmd = [
-            "docker",
-            "run",
-            "--rm", 
-            "-e",
-            f"GITHUB_AUTH_TOKEN={self.context.github_token}",
-            f"gcr.io/openssf/scorecard:{self.version}",
+        command = [
             *check_args,
             "--show-details",
             "--repo",
@@ -66,19 +54,19 @@ class OpenSSFScorecard(IndicatorPlugin):
             "--format",
             "json",
         ]
+        run_args = ["--rm", "-e", f"GITHUB_AUTH_TOKEN={self.github_token()}"]
 
-        try:
-            r = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            if r.stdout:
-                out = json.loads(r.stdout)
-                self._cache[cache_key] = out
-                return out
-            else:
-                raise ValueError("No output received from Scorecard.")
-        except subprocess.CalledProcessError as e:
+        r = self.executor.run(command, run_args=run_args)
+        if r.returncode != 0:
             print("Scorecard error output:")
-            print(e.stderr)
-            raise
+            print(r.stderr)
+            raise subprocess.CalledProcessError(
+                r.returncode, r.args, output=r.stdout, stderr=r.stderr
+            )
+        if not r.stdout:
+            raise ValueError("No output received from Scorecard.")
+        try:
+            return json.loads(r.stdout)
         except json.JSONDecodeError:
             print("JSON output not valid:")
             print(r.stdout)
@@ -0,0 +1,299 @@
+"""
+The plugins and their static metadata, which can be listed and checked
+without importing the plugin implementations and the executors and
+libraries they need. A plugin is only imported when it is used.
+
+The built-in plugins are listed in `PLUGINS`, whose metadata must match the
+attributes of the plugin classes. Plugins of other distributions are found
+through the entry points of the `resqui.plugins` group and their metadata is
+cached, so that the entry points are only scanned (and the plugins imported)
+when the installed distributions change.
+"""
+
+from dataclasses import asdict, dataclass, field
+import hashlib
+import importlib
+import json
+import os
+import sys
+
+from resqui.tools import user_cache_dir, write_atomic
+from resqui.version import version
+
+# Entry point group of plugins in other distributions, named like their class
+ENTRY_POINT_GROUP = "resqui.plugins"
+
+
+@dataclass(frozen=True)
+class PluginInfo:
+    """The metadata of a plugin class and the module which defines it."""
+
+    class_name: str
+    module: str  # relative to resqui.plugins for the built-in plugins
+    name: str
+    version: str
+    id: str
+    indicators: list = field(default_factory=list)
+    requires: list = field(default_factory=list)
+
+    def load(self):
+        """Import the plugin module and return the plugin class."""
+        module = importlib.import_module(self.module, __package__)
+        return getattr(module, self.class_name)
+
+    @classmethod
+    def from_class(cls, plugin_class):
+        return cls(
+            plugin_class.__name__,
+            plugin_class.__module__,
+            name=plugin_class.name,
+            version=plugin_class.version,
+            id=plugin_class.id,
+            indicators=list(plugin_class.indicators),
+            requires=list(plugin_class.requires),
+        )
+
+
+PLUGINS = {
+    info.class_name: info
+    for info in [
+        PluginInfo(
+            "CFFConvert",
+            ".cffconvert",
+            name="CFFConvert",
+            version="2.0.0",
+            id="https://w3id.org/everse/tools/cffconvert",
+            indicators=["has_citation"],
+        ),
+        PluginInfo(
+            "HowFairIs",
+            ".howfairis",
+            name="HowFairIs",
+            version="0.14.2",
+            id="https://w3id.org/everse/tools/howfairis",
+            indicators=["has_license"],
+        ),
+        PluginInfo(
+            "Gitleaks",
+            ".gitleaks",
+            name="GitLeaks",
+            version="8.24.2",
+            id="https://w3id.org/everse/tools/gitleaks",
+            indicators=["has_no_security_leak"],
+        ),
+        PluginInfo(
+            "OpenSSFScorecard",
+            ".openssfscorecard",
+            name="OpenSSF Scorecard",
+            version="v5.4.0",
+            id="https://github.com/ossf/scorecard",
+            indicators=[
+                "has_ci_tests",
+                "human_code_review_requirement",
+                "has_published_package",
+                "dependency_management",
+                "uses_fuzzing",
+                "no_critical_vulnerability",
+                "static_analysis_common_vulnerabilities",
+                "project_is_active",
+                "has_no_binary_artifacts",
+            ],
+            requires=["github_token"],
+        ),
+        PluginInfo(
+            "SuperLinter",
+            ".superlinter",
+            name="SuperLinter",
+            version="7.3.0",
+            id="https://w3id.org/everse/tools/superlinter",
+            indicators=["has_no_linting_issues"],
+        ),
+        PluginInfo(
+            "RSFC",
+            ".rsfc",
+            name="RSFC",
+            version="0.1.7",
+            id="https://w3id.org/everse/tools/rsfc",
+            indicators=[
+                "persistent_and_unique_identifier",
+                "requirements_specified",
+                "has_releases",
+                "software_has_citation",
+                "software_has_license",
+                "software_has_documentation",
+                "descriptive_metadata",
+                "versioning_standards_use",
+                "version_control_use",
+                "software_has_tests",
+                "repository_workflows",
+                "archived_in_software_heritage",
+                "has_contribution_guidelines",
+                "software_is_containerized",
+            ],
+        ),
+        PluginInfo(
+            "OEBFAIR",
+            ".oebfair",
+            name="OEBFAIR",
+            version="0.2.2",
+            id="https://w3id.org/everse/tools/fairsoft-evaluator",
+            indicators=[
+                "unique_identifier",
+                "has_package",
+                "has_citation",
+                "has_license",
+                "has_documentation",
+                "has_releases",
+                "descriptive_metadata",
+                "listed_in_registry",
+                "versioning_standards_use",
+                "version_control_use",
+                "software_has_tests",
+                "repository_workflows",
+                "archived_in_software_heritage",
+            ],
+            requires=["github_token"],
+        ),
+        PluginInfo(
+            "RepoFiles",
+            ".repofiles",
+            name="RepoFiles",
+            version=version,
+            id="https://w3id.org/everse/tools/resqui",
+            indicators=[
+                "software_has_license",
+                "software_has_citation",
+                "has_contribution_guidelines",
+                "software_is_containerized",
+                "software_has_tests",
+                "repository_workflows",
+                "requirements_specified",
+            ],
+        ),
+    ]
+}
+
+
+def registry_path():
+    """The cache of the plugins found through entry points."""
+    return os.path.join(user_cache_dir(), "plugins.json")
+
+
+def environment_key():
+    """
+    Identifies the installed distributions by the interpreter and the
+    modification times of the directories on the import path, which change
+    whenever a distribution is installed, upgraded or removed.
+    """
+    stamps = [sys.version]
+    cwd = os.getcwd()
+    for path in sys.path:
+        if not path or path == cwd:
+            continue  # changes with every file written, not with installs
+        try:
+            stamps.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            continue
+    return hashlib.sha256(json.dumps(stamps).encode("utf-8")).hexdigest()
+
+
+def _entry_points():
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, "select"):
+        return found.select(group=ENTRY_POINT_GROUP)
+    return found.get(ENTRY_POINT_GROUP, [])  # Python < 3.10
+
+
+def scan_entry_points():
+    """
+    Import the plugins registered as entry points. Returns their PluginInfo
+    with the file and its modification time of each plugin module (as
+    dicts), and the errors of the entry points which cannot be loaded.
+    """
+    plugins = []
+    errors = []
+    for entry_point in _entry_points():
+        try:
+            plugin_class = entry_point.load()
+            info = PluginInfo.from_class(plugin_class)
+            path = sys.modules[info.module].__file__
+            mtime = os.stat(path).st_mtime_ns
+        except Exception as e:  # anything may happen importing foreign code
+            errors.append(
+                f"cannot load plugin '{entry_point.name}' "
+                f"({entry_point.value}): {e}"
+            )
+            continue
+        plugins.append({**asdict(info), "file": path, "mtime": mtime})
+    return plugins, errors
+
+
+def _is_current(cache, key):
+    if cache.get("key") != key:
+        return False
+    for plugin in cache["plugins"]:
+        try:
+            if os.stat(plugin["file"]).st_mtime_ns != plugin["mtime"]:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def load_registry(path=None):
+    """
+    The built-in plugins and the ones found through entry points, by class
+    name, and the errors of plugins which cannot be loaded. Entry points are
+    only scanned if the cache in `path` is missing or outdated, i.e. if the
+    environment (see `environment_key()`) or a plugin module has changed.
+    Built-in plugins take precedence over entry points of the same name.
+    """
+    if path is None:
+        path = registry_path()
+    key = environment_key()
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if not _is_current(cache, key):
+        plugins, errors = scan_entry_points()
+        cache = {"key": key, "plugins": plugins, "errors": errors}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, json.dumps(cache))
+        except OSError:
+            pass  # scanned again next time
+
+    registry = dict(PLUGINS)
+    errors = list(cache["errors"])
+    for plugin in cache["plugins"]:
+        fields = {k: v for k, v in plugin.items() if k not in ("file", "mtime")}
+        info = PluginInfo(**fields)
+        if info.class_name in registry:
+            errors.append(
+                f"plugin '{info.class_name}' of {info.module} is ignored, "
+                "a plugin of the same name exists"
+            )
+            continue
+        registry[info.class_name] = info
+    return registry, errors
+
+
+_loaded = None
+
+
+def plugin_registry():
+    """All plugins by class name (see `load_registry()`), loaded once."""
+    global _loaded
+    if _loaded is None:
+        _loaded = load_registry()
+    return _loaded[0]
+
+
+def plugin_errors():
+    """The errors of plugins which cannot be loaded."""
+    plugin_registry()
+    return _loaded[1]
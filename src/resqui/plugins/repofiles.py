@@ -0,0 +1,119 @@
+from resqui.plugins.base import IndicatorPlugin, PluginInitError
+from resqui.core import CheckResult
+from resqui.facts import repo_facts
+from resqui.version import version
+
+
+class RepoFiles(IndicatorPlugin):
+    """
+    File-presence indicators computed in-process from the local clone.
+
+    The indicator names match the ones of RSFC, so a configuration can
+    switch between both providers by changing the plugin only.
+    """
+
+    name = "RepoFiles"
+    version = version
+    id = "https://w3id.org/everse/tools/resqui"
+    indicators = [
+        "software_has_license",
+        "software_has_citation",
+        "has_contribution_guidelines",
+        "software_is_containerized",
+        "software_has_tests",
+        "repository_workflows",
+        "requirements_specified",
+    ]
+    max_evidence_files = 5
+
+    def __init__(self, context):
+        self.context = context
+        if context.repo_path is None:
+            raise PluginInitError("no local clone of the repository available")
+
+    def check(self, branch_hash_or_tag, process, fact, description):
+        facts = repo_facts(self.context.repo_path, branch_hash_or_tag)
+        if facts is None:
+            return CheckResult(
+                process=process,
+                output="missing",
+                evidence=f"Revision '{branch_hash_or_tag}' not found in the local clone.",
+                success=False,
+            )
+
+        found = getattr(facts, fact)
+        if found:
+            shown = ", ".join(f"'{f}'" for f in found[: self.max_evidence_files])
+            if len(found) > self.max_evidence_files:
+                shown += f" and {len(found) - self.max_evidence_files} more"
+            output = "true"
+            evidence = f"Found {description}: {shown}."
+            success = True
+        else:
+            output = "false"
+            evidence = f"No {description} found."
+            success = False
+
+        return CheckResult(
+            process=process,
+            status_id="schema:CompletedActionStatus",
+            output=output,
+            evidence=evidence,
+            success=success,
+        )
+
+    def software_has_license(self, url, branch_hash_or_tag):
+        return self.check(
+            branch_hash_or_tag,
+            "Searches for a LICENSE, LICENCE or COPYING file in the repository root.",
+            "license_files",
+            "license file",
+        )
+
+    def software_has_citation(self, url, branch_hash_or_tag):
+        return self.check(
+            branch_hash_or_tag,
+            "Searches for a CITATION.cff or CITATION file in the repository root.",
+            "citation_files",
+            "citation file",
+        )
+
+    def has_contribution_guidelines(self, url, branch_hash_or_tag):
+        return self.check(
+            branch_hash_or_tag,
+            "Searches for a CONTRIBUTING file in the repository root, 'docs' or '.github'.",
+            "contribution_guidelines",
+            "contribution guidelines",
+        )
+
+    def software_is_containerized(self, url, branch_hash_or_tag):
+        return self.check(
+            branch_hash_or_tag,
+            "Searches for Dockerfiles, Containerfiles, Compose or Singularity files.",
+            "container_files",
+            "container recipe",
+        )
+
+    def software_has_tests(self, url, branch_hash_or_tag):
+        return self.check(
+            branch_hash_or_tag,
+            "Searches for test directories and files following common test naming schemes.",
+            "test_paths",
+            "tests",
+        )
+
+    def repository_workflows(self, url, branch_hash_or_tag):
+        return self.check(
+            branch_hash_or_tag,
+            "Searches for CI workflow definitions (GitHub Actions, GitLab CI, etc.).",
+            "ci_workflows",
+            "CI workflows",
+        )
+
+    def requirements_specified(self, url, branch_hash_or_tag):
+        return self.check(
+            branch_hash_or_tag,
+            "Searches for dependency specification files in the repository root.",
+            "requirements_files",
+            "dependency specification",
+        )
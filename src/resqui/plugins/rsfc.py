@@ -4,6 +4,7 @@ import os
 from resqui.plugins.base import IndicatorPlugin
 from resqui.executors import DockerExecutor
 from resqui.core import CheckResult
+from resqui.cache import report_cache
 from resqui.workspace import create_workspace
 
 
@@ -32,13 +33,13 @@ class RSFC(IndicatorPlugin):
     def __init__(self, context):
         self.context = context
         self.executor = DockerExecutor(self.image_url)
-        self._cache = {}
+        self._cache = report_cache(self.name)
 
     def execute(self, url, commit_hash):
-        cache_key = (url, commit_hash)
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        """Run the assessment once per (url, commit_hash), even for concurrent callers."""
+        return self._cache.do((url, commit_hash), self.run_assessment, url, commit_hash)
 
+    def run_assessment(self, url, commit_hash):
         url = url.removesuffix(".git")
 
         assessment_filename = "rsfc_assessment.json"
@@ -64,8 +65,9 @@ class RSFC(IndicatorPlugin):
                 assessment_fpath = os.path.join(workspace.local_path, assessment_filename)
 
             command = ["--repo", url]
-            if self.context.github_token:
-                command += ["-t", self.context.github_token]
+            github_token = self.github_token()
+            if github_token:
+                command += ["-t", github_token]
 
             _ = self.executor.run(command, run_args=run_args)
 
@@ -88,8 +90,6 @@ class RSFC(IndicatorPlugin):
                 
         report = checks_by_id
 
-        self._cache[cache_key] = report
-
         return report
 
     def persistent_and_unique_identifier(self, url, branch_hash_or_tag):
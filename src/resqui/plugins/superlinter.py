@@ -1,5 +1,4 @@
 import platform
-import subprocess
 
 from resqui.plugins import IndicatorPlugin
 from resqui.executors import DockerExecutor
@@ -23,16 +22,7 @@ class SuperLinter(IndicatorPlugin):
     def has_no_linting_issues(self, url, branch):
 
         with create_workspace(prefix="resqui-superlinter-") as workspace:
-            try:
-                subprocess.run(
-                    ["git", "clone", url, workspace.local_path],
-                    check=True,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                )
-            except subprocess.CalledProcessError as e:
-                print(f"Error cloning {url}: {e}")
-                raise
+            self.clone_repository(url, branch, workspace.local_path)
 
             lint_path = workspace.container_path("/tmp/lint")
             run_args = [
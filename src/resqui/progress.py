@@ -0,0 +1,103 @@
+import os
+import shutil
+import sys
+import threading
+import time
+
+
+def is_interactive(stream):
+    """Whether live (redrawn) output makes sense on the stream."""
+    if os.environ.get("CI") or os.environ.get("TERM") == "dumb":
+        return False
+    isatty = getattr(stream, "isatty", None)
+    return bool(isatty and isatty())
+
+
+class Progress:
+    """
+    Renders the progress of concurrently running tasks, driven by the
+    events `start()`, `finish()` and `log()`.
+
+    Each finished task is printed as one line with its elapsed time. On an
+    interactive terminal, a status line below lists the running tasks and
+    is redrawn by a single ticker thread; otherwise (pipes, CI) only the
+    plain lines are written. Events never wait for the ticker.
+
+    Use it as a context manager, or call `close()` when done.
+    """
+
+    frames = "|/-\\"
+    interval = 0.1
+
+    def __init__(self, stream=None, live=None):
+        self.stream = sys.stdout if stream is None else stream
+        self.live = is_interactive(self.stream) if live is None else live
+        self._tasks = {}  # key -> (label, start time)
+        self._frame = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._ticker = None
+
+    def start(self, key, label):
+        """A task identified by `key` has started."""
+        with self._lock:
+            self._tasks[key] = (label, time.monotonic())
+            if self.live:
+                self._render_status()
+                if self._ticker is None:
+                    self._ticker = threading.Thread(target=self._tick, daemon=True)
+                    self._ticker.start()
+
+    def finish(self, key, text):
+        """A task has finished, print its label, elapsed time and `text`."""
+        with self._lock:
+            label, start = self._tasks.pop(key)
+            self._write_line(f"{label} ({time.monotonic() - start:.1f}s): {text}")
+
+    def log(self, text):
+        """Print a line of text (which may span multiple lines)."""
+        with self._lock:
+            self._write_line(text)
+
+    def close(self):
+        self._closed.set()
+        if self._ticker is not None:
+            self._ticker.join()
+        with self._lock:
+            if self.live:
+                self.stream.write("\r\033[K")
+                self.stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_line(self, line):
+        if self.live:
+            self.stream.write("\r\033[K")
+        self.stream.write(line + "\n")
+        if self.live:
+            self._render_status()
+        self.stream.flush()
+
+    def _render_status(self):
+        if not self._tasks:
+            return
+        now = time.monotonic()
+        running = ", ".join(
+            f"{label.strip()} {now - start:.0f}s"
+            for label, start in self._tasks.values()
+        )
+        frame = self.frames[self._frame % len(self.frames)]
+        status = f"{frame} {running}"
+        width = shutil.get_terminal_size().columns - 1
+        self.stream.write("\r\033[K" + status[:width])
+        self.stream.flush()
+
+    def _tick(self):
+        while not self._closed.wait(self.interval):
+            with self._lock:
+                self._frame += 1
+                self._render_status()
@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from resqui.tools import ensure_list
+
+
+MODES = ["fallback", "race"]
+# Runs every provider and keeps all outcomes; used when the profiles of a
+# run disagree on the mode (see `config.merge_configurations`)
+ALL = "all"
+
+
+def is_conclusive(results):
+    """
+    A provider is conclusive if it returned at least one result and all of
+    them were completed (regardless of whether the checks passed).
+    """
+    results = ensure_list(results)
+    return bool(results) and all(
+        r.status_id == "schema:CompletedActionStatus" for r in results
+    )
+
+
+def group_alternatives(indicators, alternatives):
+    """
+    Group the configured indicators into steps of (mode, [indicators]).
+
+    Indicators whose `@id` is listed in `alternatives` (a mapping of
+    `@id` to mode) are merged into a single step at the position of the
+    first one, keeping their configured order. All other indicators form
+    a step on their own with mode None. Besides the `MODES`, the mode can
+    be `ALL`, set by `config.merge_configurations`.
+    """
+    for indicator_id, mode in alternatives.items():
+        if mode not in MODES and mode != ALL:
+            raise ValueError(
+                f"Unknown mode '{mode}' for alternative providers of '{indicator_id}' "
+                f"(choose from {', '.join(MODES)})"
+            )
+
+    steps = []
+    groups = {}
+    for indicator in indicators:
+        indicator_id = indicator["@id"]
+        if indicator_id not in alternatives:
+            steps.append((None, [indicator]))
+        elif indicator_id in groups:
+            groups[indicator_id].append(indicator)
+        else:
+            groups[indicator_id] = [indicator]
+            steps.append((alternatives[indicator_id], groups[indicator_id]))
+    return steps
+
+
+def run_fallback(providers, run):
+    """
+    Run the providers one after another, in the configured order, until
+    one of them is conclusive.
+
+    `run` is called with an indicator and must return a tuple of
+    (indicator, plugin class, results). If no provider is conclusive, the
+    outcome of the last one is returned.
+    """
+    for indicator in providers:
+        outcome = run(indicator)
+        if is_conclusive(outcome[2]):
+            return outcome
+    return outcome
+
+
+def choose(outcomes):
+    """
+    The outcome a fallback would have returned from `outcomes` of providers
+    which all ran: the first conclusive one, or else the last one.
+    """
+    for outcome in outcomes:
+        if is_conclusive(outcome[2]):
+            return outcome
+    return outcomes[-1]
+
+
+def run_all(providers, run):
+    """Run all providers one after another and return all of their outcomes."""
+    return [run(indicator) for indicator in providers]
+
+
+def run_race(providers, run, cancel=None):
+    """
+    Run all providers concurrently and return the first conclusive outcome
+    (see `run_fallback`). Providers which have not started yet are
+    skipped, and `cancel` is called with the indicator of each provider
+    which is still running.
+
+    If no provider is conclusive, the outcome of the last configured one
+    is returned.
+    """
+    pool = ThreadPoolExecutor(max_workers=len(providers))
+    futures = [pool.submit(run, indicator) for indicator in providers]
+    try:
+        for future in as_completed(futures):
+            outcome = future.result()
+            if is_conclusive(outcome[2]):
+                return outcome
+        return futures[-1].result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        if cancel is not None:
+            for indicator, future in zip(providers, futures):
+                if not future.done():
+                    cancel(indicator)
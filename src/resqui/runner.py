@@ -0,0 +1,315 @@
+import time
+
+from resqui.core import CheckResult
+from resqui.plan import compile_plan, plugin_class
+from resqui.providers import ALL, run_all, run_fallback, run_race
+from resqui.timings import TimingHistory
+from resqui.trace import span
+from resqui.tools import CallTimeoutError, call_with_timeout, ensure_list
+
+
+def timed_out_result(indicator, reason):
+    """The result recorded for an indicator which did not finish in time."""
+    return CheckResult(
+        process=f"Runs '{indicator['name']}' of {indicator['plugin']}.",
+        status_id="schema:FailedActionStatus",
+        output="timeout",
+        evidence=f"The check was aborted: {reason}.",
+        success=False,
+    )
+
+
+def error_result(indicator, error):
+    """The result recorded for an indicator whose backend raised an error."""
+    return CheckResult(
+        process=f"Runs '{indicator['name']}' of {indicator['plugin']}.",
+        status_id="schema:FailedActionStatus",
+        output="error",
+        evidence=f"{type(error).__name__}: {error}",
+        success=False,
+    )
+
+
+def skipped_result(indicator, estimate, time_left):
+    """The result recorded for an indicator dropped to meet the deadline."""
+    return CheckResult(
+        process=f"Runs '{indicator['name']}' of {indicator['plugin']}.",
+        status_id="schema:PotentialActionStatus",
+        output="skipped",
+        evidence=(
+            f"The check was skipped: it is expected to take {estimate:.0f}s "
+            f"but only {time_left:.0f}s of the time budget were left."
+        ),
+        success=False,
+    )
+
+
+class Runner:
+    """
+    Runs the indicators of a configuration for one repository revision.
+
+    Plugins are instantiated once per run. Indicators (and plugin
+    initialisations) which exceed their timeout, the budget of their plugin
+    or the time budget of the whole run given by `timeout`, are cancelled
+    and recorded as timed out. As the indicators of a plugin share its
+    backend, the remaining indicators of a plugin which timed out are
+    recorded as timed out without running. Errors of an indicator are
+    recorded as failed results.
+
+    The durations of plugin initialisations and of all indicators of each
+    plugin (see `record_indicators()`) are recorded in `history` (a
+    `timings.TimingHistory`), if given, and are used to estimate the cost
+    of the steps for `schedule()` and `fits()`.
+
+    The steps are those of `plan` (see `plan.compile_plan`), which is
+    compiled from the configuration if not given.
+    """
+
+    def __init__(
+        self,
+        configuration,
+        context,
+        url,
+        branch_hash_or_tag,
+        timeout=None,
+        history=None,
+        plan=None,
+    ):
+        self.configuration = configuration
+        self.context = context
+        self.url = url
+        self.branch_hash_or_tag = branch_hash_or_tag
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.history = history
+        self.plan = plan
+        self.plugin_instances = {}
+        self.plugin_classes = {}
+        self.init_timeouts = {}
+        self.plugin_deadlines = {}  # plugin name -> end of its time budget
+        self.timed_out = {}  # plugin name -> why its indicators are not run
+        self.started = set()  # (plugin name, indicator name) of run steps
+        self.spent = {}  # plugin name -> seconds its indicators took
+
+    def steps(self):
+        """The steps of the plan, as (mode, [indicators])."""
+        if self.plan is None:
+            self.plan = compile_plan(
+                self.configuration, self.context, self.history, self.plugin_class
+            )
+        return self.plan.steps
+
+    def estimate(self, mode, indicators):
+        """
+        The expected duration of a step in seconds, including the
+        initialisation of plugins which are not loaded yet. As the
+        indicators of a plugin share its backend, the first step of a
+        plugin is estimated with the cost of all of its indicators. Unknown
+        costs count as zero, so indicators without a history are always run.
+
+        A fallback is estimated by its first provider, a race by its
+        fastest one, and a step running all providers by their sum.
+        """
+        if self.history is None:
+            return 0
+
+        def cost(indicator):
+            # The indicators of a plugin are estimated together, by what is
+            # left of the plugin's cost once some of them have run
+            name = indicator["plugin"]
+            total = self.history.estimate(TimingHistory.indicators_key(name)) or 0
+            total = max(total - self.spent.get(name, 0), 0)
+            if not self.is_loaded(name):
+                total += self.history.estimate(name) or 0
+            return total
+
+        if mode == "race":
+            return min(cost(indicator) for indicator in indicators)
+        if mode == ALL:
+            return sum(cost(indicator) for indicator in indicators)
+        return cost(indicators[0])
+
+    def schedule(self, steps):
+        """
+        Order the steps by estimated cost, cheapest first, so that the most
+        indicators fit into the time budget and expensive ones are deferred
+        to the end. The single steps of a plugin stay together (see
+        `plan.group_by_plugin`), so that they share its backend run, and
+        are ordered by the cost of the plugin. The order of steps with
+        equal costs is kept.
+        """
+        groups = {}
+        for index, step in enumerate(steps):
+            mode, indicators = step
+            key = indicators[0]["plugin"] if mode is None else index
+            groups.setdefault(key, []).append(step)
+        ordered = sorted(groups.values(), key=lambda group: self.estimate(*group[0]))
+        return [step for group in ordered for step in group]
+
+    def fits(self, mode, indicators):
+        """Whether the step is expected to finish within the time budget."""
+        time_left = self.time_left()
+        return time_left is None or self.estimate(mode, indicators) <= time_left
+
+    def skip(self, mode, indicators):
+        """The skipped result of a step which does not fit (see `fits()`)."""
+        return skipped_result(
+            indicators[0], self.estimate(mode, indicators), self.time_left()
+        )
+
+    def time_left(self, timeout=None):
+        """Return `timeout` capped by the remaining time budget of the run."""
+        if self.deadline is None:
+            return timeout
+        remaining = max(self.deadline - time.monotonic(), 0)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def plugin_time_left(self, name, timeout=None):
+        """Like `time_left()`, also capped by the budget of a plugin."""
+        deadline = self.plugin_deadlines.get(name)
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return self.time_left(timeout)
+
+    def plugin_class(self, name):
+        if name not in self.plugin_classes:
+            self.plugin_classes[name] = plugin_class(name)
+        return self.plugin_classes[name]
+
+    def is_loaded(self, name):
+        return name in self.plugin_instances
+
+    def load_plugin(self, name):
+        """
+        Return the plugin instance, creating it on first use.
+
+        Initialisation errors are raised. If the initialisation times out,
+        CallTimeoutError is raised and all indicators of the plugin will be
+        recorded as timed out.
+        """
+        if name in self.init_timeouts:
+            raise self.init_timeouts[name]
+        if name not in self.plugin_instances:
+            plugin_class = self.plugin_class(name)
+            start = time.monotonic()
+            budget = self.configuration.plugin_timeout(name)
+            if budget is not None:
+                self.plugin_deadlines[name] = start + budget
+            timeout = self.plugin_time_left(name)
+            try:
+                with span("plugin.init", plugin=name, version=plugin_class.version):
+                    instance = call_with_timeout(timeout, plugin_class, self.context)
+            except CallTimeoutError as e:
+                self.init_timeouts[name] = e
+                raise
+            finally:
+                self.record(name, time.monotonic() - start)
+            self.plugin_instances[name] = instance
+        return self.plugin_instances[name]
+
+    def run_indicator(self, indicator):
+        """
+        Run a single indicator and return its result(s). Timeouts and
+        errors are recorded as results, plugin initialisation errors are
+        raised.
+        """
+        name = indicator["plugin"]
+        self.started.add((name, indicator["name"]))
+        try:
+            plugin_instance = self.load_plugin(name)
+        except CallTimeoutError as e:
+            return timed_out_result(indicator, f"initialising the plugin {e}")
+        if name in self.timed_out:
+            return timed_out_result(indicator, self.timed_out[name])
+
+        timeout = self.plugin_time_left(
+            name, self.configuration.indicator_timeout(indicator)
+        )
+        method = getattr(plugin_instance, indicator["name"])
+        start = time.monotonic()
+        with span(
+            "indicator", plugin=indicator["plugin"], indicator=indicator["name"]
+        ) as s:
+            try:
+                results = call_with_timeout(
+                    timeout, method, self.url, self.branch_hash_or_tag
+                )
+            except CallTimeoutError as e:
+                # The backend is stopped, so the other indicators of the
+                # plugin would wait for it again or get its error.
+                self.timed_out[name] = f"'{indicator['name']}' of the plugin {e}"
+                plugin_instance.cancel()
+                results = timed_out_result(indicator, str(e))
+            except Exception as e:
+                results = error_result(indicator, e)
+            finally:
+                self.spent[name] = self.spent.get(name, 0) + time.monotonic() - start
+            s.set(output=[r.output for r in ensure_list(results)])
+        return results
+
+    def record_indicators(self):
+        """
+        Record the time spent on the indicators of each plugin which ran all
+        of its indicators of the plan, as the cost of a whole run of the
+        plugin. Plugins with indicators which were skipped or resumed from
+        the journal are not recorded, as their cost is incomplete.
+        """
+        for name, spent in self.spent.items():
+            if all(
+                (name, indicator["name"]) in self.started
+                for _, indicators in self.steps()
+                for indicator in indicators
+                if indicator["plugin"] == name
+            ):
+                self.record(TimingHistory.indicators_key(name), spent)
+
+    def record(self, key, duration):
+        # Timeouts are recorded too, as a lower bound of the real duration.
+        if self.history is not None:
+            self.history.record(key, duration)
+
+    def run_provider(self, indicator):
+        """
+        Run one of several alternative providers, turning errors into
+        results. Returns (indicator, plugin class, results).
+        """
+        plugin_class = self.plugin_class(indicator["plugin"])
+        try:
+            results = self.run_indicator(indicator)
+        except Exception as e:
+            results = CheckResult(
+                process=f"Runs '{indicator['name']}' of {indicator['plugin']}.",
+                evidence=f"{type(e).__name__}: {e}",
+            )
+        return indicator, plugin_class, results
+
+    def cancel(self, indicator):
+        """
+        Stop the backend of a losing provider of a race, unless indicators
+        of its plugin are still to run: they may share the backend run
+        (e.g. a report), which is then left to finish for them.
+        """
+        name = indicator["plugin"]
+        for _, indicators in self.steps():
+            for other in indicators:
+                if (
+                    other["plugin"] == name
+                    and (name, other["name"]) not in self.started
+                ):
+                    return
+        plugin_instance = self.plugin_instances.get(name)
+        if plugin_instance is not None:
+            plugin_instance.cancel()
+
+    def run_alternatives(self, mode, indicators):
+        """
+        Run alternative providers, see `providers.run_fallback/run_race`.
+        Returns a list of the outcomes of all providers for mode `ALL`.
+        """
+        # Providers skipped by a race or fallback are not run later either
+        self.started.update((i["plugin"], i["name"]) for i in indicators)
+        if mode == ALL:
+            return run_all(indicators, self.run_provider)
+        if mode == "race":
+            return run_race(indicators, self.run_provider, cancel=self.cancel)
+        return run_fallback(indicators, self.run_provider)
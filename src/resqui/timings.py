@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+
+from resqui.tools import user_cache_dir, write_atomic
+
+
+class TimingHistory:
+    """
+    Durations of plugin initialisations and indicators recorded in previous
+    runs, used to estimate what the next run will cost.
+
+    Keys are plugin names (initialisation) and "<plugin>.indicators" (all
+    indicators of a plugin in one run, as they often share one backend
+    run, e.g. a report, which the first of them pays for). The last `keep`
+    durations of each key are kept and their mean is the
+    estimate. The history is stored as JSON in the user cache directory;
+    a missing or unreadable file is treated as an empty history.
+    """
+
+    keep = 5
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(user_cache_dir(), "timings.json")
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.durations = json.load(f)
+        except (OSError, ValueError):
+            self.durations = {}
+
+    @staticmethod
+    def indicators_key(plugin_name):
+        return f"{plugin_name}.indicators"
+
+    def record(self, key, duration):
+        with self._lock:
+            durations = self.durations.setdefault(key, [])
+            durations.append(round(duration, 3))
+            del durations[: -self.keep]
+
+    def estimate(self, key):
+        """The expected duration in seconds, or None if it was never recorded."""
+        durations = self.durations.get(key)
+        if not durations:
+            return None
+        return sum(durations) / len(durations)
+
+    def save(self):
+        """Write the history atomically, ignoring an unwritable cache directory."""
+        with self._lock:
+            text = json.dumps(self.durations, indent=1, sort_keys=True)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_atomic(self.path, text)
+        except OSError:
+            pass
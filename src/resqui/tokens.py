@@ -0,0 +1,122 @@
+"""
+A pool of GitHub API tokens, handing out the token with the most remaining
+requests to each tool run.
+"""
+
+import threading
+import time
+
+
+class TokenPool:
+    """
+    Several GitHub tokens used in turn, so that a batch of assessments is not
+    limited by the hourly quota of a single token.
+
+    `acquire()` returns the token with the most remaining requests of the
+    core API. The quotas are read from GitHub's `/rate_limit` endpoint, which
+    does not count against them, at most every `refresh` seconds per token.
+    The tools make their GitHub requests themselves, so in between, every
+    token handed out is counted as `cost` requests.
+
+    If all tokens have fewer than `reserve` requests left, `acquire()` waits
+    for the earliest reset instead of letting the tools fail. Tokens which
+    GitHub rejects are not used again; if none is left, ValueError is raised.
+    A token whose quota cannot be read is used after the healthy ones.
+    """
+
+    url = "https://api.github.com/rate_limit"
+    refresh = 60
+    cost = 50  # requests counted for each token handed out
+    reserve = 100
+    timeout = 10
+
+    def __init__(self, tokens, clock=time.time, sleep=time.sleep):
+        self.tokens = list(dict.fromkeys(token for token in tokens if token))
+        if not self.tokens:
+            raise ValueError("No GitHub token given")
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        # token -> {"remaining": n or None if unknown, "reset": t, "checked": t}
+        self.quotas = {}
+        self.rejected = set()
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def probe(self, token):
+        """
+        The core quota of `token` as {"remaining": n, "reset": epoch seconds},
+        None if GitHub cannot be reached. Raises PermissionError if GitHub
+        rejects the token.
+        """
+        import requests
+
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        }
+        try:
+            r = requests.get(self.url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if r.status_code == 401:
+            raise PermissionError("GitHub rejected the token")
+        try:
+            r.raise_for_status()
+            core = r.json()["resources"]["core"]
+            return {"remaining": int(core["remaining"]), "reset": int(core["reset"])}
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            return None
+
+    def acquire(self):
+        """The token with the most remaining requests, see the class docs."""
+        with self._lock:
+            while True:
+                now = self.clock()
+                for token in self.tokens:
+                    if token not in self.rejected and self._is_stale(token, now):
+                        self._update(token, now)
+                usable = [token for token in self.tokens if token not in self.rejected]
+                if not usable:
+                    raise ValueError("GitHub rejected all tokens")
+
+                token = max(usable, key=self._remaining)
+                quota = self.quotas[token]
+                if quota["remaining"] is None:
+                    return token
+                if quota["remaining"] >= self.reserve:
+                    quota["remaining"] -= self.cost
+                    return token
+
+                wait = max(min(self.quotas[t]["reset"] for t in usable) - now, 1)
+                print(
+                    f"All GitHub tokens are exhausted, waiting {wait:.0f}s "
+                    "for the rate limit reset"
+                )
+                self.sleep(wait)
+                self.quotas.clear()
+
+    def _is_stale(self, token, now):
+        quota = self.quotas.get(token)
+        if quota is None or now - quota["checked"] >= self.refresh:
+            return True
+        remaining = quota["remaining"]
+        return (
+            remaining is not None and remaining < self.reserve and now >= quota["reset"]
+        )
+
+    def _update(self, token, now):
+        try:
+            quota = self.probe(token)
+        except PermissionError:
+            print(f"Warning: GitHub rejected token {self.tokens.index(token) + 1}")
+            self.rejected.add(token)
+            return
+        if quota is None:
+            quota = {"remaining": None, "reset": now}
+        self.quotas[token] = {**quota, "checked": now}
+
+    def _remaining(self, token):
+        remaining = self.quotas[token]["remaining"]
+        return self.reserve if remaining is None else remaining
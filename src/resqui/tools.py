@@ -1,6 +1,7 @@
+import os
 import re
-
-import requests
+import tempfile
+import threading
 
 
 def normalized(script):
@@ -78,6 +79,88 @@ def ensure_list(item):
     return item if isinstance(item, list) else [item]
 
 
+def user_cache_dir():
+    """The directory for resqui's persistent caches ($XDG_CACHE_HOME/resqui)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "resqui")
+
+
+def user_state_dir():
+    """The directory for resqui's persistent state ($XDG_STATE_HOME/resqui)."""
+    base = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return os.path.join(base, "resqui")
+
+
+def write_atomic(path, text):
+    """
+    Write `text` to `path` via a temporary file in the same directory, so
+    readers see either the old or the new content, never a partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def parse_duration(value):
+    """
+    Parse a duration like 90, "90", "90s", "10m", "1.5h" or "1h30m" into
+    seconds. Returns None for None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"": 1, "s": 1, "m": 60, "h": 3600}
+    pattern = r"(\d+(?:\.\d+)?)\s*([smh]?)"
+    if not re.fullmatch(rf"\s*(?:{pattern}\s*)+", value):
+        raise ValueError(f"Invalid duration '{value}'")
+    parts = re.findall(pattern, value)
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+class CallTimeoutError(Exception):
+    """Thrown if a call does not finish within its timeout"""
+
+    pass
+
+
+def call_with_timeout(timeout, fn, *args, **kwargs):
+    """
+    Call `fn` and return its result, raising CallTimeoutError if it takes
+    longer than `timeout` seconds (None means no timeout).
+
+    The call runs in a daemon thread which is abandoned on timeout, so the
+    caller is responsible for stopping whatever it was waiting for.
+    """
+    if timeout is None:
+        return fn(*args, **kwargs)
+    if timeout <= 0:
+        raise CallTimeoutError("no time left")
+
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise CallTimeoutError(f"timed out after {timeout:.0f}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
 def is_zenodo_url(url):
     return url.startswith("https://doi.org/10.5281/zenodo.") or url.startswith(
         "https://zenodo.org/records/"
@@ -85,38 +168,11 @@ def is_zenodo_url(url):
 
 
 def zenodo_url_to_git(url):
-    headers = {
-        "User-Agent": "EVERSE resqui (+https://everse.software/QualityPipelines/)"
-    }
-
-    # Parsing FAIR Signposting headers to find the URL of the REST API endpoint.
-    r = requests.get(url, headers=headers)
-    links = r.headers.get("Link", "").split(",")
-    for link in links:
-        [uri, *parameters] = link.split(";")
-
-        parameters_dict = {}
-        for parameter in parameters:
-            [key, value] = parameter.split("=")
-            parameters_dict[key.strip()] = value.strip()
-
-        if (
-            parameters_dict.get("rel") == '"describedby"'
-            and parameters_dict.get("type") == '"application/json"'
-        ):
-            # The URI is enclosed in angled brackets.
-            rest_uri = uri.strip()[1:-1]
-
-            # Extracting the Git URL from the REST API endpoint.
-            r = requests.get(
-                rest_uri, headers={**headers, "Accept": "application/json"}
-            )
-            for related_identifier in r.json()["metadata"].get(
-                "related_identifiers", {}
-            ):
-                if "://github.com/" in related_identifier["identifier"]:
-                    full_url = related_identifier["identifier"]
-                    url, branch = url_branch_from_full_url(full_url)
-                    return [url, branch]
-
-    raise ValueError("No Git repository found for Zenodo URL")
+    """
+    The [repository URL, ref] of a Zenodo DOI or record URL, resolved with
+    a cache (see resqui.zenodo.ZenodoResolver).
+    """
+    # resqui.zenodo imports this module, and requests which is slow to import
+    from resqui.zenodo import ZenodoResolver
+
+    return list(ZenodoResolver().resolve(url))
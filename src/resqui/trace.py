@@ -0,0 +1,135 @@
+"""
+Timing spans for the phases of a run.
+
+Instrumented code wraps its work in `span(name, **attributes)`. Nothing is
+recorded unless tracing was enabled with `start()`; the recorded spans can
+then be written as a Chrome/Perfetto trace or as a flat JSON timing file.
+"""
+
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+
+class Span:
+    """A timed phase of the run with arbitrary (JSON-serialisable) attributes."""
+
+    __slots__ = ("name", "start", "duration", "thread", "attributes")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration = None
+        self.thread = threading.current_thread()
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    """Collects the spans of a run, from any number of threads."""
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Enable tracing and discard the spans recorded so far."""
+        with self._lock:
+            self.enabled = True
+            self.origin = time.perf_counter()
+            self.spans = []
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Record the duration of the enclosed block. Attributes can be added
+        while it runs with `Span.set()`; an exception is recorded as the
+        `error` attribute and re-raised.
+        """
+        s = Span(name, attributes)
+        try:
+            yield s
+        except BaseException as e:
+            s.set(error=type(e).__name__)
+            raise
+        finally:
+            s.duration = time.perf_counter() - s.start
+            if self.enabled:
+                with self._lock:
+                    self.spans.append(s)
+
+    def timings(self):
+        """The spans as a flat list of dicts, ordered by their start time."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return [
+            {
+                "name": s.name,
+                "start": round(s.start - self.origin, 6),
+                "duration": round(s.duration, 6),
+                "thread": s.thread.name,
+                **s.attributes,
+            }
+            for s in spans
+        ]
+
+    def chrome_trace(self):
+        """
+        The spans in the Chrome trace event format, which can be opened in
+        https://ui.perfetto.dev or chrome://tracing.
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        events = []
+        threads = {}
+        for s in spans:
+            threads.setdefault(s.thread.ident, s.thread.name)
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": "resqui",
+                    "ph": "X",
+                    "ts": round((s.start - self.origin) * 1e6, 3),
+                    "dur": round(s.duration * 1e6, 3),
+                    "pid": pid,
+                    "tid": s.thread.ident,
+                    "args": s.attributes,
+                }
+            )
+        for tid, name in threads.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, filepath):
+        """
+        Write the Chrome trace to `filepath` and the flat timings next to
+        it, replacing the extension with `.timings.json`.
+        """
+        with open(filepath, "w") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        with open(timings_path(filepath), "w") as f:
+            json.dump(self.timings(), f, indent=2, default=str)
+
+
+def timings_path(trace_path):
+    """The path of the flat timing file which belongs to a trace file."""
+    return os.path.splitext(trace_path)[0] + ".timings.json"
+
+
+tracer = Tracer()
+span = tracer.span
@@ -0,0 +1,176 @@
+"""
+Resolves Zenodo DOIs and record URLs to the Git repository of the archived
+software, following the FAIR Signposting links of the record page to its
+REST API record.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from resqui.tools import url_branch_from_full_url, user_cache_dir, write_atomic
+
+USER_AGENT = "EVERSE resqui (+https://everse.software/QualityPipelines/)"
+
+
+def parse_link_header(value):
+    """The links of an HTTP Link header as (URI, {parameter: value})."""
+    links = []
+    for link in value.split(","):
+        uri, *parameters = link.split(";")
+        parameters_dict = {}
+        for parameter in parameters:
+            key, _, parameter_value = parameter.partition("=")
+            parameters_dict[key.strip()] = parameter_value.strip().strip('"')
+        # The URI is enclosed in angled brackets.
+        links.append((uri.strip()[1:-1], parameters_dict))
+    return links
+
+
+def record_api_url(link_header):
+    """The URL of the REST API record in the Signposting links, or None."""
+    for uri, parameters in parse_link_header(link_header):
+        if (
+            parameters.get("rel") == "describedby"
+            and parameters.get("type") == "application/json"
+        ):
+            return uri
+    return None
+
+
+def git_repository(record):
+    """
+    The (repository URL, branch, tag or commit) of a Zenodo record, from its
+    related identifiers. The ref is None if the identifier names none.
+    """
+    for related_identifier in record["metadata"].get("related_identifiers", []):
+        identifier = related_identifier["identifier"]
+        if "://github.com/" in identifier:
+            return tuple(url_branch_from_full_url(identifier) or (identifier, None))
+    raise ValueError("No Git repository found for Zenodo URL")
+
+
+class ZenodoResolver:
+    """
+    Resolves Zenodo URLs with a pooled HTTP session, timeouts and retries,
+    and caches the results on disk.
+
+    A cached result is used for `ttl` seconds. After that, the Signposting
+    links are followed again and the record is revalidated with its ETag,
+    so that an unchanged record is not downloaded again. If Zenodo cannot
+    be reached, an outdated result is used rather than failing.
+    """
+
+    ttl = 7 * 24 * 3600
+    timeout = (5, 30)  # seconds to connect, to read
+    max_retries = 3
+    backoff = 0.5
+    keep = 1000  # cached results
+
+    def __init__(self, path=None, session=None):
+        if path is None:
+            path = os.path.join(user_cache_dir(), "zenodo.json")
+        self.path = path
+        self.session = session or self.make_session()
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @classmethod
+    def make_session(cls, pool_size=16):
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        retry = Retry(
+            total=cls.max_retries,
+            backoff_factor=cls.backoff,
+            status_forcelist=[429, 500, 502, 503, 504],
+        )
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def resolve(self, url):
+        """
+        The (repository URL, ref) of a Zenodo DOI or record URL; the ref is
+        None for the default branch. Raises ValueError if the record has no
+        Git repository and requests.RequestException if it cannot be fetched.
+        """
+        result = self._resolve(url)
+        self.save()
+        return result
+
+    def resolve_many(self, urls, max_workers=8):
+        """
+        Resolve several URLs concurrently. Returns the (repository URL, ref)
+        or the exception raised (see `resolve()`) of each URL.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {url: pool.submit(self._resolve, url) for url in urls}
+        self.save()
+        results = {}
+        for url, future in futures.items():
+            try:
+                results[url] = future.result()
+            except (ValueError, requests.RequestException) as e:
+                results[url] = e
+        return results
+
+    def _resolve(self, url):
+        with self._lock:
+            entry = self.entries.get(url)
+        if entry is not None and time.time() - entry["checked"] < self.ttl:
+            return entry["repository"], entry["ref"]
+        try:
+            entry = self._fetch(url, entry)
+        except requests.RequestException:
+            if entry is None:
+                raise
+            return entry["repository"], entry["ref"]
+        with self._lock:
+            self.entries[url] = entry
+        return entry["repository"], entry["ref"]
+
+    def _fetch(self, url, entry):
+        r = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        r.raise_for_status()
+        record_url = record_api_url(r.headers.get("Link", ""))
+        if record_url is None:
+            raise ValueError("No Git repository found for Zenodo URL")
+
+        headers = {"Accept": "application/json"}
+        if entry is not None and entry["record"] == record_url and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        r = self.session.get(record_url, headers=headers, timeout=self.timeout)
+        if r.status_code == 304:
+            return {**entry, "checked": time.time()}
+        r.raise_for_status()
+        repository, ref = git_repository(r.json())
+        return {
+            "record": record_url,
+            "etag": r.headers.get("ETag"),
+            "repository": repository,
+            "ref": ref,
+            "checked": time.time(),
+        }
+
+    def save(self):
+        """Write the cache atomically, ignoring an unwritable cache directory."""
+        with self._lock:
+            recent = sorted(self.entries.items(), key=lambda item: item[1]["checked"])
+            self.entries = dict(recent[-self.keep :])
+            text = json.dumps(self.entries, indent=1, sort_keys=True)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_atomic(self.path, text)
+        except OSError:
+            pass
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+
+
+class TestCase(unittest.TestCase):
+    """
+    A test case that keeps the caches (plugin registry, timings, Zenodo
+    records) and the outbox of its tests out of the user's home directory.
+    """
+
+    def run(self, result=None):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            user_dirs = {
+                "XDG_CACHE_HOME": os.path.join(tmp_dir, "cache"),
+                "XDG_STATE_HOME": os.path.join(tmp_dir, "state"),
+            }
+            with patch.dict(os.environ, user_dirs):
+                return super().run(result)
+
+
+def git(path, *args):
+    """Run git in the repository at `path` and return its output."""
+    return subprocess.run(
+        ["git", "-C", path] + list(args), check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def commit_files(path, files, message="Initial commit"):
+    """
+    Write `files`, a dict of names and contents, to the repository at `path`
+    and commit them. Returns the hash of the commit.
+    """
+    for name, content in files.items():
+        file_path = os.path.join(path, name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            f.write(content)
+    git(path, "add", ".")
+    git(path, "commit", "-m", message)
+    return git(path, "rev-parse", "HEAD")
+
+
+def make_repo(path, files=None):
+    """
+    Initialise a git repository at `path` and commit `files` to it if given.
+    Returns the hash of the commit.
+    """
+    subprocess.run(["git", "init", path], check=True, capture_output=True)
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "config", "user.name", "Test User")
+    if files:
+        return commit_files(path, files)
@@ -0,0 +1,242 @@
+import gzip
+import http.server
+import json
+import threading
+from unittest.mock import patch
+
+from resqui.api import APIClient, BulkUploader, UploadResult, parse_retry_after
+
+from helpers import TestCase
+
+
+class FakeDashVerse(http.server.BaseHTTPRequestHandler):
+    """
+    Answers with the queued (status, headers) responses, then 201; status
+    None closes the connection without answering.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        server.requests.append(
+            {
+                "path": self.path,
+                "headers": dict(self.headers),
+                "body": body.decode(),
+                "client": self.client_address,
+            }
+        )
+        status, headers = server.responses.pop(0) if server.responses else (201, {})
+        if status is None:
+            self.close_connection = True
+            return
+        if status == 415 and self.headers.get("Content-Encoding") != "gzip":
+            status = 201
+        data = json.dumps({"status": status}).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAPIClient(TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeDashVerse)
+        self.server.requests = []
+        self.server.responses = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        # The connection pool and the compression fallback are shared
+        self.addCleanup(APIClient._uncompressed.clear)
+        self.addCleanup(APIClient._no_arrays.clear)
+        self.addCleanup(self._close_idle)
+        sleep = patch("resqui.api.time.sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def _close_idle(self):
+        for connections in APIClient._idle.values():
+            for conn in connections:
+                conn.close()
+        APIClient._idle.clear()
+
+    def test_missing_token(self):
+        with patch.dict("os.environ", {}, clear=True):
+            with self.assertRaises(ValueError):
+                APIClient()
+
+    def test_post_is_compressed_and_minimal(self):
+        api = APIClient("tok-123", endpoint_url=self.url)
+        api.post('{"a": 1}')
+        (request,) = self.server.requests
+        self.assertEqual(request["path"], "/assessment")
+        self.assertEqual(request["body"], '{"a": 1}')
+        self.assertEqual(request["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(request["headers"]["Prefer"], "return=minimal")
+        self.assertEqual(request["headers"]["Authorization"], "Bearer tok-123")
+
+    def test_connection_is_reused_across_clients(self):
+        for i in range(3):
+            APIClient("tok-123", endpoint_url=self.url).post("{}")
+        clients = {request["client"] for request in self.server.requests}
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(clients), 1)
+
+    def test_stale_connection_is_replaced(self):
+        api = APIClient("tok-123", endpoint_url=self.url)
+        api.post("{}")
+        for conn in APIClient._idle[api._server]:
+            conn.sock.close()
+        api.post("{}")
+        self.assertEqual(len(self.server.requests), 2)
+        self.sleep.assert_not_called()
+
+    def test_retries_transient_errors(self):
+        self.server.responses = [(503, {"Retry-After": "7"}), (429, {})]
+        api = APIClient("tok-123", endpoint_url=self.url)
+        self.assertEqual(json.loads(api.post("{}")), {"status": 201})
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        self.assertEqual(self.sleep.call_args_list[0].args, (7.0,))
+        self.assertLessEqual(self.sleep.call_args_list[1].args[0], api.backoff * 2)
+
+    def test_long_retry_after_is_reported(self):
+        self.server.responses = [(429, {"Retry-After": "120"})]
+        api = APIClient("tok-123", endpoint_url=self.url)
+        with self.assertRaisesRegex(RuntimeError, "retry after 120s") as cm:
+            api.post("{}")
+        self.assertEqual(cm.exception.retry_after, 120)
+        self.assertEqual(len(self.server.requests), 1)
+        self.sleep.assert_not_called()
+
+    def test_post_is_not_retried_after_it_was_sent(self):
+        self.server.responses = [(None, {})]
+        api = APIClient("tok-123", endpoint_url=self.url)
+        with self.assertRaisesRegex(RuntimeError, "may have been received"):
+            api.post("{}")
+        self.assertEqual(len(self.server.requests), 1)
+        self.sleep.assert_not_called()
+
+    def test_refused_connections_are_retried(self):
+        self.server.shutdown()
+        self.server.server_close()
+        api = APIClient("tok-123", endpoint_url=self.url)
+        with self.assertRaisesRegex(RuntimeError, "connection error"):
+            api.post("{}")
+        self.assertEqual(self.sleep.call_count, api.max_retries)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.responses = [(502, {})] * 10
+        api = APIClient("tok-123", endpoint_url=self.url)
+        with self.assertRaisesRegex(RuntimeError, "502"):
+            api.post("{}")
+        self.assertEqual(len(self.server.requests), api.max_retries + 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.responses = [(400, {})]
+        api = APIClient("tok-123", endpoint_url=self.url)
+        with self.assertRaisesRegex(RuntimeError, "400"):
+            api.post("{}")
+        self.assertEqual(len(self.server.requests), 1)
+        self.sleep.assert_not_called()
+
+    def test_falls_back_to_uncompressed_bodies(self):
+        self.server.responses = [(415, {})]
+        api = APIClient("tok-123", endpoint_url=self.url)
+        api.post("{}")
+        api.post("{}")
+        self.assertEqual(len(self.server.requests), 3)
+        for request in self.server.requests[1:]:
+            self.assertNotIn("Content-Encoding", request["headers"])
+            self.assertEqual(request["body"], "{}")
+
+    def test_retry_delay(self):
+        api = APIClient("tok-123", endpoint_url=self.url)
+        self.assertEqual(api.retry_delay(0, "2"), 2)
+        self.assertEqual(api.retry_delay(0, "3600"), 3600)
+        self.assertEqual(api.retry_delay(0, "Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        for attempt in range(10):
+            delay = api.retry_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(0.5 * 2**attempt, api.max_backoff))
+
+    def test_parse_retry_after(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("-5"), 0)
+        self.assertEqual(parse_retry_after("1.5"), 1.5)
+
+    def test_post_many_posts_one_array(self):
+        api = APIClient("tok-123", endpoint_url=self.url)
+        results = api.post_many(['{"a": 1}', '{"b": 2}'])
+        self.assertEqual([(r.index, r.ok) for r in results], [(0, True), (1, True)])
+        (request,) = self.server.requests
+        self.assertEqual(request["path"], "/assessment")
+        self.assertEqual(json.loads(request["body"]), [{"a": 1}, {"b": 2}])
+
+    def test_rejected_array_is_posted_one_by_one(self):
+        self.server.responses = [(400, {}), (201, {}), (400, {})]
+        api = APIClient("tok-123", endpoint_url=self.url)
+        results = api.post_many(['{"a": 1}', '{"b": 2}'], max_workers=1)
+        self.assertEqual(
+            [(r.ok, r.status) for r in results], [(True, None), (False, 400)]
+        )
+        bodies = [request["body"] for request in self.server.requests]
+        self.assertEqual(bodies, ['[{"a": 1},{"b": 2}]', '{"a": 1}', '{"b": 2}'])
+        # One assessment was rejected, so arrays are still tried
+        self.assertNotIn(api._server, APIClient._no_arrays)
+
+    def test_server_without_arrays_gets_single_posts(self):
+        self.server.responses = [(404, {})]
+        api = APIClient("tok-123", endpoint_url=self.url)
+        api.post_many(["{}", "{}"], max_workers=1)
+        self.assertIn(api._server, APIClient._no_arrays)
+        api.post_many(["{}", "{}"], max_workers=1)
+        self.assertEqual(len(self.server.requests), 5)
+
+    def test_failed_array_fails_all_assessments(self):
+        self.server.responses = [(503, {})] * 4
+        api = APIClient("tok-123", endpoint_url=self.url)
+        results = api.post_many(["{}", "{}"])
+        self.assertEqual([(r.ok, r.status) for r in results], [(False, 503)] * 2)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_post_each_posts_concurrently(self):
+        self.server.responses = [(201, {})] * 7 + [(400, {})]
+        api = APIClient("tok-123", endpoint_url=self.url)
+        payloads = [json.dumps({"i": i}) for i in range(8)]
+        results = api.post_each(payloads, max_workers=4)
+        self.assertEqual([r.index for r in results], list(range(8)))
+        self.assertEqual(len(api.post_each([], max_workers=4)), 0)
+        self.assertEqual(sum(not r.ok for r in results), 1)
+        bodies = sorted(request["body"] for request in self.server.requests)
+        self.assertEqual(bodies, sorted(payloads))
+
+    def test_bulk_uploader_batches_by_count_and_size(self):
+        batches = []
+
+        def post_many(batch, max_workers):
+            batches.append(batch)
+            return [UploadResult(i, len(batch) > 1) for i in range(len(batch))]
+
+        api = APIClient("tok-123", endpoint_url=self.url)
+        payloads = ["{}"] * 4 + ['{"x": "%s"}' % ("y" * 60), "{}"]
+        with patch.object(api, "post_many", side_effect=post_many):
+            with BulkUploader(api, max_items=3, max_bytes=50) as uploader:
+                for payload in payloads:
+                    uploader.add(payload)
+        self.assertEqual([len(batch) for batch in batches], [3, 1, 1, 1])
+        self.assertEqual([r.index for r in uploader.results], list(range(6)))
+        self.assertEqual([r.index for r in uploader.failures], [3, 4, 5])
@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import tempfile
+
+from benchmarks.fakes import FakeDockerExecutor, fake_executors, scorecard_report
+from benchmarks.repos import RepoShape, file_url, generate_repo
+from benchmarks.run import (
+    PHASES,
+    STARTUP,
+    make_configuration,
+    measure_startup,
+    run_profile,
+)
+from resqui.plugins import openssfscorecard
+
+from helpers import TestCase
+
+
+class TestBenchmarks(TestCase):
+    def test_scorecard_report_size(self):
+        report = scorecard_report(100_000)
+        self.assertAlmostEqual(len(report), 100_000, delta=100)
+        self.assertEqual(len(json.loads(report)["checks"]), 8)
+
+    def test_fake_executors_are_patched_in(self):
+        with fake_executors(output_size=10):
+            self.assertIs(openssfscorecard.DockerExecutor, FakeDockerExecutor)
+        self.assertIsNot(openssfscorecard.DockerExecutor, FakeDockerExecutor)
+
+    def test_make_configuration(self):
+        indicators = make_configuration(25)["indicators"]
+        self.assertEqual(len(indicators), 25)
+        self.assertEqual(len({i["@id"] for i in indicators}), 25)
+
+    def test_run_profile(self):
+        timings = run_profile(12, 2, latency=0, output_size=1000, n_configurations=2)
+        self.assertEqual(list(timings), PHASES)
+        self.assertTrue(all(t >= 0 for t in timings.values()))
+
+    def test_measure_startup(self):
+        startup = measure_startup(1)
+        self.assertEqual(list(startup), list(STARTUP))
+        self.assertTrue(all(t > 0 for t in startup.values()))
+
+
+class TestSyntheticRepositories(TestCase):
+    def _git(self, path, *args):
+        return subprocess.check_output(["git", "-C", path, *args], text=True)
+
+    def test_generate_repo(self):
+        shape = RepoShape(
+            commits=30, files=20, binary_blobs=2, binary_size=1000, secrets=4
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = generate_repo(os.path.join(tmp_dir, shape.name), shape)
+            self.assertEqual(
+                self._git(path, "rev-list", "--count", "main").strip(), "30"
+            )
+            files = self._git(path, "ls-files").split()
+            self.assertEqual(len([f for f in files if f.endswith(".bin")]), 2)
+            history = self._git(path, "log", "-p", "main")
+            self.assertRegex(history, r"AKIA[0-9A-Z]{16}|ghp_|hooks\.slack\.com")
+
+            # The same shape gives the same repository.
+            other = generate_repo(os.path.join(tmp_dir, "other"), shape)
+            self.assertEqual(
+                self._git(path, "rev-parse", "main"),
+                self._git(other, "rev-parse", "main"),
+            )
+
+            # The repository can be cloned via its file:// URL.
+            clone = os.path.join(tmp_dir, "clone")
+            subprocess.run(["git", "clone", "-q", file_url(path), clone], check=True)
+            self.assertTrue(os.path.isfile(os.path.join(clone, "README.md")))
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from resqui.cache import LRUCache, SingleFlight, cache_stats, report_cache
+
+from helpers import TestCase
+
+
+class TestSingleFlight(TestCase):
+    def test_result_is_cached(self):
+        calls = []
+        flight = SingleFlight()
+
+        def compute(x):
+            calls.append(x)
+            return x * 2
+
+        self.assertEqual(flight.do("a", compute, 21), 42)
+        self.assertEqual(flight.do("a", compute, 21), 42)
+        self.assertEqual(calls, [21])
+        self.assertIn("a", flight)
+
+    def test_concurrent_callers_share_one_computation(self):
+        calls = []
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "report"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("k", compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, ["report"] * 5)
+
+    def test_failure_propagates_to_waiting_callers_and_is_not_cached(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def fail():
+            release.wait(5)
+            raise RuntimeError("container crashed")
+
+        def call():
+            try:
+                flight.do("k", fail)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        while "k" not in flight._calls:
+            time.sleep(0.001)
+        follower = threading.Thread(target=call)
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(errors, ["container crashed"] * 2)
+        self.assertNotIn("k", flight)
+        self.assertEqual(flight.do("k", lambda: "retried"), "retried")
+
+    def test_custom_cache_mapping(self):
+        cache = {"k": "cached"}
+        flight = SingleFlight(cache)
+        self.assertEqual(flight.do("k", lambda: "new"), "cached")
+        flight.do("j", lambda: "new")
+        self.assertEqual(cache["j"], "new")
+
+
+class TestLRUCache(TestCase):
+    def test_evicts_least_recently_used_entry(self):
+        cache = LRUCache(maxsize=2)
+        cache["a"] = 1
+        cache["b"] = 2
+        cache.get("a")
+        cache["c"] = 3
+        self.assertEqual(sorted(cache), ["a", "c"])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_counts_hits_and_misses(self):
+        cache = LRUCache()
+        cache["a"] = 1
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_byte_limit(self):
+        cache = LRUCache(max_bytes=30)
+        cache["a"] = "x" * 10
+        cache["b"] = "y" * 10
+        self.assertEqual(cache.nbytes, 24)
+        cache["c"] = "z" * 10
+        self.assertEqual(sorted(cache), ["b", "c"])
+        # A single oversized entry is kept.
+        cache["d"] = "w" * 100
+        self.assertEqual(list(cache), ["d"])
+
+    def test_large_values_are_compressed(self):
+        report = {"checks": [{"details": ["same line"] * 1000}]}
+        cache = LRUCache(compress_threshold=1024)
+        cache["report"] = report
+        self.assertLess(cache.nbytes, 1024)
+        self.assertEqual(cache["report"], report)
+
+    def test_replacing_an_entry_updates_size(self):
+        cache = LRUCache(max_bytes=100)
+        cache["a"] = "x" * 10
+        cache["a"] = "x" * 20
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.nbytes, 22)
+
+    def test_named_caches_are_reported(self):
+        cache = LRUCache(name="test-cache")
+        cache.get("missing")
+        self.assertEqual(cache_stats()["test-cache"]["misses"], 1)
+
+    def test_report_cache_is_bounded_single_flight(self):
+        flight = report_cache("test-reports")
+        self.assertEqual(flight.do("k", lambda: {"checks": []}), {"checks": []})
+        self.assertEqual(flight.do("k", lambda: None), {"checks": []})
+        stats = cache_stats()["test-reports"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
@@ -0,0 +1,106 @@
+import gzip
+import json
+import os
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+from resqui.executors import (
+    Cassette,
+    CassetteError,
+    DockerExecutor,
+    PythonExecutor,
+    use_cassette,
+)
+
+from helpers import TestCase
+
+
+class TestCassette(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "run.cassette")
+
+    def _workspace(self):
+        workspace = tempfile.mkdtemp(dir=self.tmp_dir.name)
+        with open(os.path.join(workspace, "README.md"), "w") as f:
+            f.write("unchanged")
+        return workspace
+
+    def _record_docker_run(self):
+        workspace = self._workspace()
+
+        def fake_run(cmd, **kwargs):
+            if cmd[1] == "run":
+                with open(os.path.join(workspace, "report.json"), "w") as f:
+                    f.write('{"leaks": []}')
+                return subprocess.CompletedProcess(cmd, 0, "", "no leaks found")
+            return subprocess.CompletedProcess(cmd, 0)
+
+        cassette = Cassette(self.path, record=True, secrets=["ghp-secret"])
+        with use_cassette(cassette), patch(
+            "resqui.executors.docker.subprocess.run", side_effect=fake_run
+        ):
+            executor = DockerExecutor("ghcr.io/gitleaks/gitleaks:v8.24.2")
+            executor.run(
+                ["git", "/path", "-r", "/path/report.json", "-t", "ghp-secret"],
+                run_args=["--rm", "-v", f"{workspace}:/path", "-e", "TOKEN=ghp-secret"],
+            )
+
+    def test_record(self):
+        self._record_docker_run()
+        with gzip.open(self.path, "rt") as f:
+            data = json.load(f)
+        [interaction] = data["interactions"]
+        self.assertEqual(interaction["executor"], "docker")
+        self.assertEqual(interaction["env_keys"], ["TOKEN"])
+        self.assertEqual(interaction["stderr"], "no leaks found")
+        # Only the files written by the run are recorded.
+        self.assertEqual(list(interaction["files"]), ["0/report.json"])
+        self.assertNotIn("ghp-secret", json.dumps(data))
+        self.assertIn("<mount0>:/path", interaction["run_args"])
+
+    def test_replay(self):
+        self._record_docker_run()
+        workspace = self._workspace()
+        cassette = Cassette(self.path, secrets=["ghp-other"])
+        with use_cassette(cassette), patch(
+            "resqui.executors.docker.subprocess.run"
+        ) as mock_run:
+            executor = DockerExecutor("ghcr.io/gitleaks/gitleaks:v8.24.2")
+            result = executor.run(
+                ["git", "/path", "-r", "/path/report.json", "-t", "ghp-other"],
+                run_args=["--rm", "-v", f"{workspace}:/path"],
+            )
+        mock_run.assert_not_called()
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stderr, "no leaks found")
+        with open(os.path.join(workspace, "report.json")) as f:
+            self.assertEqual(json.load(f), {"leaks": []})
+
+    def test_replay_miss(self):
+        self._record_docker_run()
+        with use_cassette(Cassette(self.path)):
+            executor = DockerExecutor("ghcr.io/gitleaks/gitleaks:v8.24.2")
+            with self.assertRaises(CassetteError):
+                executor.run(["detect"])
+
+    def test_replay_python_in_order(self):
+        script = "print('hello')"
+        cassette = Cassette(self.path, record=True)
+        for stdout in ["first\n", "second\n"]:
+            result = subprocess.CompletedProcess([], 0, stdout, "")
+            cassette.record("python", None, [script], [], {"TOKEN": "x"}, result)
+        cassette.save()
+
+        with use_cassette(Cassette(self.path)):
+            with patch("resqui.executors.python.venv.create") as create:
+                executor = PythonExecutor(packages=["howfairis==0.14.2"])
+            create.assert_not_called()
+            outputs = [executor.execute(script).stdout for _ in range(3)]
+        self.assertEqual(outputs, ["first\n", "second\n", "second\n"])
+
+    def test_unreadable_cassette(self):
+        with self.assertRaises(CassetteError):
+            Cassette(os.path.join(self.tmp_dir.name, "missing.cassette"))
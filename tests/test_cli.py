@@ -1,59 +1,32 @@
 import contextlib
 import io
+import json
 import sys  # noqa: F401
 import os
-import subprocess
 import tempfile
-import unittest
 from unittest.mock import MagicMock, patch
 
-from resqui.cli import GitInspector, Spinner, print_indicator_plugins, resqui
+from resqui.api import APIError
+from resqui.cli import GitInspector, manage_outbox, print_indicator_plugins, resqui
+from resqui.config import Configuration
+from resqui.journal import Journal, journal_path
+from resqui.outbox import Outbox
+from resqui.timings import TimingHistory
 from resqui.docopt import docopt
 
 # The module docstring is the docopt spec; import it for arg-parsing tests.
 import resqui.cli as cli_module
 
+from helpers import TestCase, git, make_repo
+
 
 def _make_git_repo(path):
     """Initialise a minimal git repo with one commit and a fake remote."""
-    subprocess.run(["git", "init", path], check=True, capture_output=True)
-    subprocess.run(
-        ["git", "-C", path, "config", "user.email", "test@example.com"],
-        check=True,
-        capture_output=True,
-    )
-    subprocess.run(
-        ["git", "-C", path, "config", "user.name", "Test User"],
-        check=True,
-        capture_output=True,
-    )
-    subprocess.run(
-        [
-            "git",
-            "-C",
-            path,
-            "remote",
-            "add",
-            "origin",
-            "https://github.com/example/repo.git",
-        ],
-        check=True,
-        capture_output=True,
-    )
-    readme = os.path.join(path, "README.md")
-    with open(readme, "w") as f:
-        f.write("hello\n")
-    subprocess.run(
-        ["git", "-C", path, "add", "README.md"], check=True, capture_output=True
-    )
-    subprocess.run(
-        ["git", "-C", path, "commit", "-m", "Initial commit"],
-        check=True,
-        capture_output=True,
-    )
-
-
-class TestGitInspector(unittest.TestCase):
+    make_repo(path, {"README.md": "hello\n"})
+    git(path, "remote", "add", "origin", "https://github.com/example/repo.git")
+
+
+class TestGitInspector(TestCase):
     @classmethod
     def setUpClass(cls):
         cls.repo_dir = tempfile.mkdtemp()
@@ -99,28 +72,7 @@ class TestGitInspector(unittest.TestCase):
         self.assertTrue(self.inspector.version)
 
 
-class TestSpinner(unittest.TestCase):
-    def test_context_manager_does_not_raise(self):
-        # In test environments stdout is not a tty, so the spinner stays idle.
-        with Spinner(print_time=False):
-            pass
-
-    def test_stop_prints_elapsed_time(self):
-        spinner = Spinner(print_time=True)
-        buf = io.StringIO()
-        with patch("sys.stdout", buf):
-            spinner.stop()
-        self.assertIn("s)", buf.getvalue())
-
-    def test_no_spinning_when_not_a_tty(self):
-        spinner = Spinner()
-        with patch("sys.stdout") as mock_stdout:
-            mock_stdout.isatty.return_value = False
-            spinner.__enter__()
-        self.assertFalse(spinner.spinning)
-
-
-class TestDocoptArgParsing(unittest.TestCase):
+class TestDocoptArgParsing(TestCase):
     """Verify CLI argument parsing without running the full command."""
 
     def _parse(self, argv):
@@ -129,8 +81,8 @@ class TestDocoptArgParsing(unittest.TestCase):
     def test_no_args_gives_empty_options(self):
         args = self._parse([])
         self.assertIsNone(args["-u"])
-        self.assertIsNone(args["-c"])
-        self.assertIsNone(args["-t"])
+        self.assertEqual(args["-c"], [])
+        self.assertEqual(args["-t"], [])
 
     def test_url_flag(self):
         args = self._parse(["-u", "https://github.com/user/repo"])
@@ -138,7 +90,15 @@ class TestDocoptArgParsing(unittest.TestCase):
 
     def test_config_flag(self):
         args = self._parse(["-c", "my_config.json"])
-        self.assertEqual(args["-c"], "my_config.json")
+        self.assertEqual(args["-c"], ["my_config.json"])
+
+    def test_config_flag_repeated(self):
+        args = self._parse(["-c", "a.json", "-o", "out.json", "-c", "b.json"])
+        self.assertEqual(args["-c"], ["a.json", "b.json"])
+
+    def test_github_token_flag_repeated(self):
+        args = self._parse(["-t", "ghp-a", "-t", "ghp-b"])
+        self.assertEqual(args["-t"], ["ghp-a", "ghp-b"])
 
     def test_output_flag(self):
         args = self._parse(["-o", "out.json"])
@@ -157,7 +117,7 @@ class TestDocoptArgParsing(unittest.TestCase):
         self.assertTrue(args["indicators"])
 
 
-class TestPrintIndicatorPlugins(unittest.TestCase):
+class TestPrintIndicatorPlugins(TestCase):
     def test_produces_output(self):
         buf = io.StringIO()
         with patch("sys.stdout", buf):
@@ -174,7 +134,7 @@ class TestPrintIndicatorPlugins(unittest.TestCase):
         self.assertIn("Indicators:", output)
 
 
-class TestResquiExitPaths(unittest.TestCase):
+class TestResquiExitPaths(TestCase):
     def test_exits_when_not_in_git_repo(self):
         """resqui with no -u and a non-git directory must exit with code 1."""
         with tempfile.TemporaryDirectory() as plain_dir:
@@ -199,35 +159,7 @@ class TestResquiExitPaths(unittest.TestCase):
             self.assertEqual(cm.exception.code, 0)
 
 
-class TestSpinnerTty(unittest.TestCase):
-    """Cover the start/stop/spin path that only runs when stdout is a tty."""
-
-    def test_start_and_stop(self):
-        spinner = Spinner(print_time=False)
-        with patch("builtins.print"):
-            spinner.start()
-            spinner.stop()
-        self.assertFalse(spinner.spinning)
-
-    def test_start_joins_thread(self):
-        spinner = Spinner(print_time=False)
-        with patch("builtins.print"):
-            spinner.start()
-            self.assertIsNotNone(spinner.spinner_thread)
-            spinner.stop()
-        # Thread must have been joined — should be done by now.
-        self.assertFalse(spinner.spinner_thread.is_alive())
-
-    def test_enter_starts_spinning_when_tty(self):
-        spinner = Spinner(print_time=False)
-        with patch("sys.stdout") as mock_stdout:
-            mock_stdout.isatty.return_value = True
-            spinner.__enter__()
-        self.assertTrue(spinner.spinning)
-        spinner.stop()
-
-
-class TestResquiMainPath(unittest.TestCase):
+class TestResquiMainPath(TestCase):
     """Cover the resqui() body: metadata extraction, indicator loop, upload."""
 
     def setUp(self):
@@ -240,11 +172,19 @@ class TestResquiMainPath(unittest.TestCase):
         self.inspector.version = "1.0.0"
         self.inspector.current_commit_hash = "a" * 40
 
-        self.config = MagicMock()
+        with patch("builtins.print"):
+            self.config = Configuration()
         self.config._cfg = {"indicators": []}
 
         self.summary = MagicMock()
         self.summary.to_json.return_value = "{}"
+        self.summary.add_indicator_result.return_value = {"@type": "CheckResult"}
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.history = TimingHistory(os.path.join(tmp_dir.name, "timings.json"))
+        self.outbox = Outbox(os.path.join(tmp_dir.name, "outbox"))
+        self.journal_file = os.path.join(tmp_dir.name, "summary.json.journal")
 
     def _patches(self, argv=None, **overrides):
         """Return an ExitStack with standard patches applied."""
@@ -256,6 +196,15 @@ class TestResquiMainPath(unittest.TestCase):
         )
         stack.enter_context(patch("resqui.cli.Configuration", return_value=self.config))
         stack.enter_context(patch("resqui.cli.Summary", return_value=self.summary))
+        stack.enter_context(
+            patch("resqui.cli.TimingHistory", return_value=self.history)
+        )
+        stack.enter_context(patch("resqui.cli.Outbox", return_value=self.outbox))
+        stack.enter_context(
+            patch("resqui.cli.journal_path", return_value=self.journal_file)
+        )
+        stack.enter_context(patch.dict("os.environ"))
+        os.environ.pop("DASHVERSE_TOKEN", None)
         for target, val in overrides.items():
             stack.enter_context(patch(target, val))
         return stack
@@ -263,30 +212,95 @@ class TestResquiMainPath(unittest.TestCase):
     def test_runs_with_local_repo_no_token(self):
         with self._patches():
             resqui()
-        self.summary.write.assert_called_once()
+        self.summary.stream.return_value.close.assert_called_once()
 
     def test_github_token_path(self):
         with self._patches(argv=["resqui", "-t", "ghp-abc"]):
             resqui()
-        self.summary.write.assert_called_once()
+        self.summary.stream.return_value.close.assert_called_once()
+
+    def test_several_github_tokens_share_a_pool(self):
+        with self._patches(argv=["resqui", "-t", "ghp-a", "-t", "ghp-b"]), patch(
+            "resqui.cli.Runner"
+        ) as runner:
+            resqui()
+        context = runner.call_args.args[1]
+        self.assertEqual(context.github_token, "ghp-a")
+        self.assertEqual(context.github_tokens.tokens, ["ghp-a", "ghp-b"])
 
     def test_explicit_branch_skips_commit_hash(self):
         with self._patches(argv=["resqui", "-b", "develop"]):
             resqui()
         # Summary is constructed with the branch name, not the commit hash.
         call_args = resqui.__module__  # just confirm no exception  # noqa
-        self.summary.write.assert_called_once()
+        self.summary.stream.return_value.close.assert_called_once()
 
-    def test_upload_runtime_error_is_handled(self):
-        self.summary.upload.side_effect = RuntimeError("network error")
-        with self._patches():
-            resqui()  # must not raise
-        self.summary.upload.assert_called_once()
+    def test_plan_is_printed_without_running(self):
+        print_mock = MagicMock()
+        with self._patches(
+            argv=["resqui", "plan"], **{"builtins.print": print_mock}
+        ), patch("resqui.cli.Runner") as runner:
+            with self.assertRaises(SystemExit) as cm:
+                resqui()
+        self.assertEqual(cm.exception.code, 0)
+        runner.assert_not_called()
+        printed = "\n".join(str(c.args[0]) for c in print_mock.call_args_list)
+        self.assertIn("Estimated duration", printed)
 
-    def test_upload_value_error_is_handled(self):
-        self.summary.upload.side_effect = ValueError("bad token")
+    def test_configuration_errors_stop_before_the_clone(self):
+        self.config._cfg = {
+            "indicators": [{"name": "has_typo", "plugin": "HowFairIs", "@id": "x"}]
+        }
+        clone = MagicMock()
+        with self._patches(
+            argv=["resqui", "-u", "https://github.com/user/repo"],
+            **{"resqui.cli.subprocess.run": clone},
+        ):
+            with self.assertRaises(SystemExit) as cm:
+                resqui()
+        self.assertEqual(cm.exception.code, 1)
+        clone.assert_not_called()
+        self.summary.stream.assert_not_called()
+
+    def test_summary_is_streamed_to_the_output_file(self):
+        with self._patches(argv=["resqui", "-o", "out.json", "--compact"]):
+            resqui()
+        self.summary.stream.assert_called_once_with("out.json", compact=True)
+        self.summary.stream.return_value.close.assert_called_once()
+
+    def test_summary_is_uploaded_from_the_outbox(self):
+        api = MagicMock()
+        with self._patches(
+            argv=["resqui", "-d", "tok-123"],
+            **{"resqui.cli.APIClient": MagicMock(return_value=api)},
+        ):
+            resqui()
+        api.post.assert_called_once_with("{}")
+        self.assertEqual(self.outbox.entries(), [])
+
+    def test_failed_upload_stays_in_the_outbox(self):
+        api = MagicMock()
+        api.post.side_effect = APIError("network error", 503)
+        print_mock = MagicMock()
+        with self._patches(
+            argv=["resqui", "-d", "tok-123"],
+            **{
+                "resqui.cli.APIClient": MagicMock(return_value=api),
+                "builtins.print": print_mock,
+            },
+        ):
+            resqui()  # must not raise
+        printed = " ".join(str(c.args) for c in print_mock.call_args_list)
+        self.assertIn("resqui outbox flush", printed)
+        ((key, entry),) = self.outbox.entries()
+        self.assertEqual(entry["payload"], "{}")
+        self.assertEqual(entry["attempts"], 1)
+        self.assertEqual(entry["error"], "network error")
+
+    def test_missing_dashverse_token_is_handled(self):
         with self._patches():
             resqui()  # must not raise
+        self.assertEqual(self.outbox.entries(), [])
 
     def test_indicator_success_path(self):
         from resqui.core import CheckResult
@@ -301,6 +315,7 @@ class TestResquiMainPath(unittest.TestCase):
         mock_instance = MagicMock()
         mock_instance.has_license.return_value = result
         mock_class = MagicMock(return_value=mock_instance)
+        mock_class.indicators = ["has_license"]
         mock_class.name = "MockPlugin"
         mock_class.version = "0.1"
         mock_module = MagicMock()
@@ -317,7 +332,7 @@ class TestResquiMainPath(unittest.TestCase):
         }
         with self._patches(
             **{
-                "resqui.cli.importlib.import_module": MagicMock(
+                "resqui.plan.importlib.import_module": MagicMock(
                     return_value=mock_module
                 )
             }
@@ -327,6 +342,217 @@ class TestResquiMainPath(unittest.TestCase):
         mock_instance.has_license.assert_called_once()
         self.summary.add_indicator_result.assert_called_once()
 
+    def _mock_plugin_module(self):
+        from resqui.core import CheckResult
+
+        mock_instance = MagicMock()
+        mock_instance.has_license.return_value = CheckResult(success=True)
+        mock_instance.has_citation.return_value = CheckResult(success=True)
+        mock_class = MagicMock(return_value=mock_instance)
+        mock_class.indicators = ["has_license", "has_citation"]
+        mock_class.name = "MockPlugin"
+        mock_class.version = "0.1"
+        mock_module = MagicMock()
+        mock_module.MockPlugin = mock_class
+        self.config._cfg = {
+            "indicators": [
+                {"name": name, "plugin": "MockPlugin", "@id": name}
+                for name in ["has_license", "has_citation"]
+            ]
+        }
+        return mock_module, mock_instance
+
+    def test_finished_steps_are_journaled(self):
+        mock_module, mock_instance = self._mock_plugin_module()
+        self.summary.stream.return_value.close.side_effect = KeyboardInterrupt
+        with self._patches(
+            **{"resqui.plan.importlib.import_module": lambda name: mock_module}
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                resqui()
+        run_key = Journal.make_run_key(
+            self.config.digest, "https://github.com/user/repo", "a" * 40
+        )
+        steps = Journal(self.journal_file, run_key).load()
+        self.assertEqual(
+            steps,
+            {
+                "has_license/MockPlugin": [{"@type": "CheckResult"}],
+                "has_citation/MockPlugin": [{"@type": "CheckResult"}],
+            },
+        )
+
+    def test_resume_skips_finished_steps(self):
+        mock_module, mock_instance = self._mock_plugin_module()
+        run_key = Journal.make_run_key(
+            self.config.digest, "https://github.com/user/repo", "a" * 40
+        )
+        journal = Journal(self.journal_file, run_key)
+        journal.open()
+        journal.record("has_license/MockPlugin", [{"output": "journaled"}])
+        journal.close()
+        with self._patches(
+            argv=["resqui", "--resume"],
+            **{"resqui.plan.importlib.import_module": lambda name: mock_module},
+        ):
+            resqui()
+        mock_instance.has_license.assert_not_called()
+        mock_instance.has_citation.assert_called_once()
+        self.summary.add_check.assert_called_once_with({"output": "journaled"})
+        # The journal of a finished run is removed
+        self.assertFalse(os.path.exists(self.journal_file))
+
+    def test_journal_is_ignored_without_resume(self):
+        mock_module, mock_instance = self._mock_plugin_module()
+        run_key = Journal.make_run_key(
+            self.config.digest, "https://github.com/user/repo", "a" * 40
+        )
+        journal = Journal(self.journal_file, run_key)
+        journal.open()
+        journal.record("has_license/MockPlugin", [{"output": "journaled"}])
+        journal.close()
+        with self._patches(
+            **{"resqui.plan.importlib.import_module": lambda name: mock_module}
+        ):
+            resqui()
+        mock_instance.has_license.assert_called_once()
+        self.summary.add_check.assert_not_called()
+
+    def test_several_configurations_share_one_run(self):
+        mock_module, mock_instance = self._mock_plugin_module()
+        with patch("builtins.print"):
+            elixir, hsf = Configuration(), Configuration()
+        elixir.path, hsf.path = "profiles/elixir.json", "profiles/hsf.json"
+        elixir._cfg = {
+            "indicators": [
+                {"name": "has_license", "plugin": "MockPlugin", "@id": "e-license"},
+                {"name": "has_citation", "plugin": "MockPlugin", "@id": "citation"},
+            ]
+        }
+        hsf._cfg = {
+            "indicators": [
+                {"name": "has_license", "plugin": "MockPlugin", "@id": "h-license"}
+            ]
+        }
+        summaries = [MagicMock(), MagicMock()]
+        for summary in summaries:
+            summary.to_json.return_value = "{}"
+            summary.add_indicator_result.return_value = {"@type": "CheckResult"}
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        output_file = os.path.join(tmp_dir.name, "summary.json")
+        argv = ["resqui", "-c", elixir.path, "-c", hsf.path, "-o", output_file]
+        with self._patches(
+            argv=argv,
+            **{
+                "resqui.cli.Configuration": MagicMock(side_effect=[elixir, hsf]),
+                "resqui.cli.Summary": MagicMock(side_effect=summaries),
+                "resqui.cli.journal_path": journal_path,
+                # last, patch() imports the other targets with it
+                "resqui.plan.importlib.import_module": lambda name: mock_module,
+            },
+        ):
+            resqui()
+
+        mock_instance.has_license.assert_called_once()
+        mock_instance.has_citation.assert_called_once()
+        ids = [
+            [c.args[0]["@id"] for c in summary.add_indicator_result.call_args_list]
+            for summary in summaries
+        ]
+        self.assertEqual(ids, [["e-license", "citation"], ["h-license"]])
+        self.assertEqual(
+            [summary.stream.call_args.args[0] for summary in summaries],
+            [
+                os.path.join(tmp_dir.name, "summary.elixir.json"),
+                os.path.join(tmp_dir.name, "summary.hsf.json"),
+            ],
+        )
+        for summary in summaries:
+            summary.stream.return_value.close.assert_called_once()
+        self.assertEqual(os.listdir(tmp_dir.name), [])
+
+    def test_configurations_with_the_same_name_are_rejected(self):
+        with patch("builtins.print"):
+            first, second = Configuration(), Configuration()
+        first.path, second.path = "a/complete.json", "b/complete.json"
+        print_mock = MagicMock()
+        clone = MagicMock()
+        argv = ["resqui", "-c", first.path, "-c", second.path, "-o", "out.json"]
+        with self._patches(
+            argv=argv,
+            **{
+                "resqui.cli.Configuration": MagicMock(side_effect=[first, second]),
+                "resqui.cli.subprocess.run": clone,
+                "builtins.print": print_mock,
+            },
+        ):
+            with self.assertRaises(SystemExit) as cm:
+                resqui()
+        self.assertEqual(cm.exception.code, 1)
+        clone.assert_not_called()
+        self.summary.stream.assert_not_called()
+        print_mock.assert_any_call(
+            "Error: a/complete.json and b/complete.json would both be written to "
+            "out.complete.json; rename one of them"
+        )
+
+    def test_profiles_disagreeing_on_alternatives_run_all_providers(self):
+        from resqui.core import CheckResult
+
+        instances = {}
+        mock_module = MagicMock()
+        for plugin_name, name in [
+            ("Local", "software_has_license"),
+            ("Remote", "has_license"),
+        ]:
+            result = CheckResult(
+                status_id="schema:CompletedActionStatus", output=plugin_name
+            )
+            instances[plugin_name] = MagicMock()
+            getattr(instances[plugin_name], name).return_value = result
+            plugin_class = MagicMock(return_value=instances[plugin_name])
+            plugin_class.indicators = [name]
+            setattr(mock_module, plugin_name, plugin_class)
+
+        license_id = "https://example.com/license"
+        local = {"name": "software_has_license", "plugin": "Local", "@id": license_id}
+        remote = {"name": "has_license", "plugin": "Remote", "@id": license_id}
+        with patch("builtins.print"):
+            plain, fallback = Configuration(), Configuration()
+        plain.path, fallback.path = "profiles/plain.json", "profiles/fallback.json"
+        plain._cfg = {"indicators": [local, remote]}
+        fallback._cfg = {
+            "alternatives": {license_id: "fallback"},
+            "indicators": [remote, local],
+        }
+        summaries = [MagicMock(), MagicMock()]
+        for summary in summaries:
+            summary.to_json.return_value = "{}"
+            summary.add_indicator_result.return_value = {"@type": "CheckResult"}
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        output_file = os.path.join(tmp_dir.name, "summary.json")
+        argv = ["resqui", "-c", plain.path, "-c", fallback.path, "-o", output_file]
+        with self._patches(
+            argv=argv,
+            **{
+                "resqui.cli.Configuration": MagicMock(side_effect=[plain, fallback]),
+                "resqui.cli.Summary": MagicMock(side_effect=summaries),
+                "resqui.cli.journal_path": journal_path,
+                "resqui.plan.importlib.import_module": lambda name: mock_module,
+            },
+        ):
+            resqui()
+
+        instances["Local"].software_has_license.assert_called_once()
+        instances["Remote"].has_license.assert_called_once()
+        outputs = [
+            [c.args[2].output for c in summary.add_indicator_result.call_args_list]
+            for summary in summaries
+        ]
+        self.assertEqual(outputs, [["Local", "Remote"], ["Remote"]])
+
     def test_indicator_verbose_output(self):
         from resqui.core import CheckResult
 
@@ -340,6 +566,7 @@ class TestResquiMainPath(unittest.TestCase):
         mock_instance = MagicMock()
         mock_instance.has_license.return_value = result
         mock_class = MagicMock(return_value=mock_instance)
+        mock_class.indicators = ["has_license"]
         mock_class.name = "MockPlugin"
         mock_class.version = "0.1"
         mock_module = MagicMock()
@@ -357,7 +584,7 @@ class TestResquiMainPath(unittest.TestCase):
         with self._patches(
             argv=["resqui", "-v"],
             **{
-                "resqui.cli.importlib.import_module": MagicMock(
+                "resqui.plan.importlib.import_module": MagicMock(
                     return_value=mock_module
                 )
             },
@@ -370,6 +597,7 @@ class TestResquiMainPath(unittest.TestCase):
         from resqui.executors.base import ExecutorInitError
 
         mock_class = MagicMock(side_effect=ExecutorInitError("docker missing"))
+        mock_class.indicators = ["has_license"]
         mock_module = MagicMock()
         mock_module.BrokenPlugin = mock_class
 
@@ -384,7 +612,7 @@ class TestResquiMainPath(unittest.TestCase):
         }
         with self._patches(
             **{
-                "resqui.cli.importlib.import_module": MagicMock(
+                "resqui.plan.importlib.import_module": MagicMock(
                     return_value=mock_module
                 )
             }
@@ -393,13 +621,113 @@ class TestResquiMainPath(unittest.TestCase):
 
         self.summary.add_indicator_result.assert_not_called()
 
+    def test_alternative_providers_fall_back(self):
+        from resqui.core import CheckResult
+
+        broken_instance = MagicMock()
+        broken_instance.has_license.side_effect = RuntimeError("rate limited")
+        broken_class = MagicMock(return_value=broken_instance)
+        broken_class.indicators = ["has_license"]
+        result = CheckResult(status_id="schema:CompletedActionStatus", success=True)
+        local_instance = MagicMock()
+        local_instance.software_has_license.return_value = result
+        local_class = MagicMock(return_value=local_instance)
+        local_class.indicators = ["software_has_license"]
+        mock_module = MagicMock()
+        mock_module.Broken = broken_class
+        mock_module.Local = local_class
+
+        license_id = "https://example.com/license"
+        self.config._cfg = {
+            "alternatives": {license_id: "fallback"},
+            "indicators": [
+                {"name": "has_license", "plugin": "Broken", "@id": license_id},
+                {"name": "software_has_license", "plugin": "Local", "@id": license_id},
+            ],
+        }
+        with self._patches(
+            **{
+                "resqui.plan.importlib.import_module": MagicMock(
+                    return_value=mock_module
+                )
+            }
+        ):
+            resqui()
+
+        self.summary.add_indicator_result.assert_called_once_with(
+            self.config._cfg["indicators"][1], local_class, result
+        )
+
+    def test_deadline_skips_expensive_indicators(self):
+        from resqui.core import CheckResult
+
+        result = CheckResult(status_id="schema:CompletedActionStatus", success=True)
+        mock_instance = MagicMock()
+        mock_instance.cheap.return_value = result
+        mock_class = MagicMock(return_value=mock_instance)
+        mock_class.indicators = ["cheap"]
+        # Both indicators of the scanner need its expensive report
+        scanner_instance = MagicMock()
+        scanner_class = MagicMock(return_value=scanner_instance)
+        scanner_class.indicators = ["quick", "expensive"]
+        mock_module = MagicMock()
+        mock_module.MockPlugin = mock_class
+        mock_module.Scanner = scanner_class
+
+        self.history.record("Scanner.indicators", 3600)
+        self.config._cfg = {
+            "indicators": [
+                {"name": "quick", "plugin": "Scanner", "@id": "missing"},
+                {"name": "expensive", "plugin": "Scanner", "@id": "missing"},
+                {"name": "cheap", "plugin": "MockPlugin", "@id": "missing"},
+            ]
+        }
+        with self._patches(
+            argv=["resqui", "--deadline", "10m"],
+            **{
+                "resqui.plan.importlib.import_module": MagicMock(
+                    return_value=mock_module
+                )
+            },
+        ):
+            resqui()
+
+        scanner_instance.quick.assert_not_called()
+        scanner_instance.expensive.assert_not_called()
+        recorded = [c.args for c in self.summary.add_indicator_result.call_args_list]
+        self.assertEqual(
+            [r[0]["name"] for r in recorded], ["cheap", "quick", "expensive"]
+        )
+        self.assertEqual(recorded[1][2].output, "skipped")
+        self.assertEqual(recorded[2][2].status_id, "schema:PotentialActionStatus")
+        # The timings of this run are stored for the next one.
+        self.assertTrue(os.path.exists(self.history.path))
+        self.assertIsNotNone(self.history.estimate("MockPlugin.indicators"))
+        self.assertEqual(self.history.durations["Scanner.indicators"], [3600])
+
+    def test_trace_is_written(self):
+        from resqui.trace import tracer
+
+        self.addCleanup(setattr, tracer, "enabled", False)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            trace_file = os.path.join(tmp_dir, "trace.json")
+            with self._patches(
+                argv=["resqui", "--trace", trace_file, "-d", "tok-123"],
+                **{"resqui.cli.APIClient": MagicMock()},
+            ):
+                resqui()
+            with open(trace_file) as f:
+                names = {e["name"] for e in json.load(f)["traceEvents"]}
+            self.assertTrue({"metadata", "summary.write", "summary.upload"} <= names)
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, "trace.timings.json")))
+
     def test_clone_url_path(self):
         with self._patches(
             argv=["resqui", "-u", "https://github.com/user/repo"],
             **{"resqui.cli.subprocess.run": MagicMock()},
         ):
             resqui()
-        self.summary.write.assert_called_once()
+        self.summary.stream.return_value.close.assert_called_once()
 
     def test_clone_failure_propagates(self):
         import subprocess as sp
@@ -416,60 +744,110 @@ class TestResquiMainPath(unittest.TestCase):
                 resqui()
 
     def test_clone_zenodo_url_path(self):
-        def mock_requests_get(url, headers=None):
-            if url == "https://doi.org/10.5281/zenodo.18713816":
-                mock_response = MagicMock()
-                mock_response.headers = {
-                    "Link": '<https://zenodo.org/api/records/20553350> ; rel="describedby" ; type="application/json"'
-                }
-                return mock_response
-
-            elif (
-                url == "https://zenodo.org/api/records/20553350"
-                and headers.get("Accept") == "application/json"
-            ):
-                mock_response = MagicMock()
-                mock_response.json.return_value = {
-                    "metadata": {
-                        "related_identifiers": [
-                            {
-                                "identifier": "https://github.com/EVERSE-ResearchSoftware/QualityPipelines/tree/v0.2.0",
-                                "relation": "isSupplementTo",
-                                "resource_type": "software",
-                                "scheme": "url",
-                            }
-                        ]
-                    }
+        def head(url, **kwargs):
+            self.assertEqual(url, "https://doi.org/10.5281/zenodo.18713816")
+            mock_response = MagicMock()
+            mock_response.headers = {
+                "Link": '<https://zenodo.org/api/records/20553350> ; rel="describedby" ; type="application/json"'
+            }
+            return mock_response
+
+        def get(url, headers=None, **kwargs):
+            self.assertEqual(url, "https://zenodo.org/api/records/20553350")
+            self.assertEqual(headers.get("Accept"), "application/json")
+            mock_response = MagicMock(status_code=200, headers={})
+            mock_response.json.return_value = {
+                "metadata": {
+                    "related_identifiers": [
+                        {
+                            "identifier": "https://github.com/EVERSE-ResearchSoftware/QualityPipelines/tree/v0.2.0",
+                            "relation": "isSupplementTo",
+                            "resource_type": "software",
+                            "scheme": "url",
+                        }
+                    ]
                 }
-                return mock_response
-
-            else:
-                raise ValueError(f"Unsupported URL '{url}' and headers '{headers}'")
-
+            }
+            return mock_response
+
+        session = MagicMock()
+        session.head.side_effect = head
+        session.get.side_effect = get
+        clone = MagicMock()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
         with self._patches(
             argv=["resqui", "-u", "https://doi.org/10.5281/zenodo.18713816"],
             **{
-                "requests.get": MagicMock(side_effect=mock_requests_get),
-                "resqui.cli.subprocess.run": MagicMock(),
+                "resqui.zenodo.ZenodoResolver.make_session": MagicMock(
+                    return_value=session
+                ),
+                "resqui.cli.subprocess.run": clone,
             },
         ):
+            os.environ["XDG_CACHE_HOME"] = tmp_dir.name
             resqui()
-        self.summary.write.assert_called_once()
+        self.assertEqual(
+            clone.call_args.args[0][2],
+            "https://github.com/EVERSE-ResearchSoftware/QualityPipelines",
+        )
+        self.summary.stream.return_value.close.assert_called_once()
+
+    def test_unresolvable_zenodo_url_exits(self):
+        with self._patches(
+            argv=["resqui", "-u", "https://zenodo.org/records/1"],
+            **{
+                "resqui.cli.zenodo_url_to_git": MagicMock(
+                    side_effect=ValueError("No Git repository found for Zenodo URL")
+                ),
+                "resqui.cli.subprocess.run": MagicMock(),
+            },
+        ):
+            with self.assertRaises(SystemExit) as cm:
+                resqui()
+        self.assertEqual(cm.exception.code, 1)
 
 
-class TestPrintIndicatorPluginsNoIndicators(unittest.TestCase):
+class TestPrintIndicatorPluginsNoIndicators(TestCase):
     """Cover the '(none)' branch for a plugin that declares no indicators."""
 
     def test_plugin_with_no_indicators_prints_none(self):
-        from resqui.plugins.base import IndicatorPlugin
-
-        class EmptyPlugin(IndicatorPlugin):
-            name = "empty"
-            version = "0"
-            id = "empty"
-            indicators = []
+        from resqui.plugins import PluginInfo
 
+        empty = PluginInfo("EmptyPlugin", "empty", "empty", "0", "empty")
         buf = io.StringIO()
-        with patch("sys.stdout", buf):
+        with patch("sys.stdout", buf), patch(
+            "resqui.cli.plugin_registry", return_value={"EmptyPlugin": empty}
+        ):
             print_indicator_plugins()
         self.assertIn("(none)", buf.getvalue())
+
+
+class TestManageOutbox(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.outbox = Outbox(os.path.join(tmp_dir.name, "outbox"))
+        patcher = patch("resqui.cli.Outbox", return_value=self.outbox)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_status_lists_pending_summaries(self):
+        key = self.outbox.add('{"a": 1}')
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            self.assertEqual(manage_outbox(flush=False), 0)
+        self.assertIn("1 summaries pending", stdout.getvalue())
+        self.assertIn(key[:12], stdout.getvalue())
+
+    def test_flush_uploads_even_in_backoff(self):
+        self.outbox.add('{"a": 1}')
+        api = MagicMock()
+        api.post.side_effect = [APIError("down", 503), None]
+        with patch("resqui.cli.APIClient", return_value=api), patch("builtins.print"):
+            self.assertEqual(manage_outbox(flush=True, dashverse_token="tok"), 1)
+            self.assertEqual(manage_outbox(flush=True, dashverse_token="tok"), 0)
+        self.assertEqual(self.outbox.entries(), [])
+
+    def test_flush_without_token(self):
+        with patch.dict("os.environ", {}, clear=True), patch("builtins.print"):
+            self.assertEqual(manage_outbox(flush=True), 1)
@@ -1,13 +1,14 @@
 import json
 import tempfile
-import unittest
 from unittest.mock import patch
 import io  # noqa: F401
 
-from resqui.config import Configuration, DEFAULT_CONFIG
+from resqui.config import Configuration, DEFAULT_CONFIG, merge_configurations
 
+from helpers import TestCase
 
-class TestConfigurationDefaults(unittest.TestCase):
+
+class TestConfigurationDefaults(TestCase):
     def test_loads_default_config_when_no_filepath(self):
         with patch("builtins.print"):
             cfg = Configuration()
@@ -30,7 +31,7 @@ class TestConfigurationDefaults(unittest.TestCase):
                 self.assertIn("@id", indicator)
 
 
-class TestConfigurationFromFile(unittest.TestCase):
+class TestConfigurationFromFile(TestCase):
     def _write_config(self, data):
         with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
             json.dump(data, f)
@@ -43,9 +44,133 @@ class TestConfigurationFromFile(unittest.TestCase):
             cfg = Configuration(filepath=path)
         self.assertEqual(cfg._cfg, custom)
 
+    def test_digest_ignores_key_order(self):
+        a = self._write_config({"timeout": "1h", "indicators": []})
+        b = self._write_config({"indicators": [], "timeout": "1h"})
+        c = self._write_config({"indicators": [], "timeout": "2h"})
+        with patch("builtins.print"):
+            digests = [Configuration(filepath=p).digest for p in (a, b, c)]
+        self.assertEqual(digests[0], digests[1])
+        self.assertNotEqual(digests[0], digests[2])
+
     def test_file_overrides_defaults(self):
         custom = {"indicators": []}
         path = self._write_config(custom)
         with patch("builtins.print"):
             cfg = Configuration(filepath=path)
         self.assertEqual(cfg._cfg["indicators"], [])
+
+
+class TestConfigurationTimeouts(TestCase):
+    def _config(self, cfg):
+        with patch("builtins.print"):
+            configuration = Configuration()
+        configuration._cfg = cfg
+        return configuration
+
+    def test_no_timeouts_by_default(self):
+        configuration = self._config({"indicators": []})
+        self.assertIsNone(configuration.timeout)
+        self.assertIsNone(
+            configuration.indicator_timeout({"name": "x", "plugin": "Gitleaks"})
+        )
+
+    def test_run_timeout(self):
+        self.assertEqual(self._config({"timeout": "1h"}).timeout, 3600)
+
+    def test_indicator_and_plugin_timeouts(self):
+        configuration = self._config({"plugins": {"SuperLinter": {"timeout": "15m"}}})
+        indicator = {"name": "has_no_linting_issues", "plugin": "SuperLinter"}
+        self.assertEqual(configuration.plugin_timeout("SuperLinter"), 900)
+        # The plugin's budget is applied by the runner
+        self.assertIsNone(configuration.indicator_timeout(indicator))
+        self.assertEqual(
+            configuration.indicator_timeout({**indicator, "timeout": 60}), 60
+        )
+
+
+class TestMergeConfigurations(TestCase):
+    def _config(self, cfg):
+        with patch("builtins.print"):
+            configuration = Configuration()
+        configuration._cfg = cfg
+        return configuration
+
+    def test_union_of_indicators_runs_each_pair_once(self):
+        elixir = self._config(
+            {
+                "timeout": "1h",
+                "plugins": {"RSFC": {"timeout": "5m"}},
+                "indicators": [
+                    {"name": "has_license", "plugin": "RSFC", "@id": "elixir"},
+                    {"name": "has_tests", "plugin": "RSFC", "@id": "tests"},
+                ],
+            }
+        )
+        hsf = self._config(
+            {
+                "timeout": "2h",
+                "plugins": {"RSFC": {"timeout": "1m"}, "Gitleaks": {"timeout": "2m"}},
+                "indicators": [
+                    {"name": "has_license", "plugin": "RSFC", "@id": "hsf"},
+                    {"name": "has_leaks", "plugin": "Gitleaks", "@id": "leaks"},
+                ],
+            }
+        )
+        merged = merge_configurations([elixir, hsf])
+        self.assertEqual(
+            [i["@id"] for i in merged._cfg["indicators"]], ["elixir", "tests", "leaks"]
+        )
+        self.assertEqual(merged.timeout, 3600)
+        self.assertEqual(merged.plugin_timeout("RSFC"), 300)
+        self.assertEqual(merged.plugin_timeout("Gitleaks"), 120)
+
+    def test_alternatives_are_kept_if_all_profiles_agree(self):
+        indicators = [
+            {"name": "software_has_license", "plugin": "RepoFiles", "@id": "license"},
+            {"name": "has_license", "plugin": "HowFairIs", "@id": "license"},
+        ]
+        plain = self._config({"indicators": indicators})
+        fallback = self._config(
+            {"alternatives": {"license": "fallback"}, "indicators": indicators}
+        )
+        race = self._config(
+            {"alternatives": {"license": "race"}, "indicators": indicators}
+        )
+        cases = [
+            ([fallback, fallback], "fallback"),
+            ([plain, fallback], "all"),
+            ([fallback, plain], "all"),
+            ([fallback, race], "all"),
+            ([plain, plain], None),
+        ]
+        for configurations, mode in cases:
+            merged = merge_configurations(configurations)
+            self.assertEqual(merged.alternatives_mode("license"), mode)
+
+        # A profile not listing the @id does not decide its mode
+        other = self._config(
+            {
+                "alternatives": {"license": "race"},
+                "indicators": [{"name": "has_tests", "plugin": "RSFC", "@id": "tests"}],
+            }
+        )
+        merged = merge_configurations([other, plain])
+        self.assertIsNone(merged.alternatives_mode("license"))
+
+    def test_indicators_for_returns_one_per_id(self):
+        configuration = self._config(
+            {
+                "indicators": [
+                    {"name": "has_license", "plugin": "RSFC", "@id": "a"},
+                    {"name": "has_license", "plugin": "RSFC", "@id": "a"},
+                    {"name": "has_license", "plugin": "RSFC", "@id": "b"},
+                    {"name": "has_license", "plugin": "HowFairIs", "@id": "a"},
+                ]
+            }
+        )
+        self.assertEqual(
+            [i["@id"] for i in configuration.indicators_for("RSFC", "has_license")],
+            ["a", "b"],
+        )
+        self.assertEqual(configuration.indicators_for("RSFC", "has_tests"), [])
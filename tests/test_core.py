@@ -1,12 +1,15 @@
 import json
+import os
 import tempfile
-import unittest
 from unittest.mock import MagicMock, patch
 
+from resqui.api import UploadResult
 from resqui.core import CheckResult, Context, Summary
 
+from helpers import TestCase
 
-class TestCheckResult(unittest.TestCase):
+
+class TestCheckResult(TestCase):
     def test_defaults(self):
         r = CheckResult()
         self.assertEqual(r.process, "Undefined process")
@@ -34,7 +37,7 @@ class TestCheckResult(unittest.TestCase):
         self.assertTrue(r.success)
 
 
-class TestContext(unittest.TestCase):
+class TestContext(TestCase):
     def test_defaults_are_none(self):
         ctx = Context()
         self.assertIsNone(ctx.github_token)
@@ -46,7 +49,7 @@ class TestContext(unittest.TestCase):
         self.assertEqual(ctx.dashverse_token, "dv-xyz")
 
 
-class TestSummary(unittest.TestCase):
+class TestSummary(TestCase):
     def _make_summary(self, **kwargs):
         defaults = dict(
             author="Alice",
@@ -134,3 +137,70 @@ class TestSummary(unittest.TestCase):
             mock_api.post.assert_called_once()
             payload = json.loads(mock_api.post.call_args[0][0])
             self.assertEqual(payload["@type"], "SoftwareQualityAssessment")
+
+    def test_upload_all_uses_batches(self):
+        summaries = [self._make_summary(), self._make_summary()]
+        with patch("resqui.core.APIClient") as MockAPIClient:
+            mock_api = MagicMock()
+            mock_api.post_many.side_effect = lambda payloads, max_workers: [
+                UploadResult(i, True) for i in range(len(payloads))
+            ]
+            MockAPIClient.return_value = mock_api
+            results = Summary.upload_all(summaries, "tok-123", max_items=1)
+            MockAPIClient.assert_called_once_with("tok-123")
+            self.assertEqual(mock_api.post_many.call_count, 2)
+            self.assertEqual([r.index for r in results], [0, 1])
+            payload = json.loads(mock_api.post_many.call_args[0][0][0])
+            self.assertEqual(payload["@type"], "SoftwareQualityAssessment")
+
+
+class TestSummaryWriter(TestCase):
+    def setUp(self):
+        self.summary = Summary(
+            "Alice", "alice@example.com", "myproject", "url", "1.0.0", "main"
+        )
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "summary.json")
+        patcher = patch("resqui.core.datetime")
+        patcher.start().now.return_value = "2025-01-01 00:00:00"
+        self.addCleanup(patcher.stop)
+
+    def _add_check(self, i):
+        plugin = MagicMock()
+        plugin.name, plugin.version = "Plugin", "1.0"
+        result = CheckResult(output=f"out {i}", evidence="évidence\n" * 100)
+        self.summary.add_indicator_result({"@id": f"ind-{i}"}, plugin, result)
+
+    def _read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_file_is_valid_after_every_check(self):
+        with self.summary.stream(self.path):
+            self.assertEqual(json.loads(self._read())["checks"], [])
+            for i in range(3):
+                self._add_check(i)
+                checks = json.loads(self._read())["checks"]
+                self.assertEqual(
+                    [c["output"] for c in checks], ["out 0", "out 1", "out 2"][: i + 1]
+                )
+        self._add_check(3)  # not written after closing
+        self.assertEqual(len(json.loads(self._read())["checks"]), 3)
+
+    def test_output_matches_to_json(self):
+        self._add_check(0)
+        with self.summary.stream(self.path):
+            self._add_check(1)
+        self.assertEqual(self._read(), self.summary.to_json())
+        self.summary.write(self.path, compact=True)
+        self.assertEqual(self._read(), self.summary.to_json(indent=None))
+        self.assertNotIn("\n", self._read())
+
+    def test_compact_output_without_orjson(self):
+        self._add_check(0)
+        expected = self.summary.to_json(indent=None)
+        with patch("resqui.core.orjson", None):
+            self.assertEqual(self.summary.to_json(indent=None), expected)
+            self.summary.write(self.path, compact=True)
+        self.assertEqual(json.loads(self._read()), json.loads(expected))
@@ -1,8 +1,17 @@
-import unittest
-from resqui.executors import PythonExecutor, DockerExecutor
+import subprocess
+import threading
+from unittest.mock import patch
 
+from resqui.executors import (
+    PythonExecutor,
+    DockerExecutor,
+    ExecutorInitError,
+)
 
-class TestPythonExecutor(unittest.TestCase):
+from helpers import TestCase
+
+
+class TestPythonExecutor(TestCase):
     def test_install_a_package_on_init(self):
         pe = PythonExecutor(packages=["ansi2txt"])
         self.assertTrue(pe.is_installed("ansi2txt"))
@@ -22,14 +31,48 @@ class TestPythonExecutor(unittest.TestCase):
         out = pe.execute("print('narf')")
         self.assertEqual(out.stdout.strip(), "narf")
 
+    def test_cancel_kills_running_script(self):
+        pe = PythonExecutor()
+        threading.Timer(0.5, pe.cancel).start()
+        out = pe.execute("import time; time.sleep(10)")
+        self.assertNotEqual(out.returncode, 0)
+        self.assertEqual(pe._running, set())
+
     def test_execute_script_which_uses_installed_package(self):
         pe = PythonExecutor(["ansi2txt==0.2.0"])
         out = pe.execute("import ansi2txt; ansi2txt.putchar('a')")
         self.assertEqual(out.stdout.strip(), "a")
 
 
-class TestDockerExecutor(unittest.TestCase):
+class TestDockerExecutor(TestCase):
     def test_docker_executor(self):
         de = DockerExecutor("hello-world")
         out = de.run([])
         self.assertIn("installation appears to be working correctly", out.stdout)
+
+    def test_missing_docker_is_an_init_error(self):
+        with patch(
+            "resqui.executors.docker.subprocess.run",
+            side_effect=FileNotFoundError("docker"),
+        ):
+            with self.assertRaises(ExecutorInitError):
+                DockerExecutor("hello-world")
+
+    def test_named_container_is_killed_on_cancel(self):
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            if cmd[:2] == ["docker", "run"]:
+                de.cancel()
+                return subprocess.CompletedProcess(cmd, 137, "", "")
+
+        with patch("resqui.executors.docker.subprocess.run", side_effect=fake_run):
+            de = DockerExecutor("hello-world")
+            de.run(["sleep", "100"], run_args=["--rm"])
+
+        run_cmd = calls[1]
+        name = run_cmd[run_cmd.index("--name") + 1]
+        self.assertEqual(run_cmd[-3:], ["hello-world", "sleep", "100"])
+        self.assertEqual(calls[2], ["docker", "kill", name])
+        self.assertEqual(de._running, set())
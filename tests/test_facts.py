@@ -0,0 +1,115 @@
+import tempfile
+from unittest.mock import patch
+
+from resqui import facts
+from resqui.facts import RepoFacts, repo_facts
+
+from helpers import TestCase, git, make_repo
+
+
+FILES = [
+    "LICENSE",
+    "README.md",
+    "CITATION.cff",
+    ".github/CONTRIBUTING.md",
+    ".github/workflows/test.yml",
+    ".gitlab-ci.yml",
+    "docker/Dockerfile",
+    "pyproject.toml",
+    "src/pkg/__init__.py",
+    "src/pkg/core.py",
+    "src/pkg/requirements.txt",
+    "tests/test_core.py",
+    "cmd/main_test.go",
+]
+
+
+class TestRepoFacts(TestCase):
+    def setUp(self):
+        self.facts = RepoFacts("0" * 40, FILES)
+
+    def test_root_files(self):
+        self.assertEqual(
+            self.facts.root_files,
+            [
+                ".gitlab-ci.yml",
+                "CITATION.cff",
+                "LICENSE",
+                "README.md",
+                "pyproject.toml",
+            ],
+        )
+
+    def test_is_file_and_is_dir(self):
+        self.assertTrue(self.facts.is_file("src/pkg/core.py"))
+        self.assertFalse(self.facts.is_file("src/pkg"))
+        self.assertTrue(self.facts.is_dir("src/pkg"))
+        self.assertTrue(self.facts.is_dir("src/"))
+        self.assertFalse(self.facts.is_dir("docs"))
+
+    def test_named_is_case_insensitive(self):
+        self.assertEqual(self.facts.named("license"), ["LICENSE"])
+        self.assertEqual(self.facts.named("core.py", dirs={""}), [])
+
+    def test_glob(self):
+        self.assertEqual(
+            self.facts.glob("src/*/*.py"), ["src/pkg/__init__.py", "src/pkg/core.py"]
+        )
+        self.assertEqual(
+            self.facts.glob("dockerfile", basename=True), ["docker/Dockerfile"]
+        )
+
+    def test_license_and_citation(self):
+        self.assertEqual(self.facts.license_files, ["LICENSE"])
+        self.assertEqual(self.facts.citation_files, ["CITATION.cff"])
+
+    def test_contribution_guidelines(self):
+        self.assertEqual(
+            self.facts.contribution_guidelines, [".github/CONTRIBUTING.md"]
+        )
+
+    def test_container_files(self):
+        self.assertEqual(self.facts.container_files, ["docker/Dockerfile"])
+
+    def test_test_paths(self):
+        self.assertEqual(
+            self.facts.test_paths, ["tests", "cmd/main_test.go", "tests/test_core.py"]
+        )
+
+    def test_ci_workflows(self):
+        self.assertEqual(
+            self.facts.ci_workflows, [".github/workflows/test.yml", ".gitlab-ci.yml"]
+        )
+
+    def test_requirements_files_only_in_root(self):
+        self.assertEqual(self.facts.requirements_files, ["pyproject.toml"])
+
+    def test_empty_repository(self):
+        empty = RepoFacts("0" * 40, [])
+        self.assertEqual(empty.license_files, [])
+        self.assertEqual(empty.test_paths, [])
+
+
+class TestRepoFactsFromGit(TestCase):
+    def setUp(self):
+        self.repo = tempfile.mkdtemp()
+        make_repo(self.repo, {"LICENSE": "x\n", "tests/test_a.py": "x\n"})
+
+    def test_scans_commit_tree(self):
+        with patch.dict(facts._cache, clear=True):
+            result = repo_facts(self.repo, "HEAD")
+        self.assertEqual(result.tree, git(self.repo, "rev-parse", "HEAD^{tree}"))
+        self.assertEqual(result.files, {"LICENSE", "tests/test_a.py"})
+
+    def test_unknown_ref_returns_none(self):
+        self.assertIsNone(repo_facts(self.repo, "no-such-branch"))
+
+    def test_scans_are_cached_by_tree_hash(self):
+        # An empty commit shares the tree of its parent.
+        git(self.repo, "commit", "--allow-empty", "-m", "Empty commit")
+        with patch.dict(facts._cache, clear=True):
+            first = repo_facts(self.repo, "HEAD")
+            with patch("resqui.facts.ls_tree") as ls_tree:
+                second = repo_facts(self.repo, "HEAD~1")
+        ls_tree.assert_not_called()
+        self.assertIs(first, second)
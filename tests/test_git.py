@@ -0,0 +1,37 @@
+import tempfile
+
+from resqui.git import ls_tree, resolve_commit
+
+from helpers import TestCase, commit_files, git, make_repo
+
+
+class TestLocalGit(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.repo_dir = tempfile.mkdtemp()
+        make_repo(cls.repo_dir, {"README.md": "hello\n"})
+        git(cls.repo_dir, "tag", "v1.0.0")
+        commit_files(cls.repo_dir, {"LICENSE": "MIT\n", "src/main.py": "pass\n"})
+
+    def test_resolve_head(self):
+        commit = resolve_commit(self.repo_dir, "HEAD")
+        self.assertEqual(len(commit), 40)
+
+    def test_resolve_tag(self):
+        self.assertNotEqual(
+            resolve_commit(self.repo_dir, "v1.0.0"),
+            resolve_commit(self.repo_dir, "HEAD"),
+        )
+
+    def test_resolve_unknown_ref_returns_none(self):
+        self.assertIsNone(resolve_commit(self.repo_dir, "no-such-branch"))
+
+    def test_ls_tree_lists_root_entries(self):
+        entries = ls_tree(self.repo_dir, resolve_commit(self.repo_dir, "HEAD"))
+        self.assertEqual(entries["LICENSE"], "blob")
+        self.assertEqual(entries["src"], "tree")
+        self.assertNotIn("src/main.py", entries)
+
+    def test_ls_tree_of_older_commit(self):
+        entries = ls_tree(self.repo_dir, resolve_commit(self.repo_dir, "v1.0.0"))
+        self.assertEqual(list(entries), ["README.md"])
@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+from resqui.journal import Journal, journal_path, step_key
+
+from helpers import TestCase
+
+
+class TestJournal(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = journal_path(os.path.join(tmp_dir.name, "summary.json"))
+        self.run_key = Journal.make_run_key("config", "https://example.com", "abc")
+
+    def _journal(self, run_key=None):
+        journal = Journal(self.path, run_key or self.run_key)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_step_key(self):
+        indicators = [
+            {"name": "has_license", "plugin": "HowFairIs"},
+            {"name": "has_license", "plugin": "RepoFiles"},
+        ]
+        self.assertEqual(step_key(None, indicators[:1]), "has_license/HowFairIs")
+        self.assertEqual(
+            step_key("race", indicators), "has_license/HowFairIs|RepoFiles (race)"
+        )
+
+    def test_records_are_resumed(self):
+        journal = self._journal()
+        self.assertEqual(journal.open(), {})
+        journal.record("a/P", [{"output": 1}])
+        journal.record("b/P", [])
+        journal.close()
+
+        journal = self._journal()
+        steps = journal.open(resume=True)
+        self.assertEqual(steps, {"a/P": [{"output": 1}], "b/P": []})
+        journal.record("c/P", [{"output": 3}])
+        journal.close()
+        self.assertEqual(len(self._journal().load()), 3)
+
+    def test_open_without_resume_starts_empty(self):
+        journal = self._journal()
+        journal.open()
+        journal.record("a/P", [])
+        journal.close()
+        journal = self._journal()
+        self.assertEqual(journal.open(), {})
+        journal.close()
+        self.assertEqual(journal.load(), {})
+
+    def test_journal_of_other_run_is_discarded(self):
+        journal = self._journal()
+        journal.open()
+        journal.record("a/P", [])
+        journal.close()
+        other_key = Journal.make_run_key("config", "https://example.com", "def")
+        self.assertEqual(self._journal(other_key).open(resume=True), {})
+
+    def test_truncated_record_is_ignored(self):
+        journal = self._journal()
+        journal.open()
+        journal.record("a/P", [])
+        journal.record("b/P", [])
+        journal.close()
+        with open(self.path, "r+") as f:
+            f.truncate(os.path.getsize(self.path) - 5)
+        self.assertEqual(self._journal().load(), {"a/P": []})
+
+    def test_remove(self):
+        journal = self._journal()
+        journal.open()
+        journal.remove()
+        self.assertFalse(os.path.exists(self.path))
+        journal.remove()  # no error if it is gone
@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+from resqui.api import APIError, UploadResult
+from resqui.outbox import Outbox, OutboxFlusher
+
+from helpers import TestCase
+
+
+def batch_results(*oks):
+    return lambda payloads, max_workers: [
+        UploadResult(i, ok) for i, ok in enumerate(oks)
+    ]
+
+
+def all_ok(payloads, max_workers):
+    return [UploadResult(i, True) for i in range(len(payloads))]
+
+
+class TestOutbox(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.outbox = Outbox(os.path.join(self.tmp_dir.name, "outbox"))
+
+    def test_add_writes_one_file_per_summary(self):
+        key = self.outbox.add('{"a": 1}')
+        self.assertEqual(key, Outbox.key('{"a": 1}'))
+        with open(os.path.join(self.outbox.path, f"{key}.json")) as f:
+            self.assertEqual(json.load(f)["payload"], '{"a": 1}')
+        self.assertEqual(os.listdir(self.outbox.path), [f"{key}.json"])
+
+    def test_add_deduplicates_pending_and_sent_summaries(self):
+        self.assertIsNotNone(self.outbox.add('{"a": 1}'))
+        self.assertIsNone(self.outbox.add('{"a": 1}'))
+        self.outbox.flush(MagicMock())
+        self.assertIsNone(self.outbox.add('{"a": 1}'))
+        self.assertIsNotNone(self.outbox.add('{"a": 2}'))
+
+    def test_add_deduplicates_summaries_of_other_runs(self):
+        first = json.dumps({"dateCreated": "2026-01-01 10:00:00", "checks": [1]})
+        again = json.dumps({"checks": [1], "dateCreated": "2026-01-02 10:00:00"})
+        self.assertIsNotNone(self.outbox.add(first))
+        self.assertIsNone(self.outbox.add(again))
+        self.outbox.flush(MagicMock())
+        self.assertIsNone(self.outbox.add(again))
+        self.assertIsNotNone(self.outbox.add(json.dumps({"checks": [2]})))
+
+    def test_flush_single_summary(self):
+        key = self.outbox.add('{"a": 1}')
+        api = MagicMock()
+        self.assertEqual(self.outbox.flush(api), ([key], []))
+        api.post.assert_called_once_with('{"a": 1}')
+        api.post_many.assert_not_called()
+        self.assertEqual(self.outbox.entries(), [])
+
+    def test_flush_several_summaries_in_batches(self):
+        keys = [self.outbox.add(f'{{"a": {i}}}') for i in range(3)]
+        api = MagicMock()
+        api.post_many.side_effect = batch_results(True, False, True)
+        sent, failed = self.outbox.flush(api)
+        self.assertEqual(sorted(sent + failed), sorted(keys))
+        self.assertEqual(len(failed), 1)
+        self.assertEqual([key for key, _ in self.outbox.entries()], failed)
+
+    def test_failed_upload_backs_off(self):
+        key = self.outbox.add('{"a": 1}')
+        api = MagicMock()
+        api.post.side_effect = APIError("Request failed with 503", 503)
+        self.assertEqual(self.outbox.flush(api), ([], [key]))
+        entry = self.outbox.entry(key)
+        self.assertEqual(entry["attempts"], 1)
+        self.assertEqual(entry["error"], "Request failed with 503")
+        self.assertGreater(entry["next_attempt"], time.time() + 30)
+
+        self.assertEqual(self.outbox.flush(api), ([], []))
+        self.assertEqual(api.post.call_count, 1)
+        self.assertEqual(self.outbox.flush(api, force=True), ([], [key]))
+        self.assertEqual(self.outbox.entry(key)["attempts"], 2)
+
+    def test_sent_hashes_are_bounded(self):
+        api = MagicMock()
+        with patch.object(Outbox, "keep_sent", 2):
+            for i in range(3):
+                self.outbox.add(f'{{"a": {i}}}')
+                self.outbox.flush(api)
+        with open(os.path.join(self.outbox.path, "sent")) as f:
+            self.assertEqual(len(f.read().split()), 2)
+
+    def test_entries_are_uploaded_by_one_process(self):
+        keys = [self.outbox.add(f'{{"a": {i}}}') for i in range(3)]
+        other = Outbox(self.outbox.path)
+        other_api = MagicMock()
+        other_api.post_many.side_effect = all_ok
+
+        def post(payload):
+            # Another process flushes while this one uploads its first entry
+            self.assertIsNone(self.outbox.add(payload))
+            self.assertEqual(other.flush(other_api), (keys[1:], []))
+
+        api = MagicMock()
+        api.post.side_effect = post
+        with patch.object(self.outbox, "entries", return_value=other.entries()[:1]):
+            self.assertEqual(self.outbox.flush(api), (keys[:1], []))
+        self.assertEqual(other.flush(other_api), ([], []))
+        api.post.assert_called_once_with('{"a": 0}')
+        self.assertEqual(self.outbox.entries(), [])
+        self.assertEqual(os.listdir(os.path.join(self.outbox.path, "inflight")), [])
+
+    def test_claimed_entry_is_not_uploaded_again(self):
+        key = self.outbox.add('{"a": 1}')
+        entries = self.outbox.entries()
+        self.assertIsNotNone(self.outbox._claim(key))
+        self.assertEqual(self.outbox.entry(key)["payload"], '{"a": 1}')
+        api = MagicMock()
+        with patch.object(self.outbox, "entries", return_value=entries):
+            self.assertEqual(self.outbox.flush(api), ([], []))
+        api.post.assert_not_called()
+
+    def test_failed_upload_is_requeued(self):
+        key = self.outbox.add('{"a": 1}')
+        api = MagicMock()
+        api.post.side_effect = APIError("Request failed with 503", 503)
+        self.outbox.flush(api)
+        self.assertEqual([k for k, _ in self.outbox.entries()], [key])
+        self.assertEqual(os.listdir(os.path.join(self.outbox.path, "inflight")), [])
+
+    def test_stale_claims_are_released(self):
+        key = self.outbox.add('{"a": 1}')
+        self.outbox._claim(key)
+        api = MagicMock()
+        self.assertEqual(self.outbox.flush(api), ([], []))
+
+        path = os.path.join(self.outbox.path, "inflight", f"{key}.json")
+        claimed = time.time() - Outbox.claim_timeout - 1
+        os.utime(path, (claimed, claimed))
+        self.assertEqual(self.outbox.flush(api), ([key], []))
+        api.post.assert_called_once_with('{"a": 1}')
+
+    def test_missing_outbox_is_empty(self):
+        self.assertEqual(self.outbox.entries(), [])
+        self.assertEqual(self.outbox.flush(MagicMock()), ([], []))
+
+
+class TestOutboxFlusher(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.outbox = Outbox(os.path.join(self.tmp_dir.name, "outbox"))
+
+    def test_flushes_backlog_and_last_summary(self):
+        self.outbox.add('{"old": 1}')
+        api = MagicMock()
+        api.post_many.side_effect = all_ok
+        flusher = OutboxFlusher(self.outbox, api)
+        flusher.start()
+        self.outbox.add('{"new": 1}')
+        self.assertTrue(flusher.stop(timeout=10))
+        posted = [c.args[0] for c in api.post.call_args_list]
+        for c in api.post_many.call_args_list:
+            posted += c.args[0]
+        self.assertEqual(sorted(posted), ['{"new": 1}', '{"old": 1}'])
+        self.assertEqual(self.outbox.entries(), [])
@@ -0,0 +1,150 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from resqui.config import Configuration
+from resqui.core import Context
+from resqui.plan import compile_plan, group_by_plugin, plugin_class
+from resqui.plugins.base import IndicatorPlugin
+from resqui.timings import TimingHistory
+
+from helpers import TestCase
+
+
+class Scanner(IndicatorPlugin):
+    indicators = ["has_a", "has_b"]
+    requires = ["github_token"]
+
+    def has_a(self, url, branch_hash_or_tag):
+        pass
+
+    def has_b(self, url, branch_hash_or_tag):
+        pass
+
+
+class Files(IndicatorPlugin):
+    indicators = ["has_c", "has_listed_but_missing"]
+
+    def has_c(self, url, branch_hash_or_tag):
+        pass
+
+
+PLUGINS = {"Scanner": Scanner, "Files": Files}
+
+
+def _indicator(name, plugin, indicator_id=None):
+    return {"name": name, "plugin": plugin, "@id": indicator_id or name}
+
+
+class TestCompilePlan(TestCase):
+    def _plan(self, cfg, context=None, history=None):
+        with patch("builtins.print"):
+            configuration = Configuration()
+        configuration._cfg = cfg
+        return compile_plan(configuration, context, history, PLUGINS.__getitem__)
+
+    def test_default_configuration_is_valid(self):
+        with patch("builtins.print"):
+            plan = compile_plan(Configuration())
+        self.assertEqual(plan.errors, [])
+        self.assertEqual(len(plan.steps), 6)
+
+    def test_plugin_class(self):
+        self.assertEqual(plugin_class("Gitleaks").__name__, "Gitleaks")
+        with self.assertRaises(AttributeError):
+            plugin_class("NoSuchPlugin")
+
+    def test_invalid_indicators_are_errors(self):
+        plan = self._plan(
+            {
+                "indicators": [
+                    _indicator("has_a", "Scanner"),
+                    _indicator("has_a", "Unknown"),
+                    _indicator("has_typo", "Scanner"),
+                    _indicator("has_listed_but_missing", "Files"),
+                    {"name": "has_c", "plugin": "Files"},
+                ]
+            }
+        )
+        self.assertEqual(len(plan.errors), 4)
+        self.assertIn("unknown plugin 'Unknown'", plan.errors[0])
+        self.assertIn(
+            "has no indicator 'has_typo' (available: has_a, has_b)", plan.errors[1]
+        )
+        self.assertIn("has no indicator 'has_listed_but_missing'", plan.errors[2])
+        self.assertIn("needs a 'name', 'plugin' and '@id'", plan.errors[3])
+        self.assertEqual(plan.steps, [(None, [_indicator("has_a", "Scanner")])])
+
+    def test_unknown_alternatives_mode_is_an_error(self):
+        plan = self._plan(
+            {
+                "alternatives": {"x": "vote"},
+                "indicators": [_indicator("has_a", "Scanner", "x")],
+            }
+        )
+        self.assertIn("Unknown mode 'vote'", plan.errors[0])
+
+    def test_duplicates_are_run_once(self):
+        plan = self._plan(
+            {
+                "indicators": [
+                    _indicator("has_a", "Scanner"),
+                    _indicator("has_a", "Scanner"),
+                    _indicator("has_a", "Scanner", "other-id"),
+                ]
+            }
+        )
+        self.assertEqual(len(plan.steps), 2)
+        self.assertEqual(len(plan.warnings), 1)
+        self.assertIn("more than once", plan.warnings[0])
+
+    def test_missing_context_is_a_warning(self):
+        cfg = {
+            "indicators": [
+                _indicator("has_a", "Scanner"),
+                _indicator("has_b", "Scanner"),
+            ]
+        }
+        plan = self._plan(cfg, Context())
+        self.assertEqual(
+            plan.warnings, ["Scanner needs the github_token, its indicators will fail"]
+        )
+        self.assertEqual(self._plan(cfg, Context(github_token="t")).warnings, [])
+
+    def test_indicators_of_a_plugin_are_grouped(self):
+        a, b, c = (
+            _indicator("has_a", "Scanner"),
+            _indicator("has_b", "Scanner"),
+            _indicator("has_c", "Files"),
+        )
+        alternative = _indicator("has_c", "Files", "alt")
+        steps = [(None, [a]), (None, [c]), ("race", [alternative]), (None, [b])]
+        self.assertEqual(
+            group_by_plugin(steps),
+            [(None, [a]), (None, [b]), (None, [c]), ("race", [alternative])],
+        )
+
+    def test_estimates_count_plugin_initialisation_once(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            history = TimingHistory(os.path.join(tmp_dir, "timings.json"))
+        history.record("Scanner", 10)
+        history.record("Scanner.indicators", 61)
+        plan = self._plan(
+            {
+                "indicators": [
+                    _indicator("has_a", "Scanner"),
+                    _indicator("has_b", "Scanner"),
+                    _indicator("has_c", "Files"),
+                ]
+            },
+            history=history,
+        )
+        # The backend run of all indicators of a plugin is paid by its first
+        self.assertEqual(plan.estimates, [71, 0, None])
+        self.assertEqual(plan.total, 71)
+        self.assertEqual(
+            plan.backends, {"Scanner": ["has_a", "has_b"], "Files": ["has_c"]}
+        )
+        text = "\n".join(plan.describe())
+        self.assertIn("~71s", text)
+        self.assertIn("without 1 steps never measured", text)
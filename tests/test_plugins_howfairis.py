@@ -0,0 +1,60 @@
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from resqui.core import Context
+from resqui.plugins.base import PluginInitError
+from resqui.plugins.howfairis import HowFairIs
+
+from helpers import TestCase, make_repo
+
+
+class TestHowFairIsLocalClone(TestCase):
+    url = "https://github.com/example/repo"
+
+    def test_init_without_token_requires_local_clone(self):
+        with self.assertRaises(PluginInitError):
+            HowFairIs(Context())
+
+    def test_no_executor_is_created_with_local_clone(self):
+        with tempfile.TemporaryDirectory() as repo:
+            make_repo(repo, {"README.md": "hello\n"})
+            with patch("resqui.plugins.howfairis.PythonExecutor") as executor:
+                plugin = HowFairIs(Context(repo_path=repo))
+            executor.assert_not_called()
+            self.assertIsNone(plugin.executor)
+
+    def test_license_found_in_local_clone(self):
+        with tempfile.TemporaryDirectory() as repo:
+            commit = make_repo(repo, {"LICENSE.md": "MIT\n"})
+            plugin = HowFairIs(Context(repo_path=repo))
+            result = plugin.has_license(self.url, commit)
+        self.assertTrue(result.success)
+        self.assertEqual(result.status_id, "schema:CompletedActionStatus")
+        self.assertIn("LICENSE.md", result.evidence)
+
+    def test_license_missing_in_local_clone(self):
+        with tempfile.TemporaryDirectory() as repo:
+            commit = make_repo(repo, {"COPYING": "GPL\n"})
+            plugin = HowFairIs(Context(repo_path=repo))
+            result = plugin.has_license(self.url, commit)
+        self.assertFalse(result.success)
+        self.assertEqual(result.output, "invalid")
+
+    def test_unknown_ref_falls_back_to_github_api(self):
+        executor = MagicMock()
+        executor.execute.return_value.stdout = "True\n"
+        with tempfile.TemporaryDirectory() as repo:
+            make_repo(repo, {"README.md": "hello\n"})
+            plugin = HowFairIs(Context(github_token="token", repo_path=repo))
+            with patch.object(plugin, "create_executor", return_value=executor):
+                result = plugin.has_license(self.url, "unknown-branch")
+        executor.execute.assert_called_once()
+        self.assertTrue(result.success)
+
+    def test_unknown_ref_without_token_fails(self):
+        with tempfile.TemporaryDirectory() as repo:
+            make_repo(repo, {"README.md": "hello\n"})
+            plugin = HowFairIs(Context(repo_path=repo))
+            result = plugin.has_license(self.url, "unknown-branch")
+        self.assertFalse(result.success)
+        self.assertEqual(result.status_id, "missing")
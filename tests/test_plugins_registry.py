@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+import resqui.plugins
+from resqui.plan import plugin_class
+from resqui.plugins import PLUGINS
+from resqui.plugins.registry import load_registry
+
+from helpers import TestCase
+
+SITE_PLUGIN = """
+from resqui.plugins.base import IndicatorPlugin
+
+
+class SiteChecks(IndicatorPlugin):
+    name = "Site checks"
+    version = "1.0"
+    id = "https://example.org/site-checks"
+    indicators = ["has_site_header"]
+
+    def __init__(self, context):
+        pass
+
+    def has_site_header(self, url, branch_hash_or_tag):
+        pass
+"""
+
+SITE_ENTRY_POINTS = """
+[resqui.plugins]
+SiteChecks = site_checks:SiteChecks
+Broken = site_checks:Missing
+"""
+
+
+class TestPluginRegistry(TestCase):
+    def test_metadata_matches_plugin_classes(self):
+        for class_name, info in PLUGINS.items():
+            with self.subTest(plugin=class_name):
+                cls = info.load()
+                self.assertEqual(cls.__name__, class_name)
+                self.assertEqual(info.name, cls.name)
+                self.assertEqual(info.version, cls.version)
+                self.assertEqual(info.id, cls.id)
+                self.assertEqual(info.indicators, list(cls.indicators))
+                self.assertEqual(info.requires, list(cls.requires))
+
+    def test_plugin_classes_are_package_attributes(self):
+        self.assertIs(resqui.plugins.Gitleaks, PLUGINS["Gitleaks"].load())
+        self.assertIn("Gitleaks", dir(resqui.plugins))
+        with self.assertRaises(AttributeError):
+            resqui.plugins.NoSuchPlugin
+
+    def test_plugins_are_not_imported_at_startup(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        code = (
+            "import sys\n"
+            "sys.argv = ['resqui', 'indicators']\n"
+            "from resqui.cli import resqui\n"
+            "try:\n"
+            "    resqui()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "heavy = ('requests', 'http.client', 'resqui.plugins.', 'resqui.workspace')\n"
+            "print(sorted(m for m in sys.modules if m.startswith(heavy)))\n"
+        )
+        env = {**os.environ, "XDG_CACHE_HOME": tmp_dir.name}
+        output = subprocess.check_output(
+            [sys.executable, "-c", code], text=True, env=env
+        )
+        *listing, loaded = output.strip().split("\n")
+        self.assertIn("Class: Gitleaks", listing)
+        self.assertEqual(loaded, "['resqui.plugins.base', 'resqui.plugins.registry']")
+
+
+class TestEntryPointPlugins(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.site = os.path.join(tmp_dir.name, "site-packages")
+        self._install("site_checks", SITE_ENTRY_POINTS)
+        self.module_file = os.path.join(self.site, "site_checks.py")
+        with open(self.module_file, "w") as f:
+            f.write(SITE_PLUGIN)
+        self.cache = os.path.join(tmp_dir.name, "cache", "plugins.json")
+
+        sys.path.insert(0, self.site)
+        self.addCleanup(sys.path.remove, self.site)
+        self.addCleanup(sys.modules.pop, "site_checks", None)
+
+    def _install(self, name, entry_points):
+        dist_info = os.path.join(self.site, f"{name}-1.0.dist-info")
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), "w") as f:
+            f.write(f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n")
+        with open(os.path.join(dist_info, "entry_points.txt"), "w") as f:
+            f.write(entry_points)
+
+    def test_plugins_are_found_through_entry_points(self):
+        registry, errors = load_registry(self.cache)
+        info = registry["SiteChecks"]
+        self.assertEqual(info.module, "site_checks")
+        self.assertEqual(info.indicators, ["has_site_header"])
+        self.assertEqual(info.load().name, "Site checks")
+        self.assertIn("Gitleaks", registry)
+        (error,) = errors
+        self.assertIn("cannot load plugin 'Broken'", error)
+
+    def test_entry_points_are_scanned_once(self):
+        load_registry(self.cache)
+        with patch("resqui.plugins.registry.scan_entry_points") as scan:
+            registry, errors = load_registry(self.cache)
+        scan.assert_not_called()
+        self.assertIn("SiteChecks", registry)
+        self.assertEqual(len(errors), 1)
+
+    def test_changed_plugin_module_is_scanned_again(self):
+        load_registry(self.cache)
+        os.utime(self.module_file, ns=(0, 0))
+        with patch(
+            "resqui.plugins.registry.scan_entry_points", return_value=([], [])
+        ) as scan:
+            registry, _ = load_registry(self.cache)
+        scan.assert_called_once()
+        self.assertNotIn("SiteChecks", registry)
+
+    def test_installed_distribution_is_scanned_again(self):
+        load_registry(self.cache)
+        self._install("more_checks", "[resqui.plugins]\n")
+        with patch(
+            "resqui.plugins.registry.scan_entry_points", return_value=([], [])
+        ) as scan:
+            load_registry(self.cache)
+        scan.assert_called_once()
+
+    def test_built_in_plugins_take_precedence(self):
+        self._install(
+            "site_leaks", "[resqui.plugins]\nGitleaks = site_leaks:Gitleaks\n"
+        )
+        with open(os.path.join(self.site, "site_leaks.py"), "w") as f:
+            f.write(SITE_PLUGIN.replace("class SiteChecks", "class Gitleaks"))
+        self.addCleanup(sys.modules.pop, "site_leaks", None)
+        registry, errors = load_registry(self.cache)
+        self.assertEqual(registry["Gitleaks"].module, ".gitleaks")
+        self.assertIn("plugin 'Gitleaks' of site_leaks is ignored", errors[-1])
+
+    def test_runner_finds_entry_point_plugins(self):
+        self.addCleanup(vars(resqui.plugins).pop, "SiteChecks", None)
+        with patch("resqui.plugins.registry._loaded", load_registry(self.cache)):
+            self.assertEqual(plugin_class("SiteChecks").name, "Site checks")
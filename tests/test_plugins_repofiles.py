@@ -0,0 +1,61 @@
+import tempfile
+
+from resqui.core import Context
+from resqui.plugins.base import PluginInitError
+from resqui.plugins.repofiles import RepoFiles
+from resqui.plugins.rsfc import RSFC
+
+from helpers import TestCase, make_repo
+
+
+class TestRepoFiles(TestCase):
+    url = "https://github.com/example/repo"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.repo = tempfile.mkdtemp()
+        names = ["LICENSE", "Dockerfile", "tests/test_a.py", "pyproject.toml"]
+        cls.commit = make_repo(cls.repo, {name: "x\n" for name in names})
+        cls.plugin = RepoFiles(Context(repo_path=cls.repo))
+
+    def test_requires_local_clone(self):
+        with self.assertRaises(PluginInitError):
+            RepoFiles(Context())
+
+    def test_indicator_names_match_rsfc(self):
+        self.assertTrue(set(RepoFiles.indicators) <= set(RSFC.indicators))
+        for indicator in RepoFiles.indicators:
+            self.assertTrue(callable(getattr(RepoFiles, indicator)))
+
+    def test_present_files(self):
+        for indicator in [
+            "software_has_license",
+            "software_is_containerized",
+            "software_has_tests",
+            "requirements_specified",
+        ]:
+            with self.subTest(indicator=indicator):
+                result = getattr(self.plugin, indicator)(self.url, self.commit)
+                self.assertTrue(result.success)
+                self.assertEqual(result.output, "true")
+                self.assertEqual(result.status_id, "schema:CompletedActionStatus")
+
+    def test_missing_files(self):
+        for indicator in [
+            "software_has_citation",
+            "has_contribution_guidelines",
+            "repository_workflows",
+        ]:
+            with self.subTest(indicator=indicator):
+                result = getattr(self.plugin, indicator)(self.url, self.commit)
+                self.assertFalse(result.success)
+                self.assertEqual(result.output, "false")
+
+    def test_evidence_lists_found_files(self):
+        result = self.plugin.software_has_tests(self.url, self.commit)
+        self.assertEqual(result.evidence, "Found tests: 'tests', 'tests/test_a.py'.")
+
+    def test_unknown_revision_fails(self):
+        result = self.plugin.software_has_license(self.url, "no-such-branch")
+        self.assertFalse(result.success)
+        self.assertEqual(result.status_id, "missing")
@@ -1,14 +1,19 @@
 import json
 import os
+import subprocess
 import tempfile
-import unittest
 from types import SimpleNamespace
 from unittest.mock import patch
 
+from resqui.cache import SingleFlight
 from resqui.core import Context
+from resqui.plugins.base import IndicatorPlugin
 from resqui.plugins.gitleaks import Gitleaks
 from resqui.plugins.rsfc import RSFC
 from resqui.plugins.superlinter import SuperLinter
+from resqui.workspace import DOCKER_WORK_VOLUME_ENV, SHARED_WORKDIR_ENV
+
+from helpers import TestCase, commit_files, git, make_repo
 
 
 class FakeExecutor:
@@ -23,7 +28,7 @@ class FakeExecutor:
         return SimpleNamespace(stdout=self.stdout, stderr=self.stderr)
 
 
-class TestPluginSharedWorkspace(unittest.TestCase):
+class TestPluginSharedWorkspace(TestCase):
     def _env(self, root):
         return {
             "RESQUI_SHARED_WORKDIR": root,
@@ -42,7 +47,7 @@ class TestPluginSharedWorkspace(unittest.TestCase):
 
         with tempfile.TemporaryDirectory() as root:
             with patch.dict(os.environ, self._env(root), clear=True):
-                with patch("resqui.plugins.gitleaks.subprocess.run", side_effect=fake_clone):
+                with patch("resqui.plugins.base.subprocess.run", side_effect=fake_clone):
                     plugin.has_no_security_leak("https://github.com/example/repo", "main")
 
         command, run_args = plugin.executor.calls[0]
@@ -57,7 +62,7 @@ class TestPluginSharedWorkspace(unittest.TestCase):
 
         with tempfile.TemporaryDirectory() as root:
             with patch.dict(os.environ, self._env(root), clear=True):
-                with patch("resqui.plugins.superlinter.subprocess.run"):
+                with patch("resqui.plugins.base.subprocess.run"):
                     plugin.has_no_linting_issues("https://github.com/example/repo", "main")
 
         _, run_args = plugin.executor.calls[0]
@@ -86,7 +91,7 @@ class TestPluginSharedWorkspace(unittest.TestCase):
         plugin = RSFC.__new__(RSFC)
         plugin.context = Context(github_token="token")
         plugin.executor = fake_executor
-        plugin._cache = {}
+        plugin._cache = SingleFlight()
 
         with tempfile.TemporaryDirectory() as root:
             with patch.dict(os.environ, self._env(root), clear=True):
@@ -118,7 +123,7 @@ class TestPluginSharedWorkspace(unittest.TestCase):
         plugin = RSFC.__new__(RSFC)
         plugin.context = Context(github_token=None)
         plugin.executor = fake_executor
-        plugin._cache = {}
+        plugin._cache = SingleFlight()
 
         with tempfile.TemporaryDirectory() as root:
             with patch.dict(os.environ, self._env(root), clear=True):
@@ -126,3 +131,86 @@ class TestPluginSharedWorkspace(unittest.TestCase):
 
         command, _ = fake_executor.calls[0]
         self.assertNotIn("-t", command)
+
+
+class TestPluginLocalClone(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.repo = os.path.join(tmp_dir.name, "repo")
+        make_repo(self.repo)
+        for name in ["README.md", "LICENSE"]:
+            commit_files(self.repo, {name: name}, f"Add {name}")
+        self.first_commit = git(self.repo, "rev-parse", "HEAD~1")
+
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        for name in [SHARED_WORKDIR_ENV, DOCKER_WORK_VOLUME_ENV]:
+            os.environ.pop(name, None)
+
+    def test_gitleaks_scans_the_assessed_commit_of_the_local_clone(self):
+        def fake_gitleaks(command, run_args=None):
+            # The workspace is mounted as /path
+            local_path = run_args[run_args.index("-v") + 1].split(":")[0]
+            checkouts.append(
+                (
+                    git(local_path, "rev-parse", "HEAD"),
+                    git(local_path, "remote", "get-url", "origin"),
+                    sorted(os.listdir(local_path)),
+                )
+            )
+            with open(os.path.join(local_path, "report.json"), "w") as f:
+                json.dump([], f)
+            return SimpleNamespace(stdout="", stderr="no leaks found")
+
+        checkouts = []
+        plugin = Gitleaks.__new__(Gitleaks)
+        plugin.context = Context(repo_path=self.repo)
+        plugin.executor = FakeExecutor()
+        plugin.executor.run = fake_gitleaks
+
+        result = plugin.has_no_security_leak(
+            "https://invalid.example/repo", self.first_commit
+        )
+
+        self.assertTrue(result.success)
+        self.assertEqual(
+            checkouts, [(self.first_commit, self.repo, [".git", "README.md"])]
+        )
+
+    def test_history_of_a_shallow_clone_is_fetched(self):
+        shallow = os.path.join(os.path.dirname(self.repo), "shallow")
+        subprocess.run(
+            ["git", "clone", "-q", "--depth", "1", f"file://{self.repo}", shallow],
+            check=True,
+        )
+        self.assertEqual(git(shallow, "rev-parse", "--is-shallow-repository"), "true")
+        plugin = IndicatorPlugin()
+        plugin.context = Context(repo_path=shallow)
+        target = os.path.join(os.path.dirname(self.repo), "target")
+
+        plugin.clone_repository(self.repo, "HEAD", target)
+
+        self.assertEqual(git(target, "rev-parse", "--is-shallow-repository"), "false")
+        self.assertEqual(git(target, "rev-list", "--count", "HEAD"), "2")
+        self.assertEqual(git(target, "rev-parse", "HEAD~1"), self.first_commit)
+
+    def test_unknown_revision_is_cloned_from_the_remote(self):
+        def fake_superlinter(command, run_args=None):
+            # The workspace is mounted as /tmp/lint
+            local_path = run_args[run_args.index("-v") + 1].split(":")[0]
+            origins.append(git(local_path, "remote", "get-url", "origin"))
+            return SimpleNamespace(stdout="", stderr="")
+
+        remote = os.path.join(os.path.dirname(self.repo), "remote")
+        subprocess.run(["git", "clone", "-q", self.repo, remote], check=True)
+        origins = []
+        plugin = SuperLinter.__new__(SuperLinter)
+        plugin.context = Context(repo_path=self.repo)
+        plugin.executor = FakeExecutor()
+        plugin.executor.run = fake_superlinter
+
+        plugin.has_no_linting_issues(remote, "develop")
+
+        self.assertEqual(origins, [remote])
@@ -0,0 +1,68 @@
+import io
+import os
+from unittest.mock import patch
+
+from resqui.progress import Progress, is_interactive
+
+from helpers import TestCase
+
+
+class FakeTTY(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestIsInteractive(TestCase):
+    def test_pipes_are_not_interactive(self):
+        self.assertFalse(is_interactive(io.StringIO()))
+
+    def test_tty(self):
+        with patch.dict(os.environ, {"TERM": "xterm"}, clear=True):
+            self.assertTrue(is_interactive(FakeTTY()))
+
+    def test_ci_is_not_interactive(self):
+        with patch.dict(os.environ, {"CI": "true"}):
+            self.assertFalse(is_interactive(FakeTTY()))
+
+
+class TestProgress(TestCase):
+    def test_plain_lines(self):
+        stream = io.StringIO()
+        with Progress(stream, live=False) as progress:
+            progress.start("a", "  has_license/HowFairIs")
+            progress.start("b", "  has_citation/CFFConvert")
+            progress.finish("b", "✔")
+            progress.log("    evidence")
+            progress.finish("a", "✖")
+        lines = stream.getvalue().splitlines()
+        self.assertRegex(lines[0], r"^  has_citation/CFFConvert \(\d+\.\d+s\): ✔$")
+        self.assertEqual(lines[1], "    evidence")
+        self.assertRegex(lines[2], r"^  has_license/HowFairIs \(\d+\.\d+s\): ✖$")
+        self.assertNotIn("\r", stream.getvalue())
+        self.assertNotIn("\b", stream.getvalue())
+
+    def test_plain_mode_starts_no_thread(self):
+        progress = Progress(io.StringIO(), live=False)
+        progress.start("a", "a")
+        self.assertIsNone(progress._ticker)
+        progress.finish("a", "done")
+        progress.close()
+
+    def test_live_status_line(self):
+        stream = FakeTTY()
+        with Progress(stream, live=True) as progress:
+            progress.start("a", "  has_license/HowFairIs")
+            self.assertIn("has_license/HowFairIs 0s", stream.getvalue())
+            progress.finish("a", "✔")
+        output = stream.getvalue()
+        self.assertIn("\r\033[K  has_license/HowFairIs (", output)
+        # The status line is cleared at the end.
+        self.assertTrue(output.endswith("\r\033[K"))
+        self.assertFalse(progress._ticker.is_alive())
+
+    def test_close_does_not_wait_for_a_tick(self):
+        progress = Progress(FakeTTY(), live=True)
+        progress.interval = 60
+        progress.start("a", "a")
+        progress.close()
+        self.assertFalse(progress._ticker.is_alive())
@@ -0,0 +1,115 @@
+import threading
+
+from resqui.core import CheckResult
+from resqui.providers import (
+    choose,
+    group_alternatives,
+    is_conclusive,
+    run_all,
+    run_fallback,
+    run_race,
+)
+
+from helpers import TestCase
+
+LICENSE = "https://w3id.org/everse/i/indicators/software_has_license"
+CITATION = "https://w3id.org/everse/i/indicators/software_has_citation"
+
+COMPLETED = CheckResult(status_id="schema:CompletedActionStatus", success=False)
+FAILED = CheckResult(status_id="schema:FailedActionStatus")
+
+
+def _indicator(plugin, indicator_id=LICENSE, name="has_license"):
+    return {"name": name, "plugin": plugin, "@id": indicator_id}
+
+
+class TestIsConclusive(TestCase):
+    def test_completed_result_is_conclusive_even_if_check_failed(self):
+        self.assertTrue(is_conclusive(COMPLETED))
+        self.assertTrue(is_conclusive([COMPLETED, COMPLETED]))
+
+    def test_failed_or_empty_results_are_not_conclusive(self):
+        self.assertFalse(is_conclusive(FAILED))
+        self.assertFalse(is_conclusive([COMPLETED, FAILED]))
+        self.assertFalse(is_conclusive([]))
+
+
+class TestGroupAlternatives(TestCase):
+    def test_without_alternatives_every_indicator_is_a_step(self):
+        indicators = [_indicator("A"), _indicator("B")]
+        steps = group_alternatives(indicators, {})
+        self.assertEqual(steps, [(None, [indicators[0]]), (None, [indicators[1]])])
+
+    def test_indicators_sharing_an_id_are_grouped_at_first_position(self):
+        indicators = [
+            _indicator("A"),
+            _indicator("C", CITATION, "has_citation"),
+            _indicator("B"),
+        ]
+        steps = group_alternatives(indicators, {LICENSE: "fallback"})
+        self.assertEqual(
+            steps,
+            [("fallback", [indicators[0], indicators[2]]), (None, [indicators[1]])],
+        )
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            group_alternatives([_indicator("A")], {LICENSE: "fastest"})
+
+
+class TestRunAlternatives(TestCase):
+    def _runner(self, outcomes, calls):
+        def run(indicator):
+            calls.append(indicator["plugin"])
+            return indicator, indicator["plugin"], outcomes[indicator["plugin"]]
+
+        return run
+
+    def test_fallback_stops_at_first_conclusive_provider(self):
+        calls = []
+        providers = [_indicator("A"), _indicator("B"), _indicator("C")]
+        run = self._runner({"A": FAILED, "B": COMPLETED, "C": COMPLETED}, calls)
+        _, plugin, results = run_fallback(providers, run)
+        self.assertEqual(plugin, "B")
+        self.assertEqual(calls, ["A", "B"])
+
+    def test_fallback_returns_last_outcome_if_nothing_is_conclusive(self):
+        providers = [_indicator("A"), _indicator("B")]
+        run = self._runner({"A": FAILED, "B": []}, [])
+        _, plugin, results = run_fallback(providers, run)
+        self.assertEqual(plugin, "B")
+        self.assertEqual(results, [])
+
+    def test_all_providers_run_and_fallback_is_chosen(self):
+        calls = []
+        providers = [_indicator("A"), _indicator("B"), _indicator("C")]
+        run = self._runner({"A": FAILED, "B": COMPLETED, "C": COMPLETED}, calls)
+        outcomes = run_all(providers, run)
+        self.assertEqual(calls, ["A", "B", "C"])
+        self.assertEqual(choose(outcomes)[1], "B")
+        self.assertEqual(choose(outcomes[:1])[1], "A")
+
+    def test_race_takes_first_conclusive_result(self):
+        release = threading.Event()
+
+        def run(indicator):
+            if indicator["plugin"] == "Slow":
+                release.wait(5)
+                return indicator, "Slow", COMPLETED
+            return indicator, indicator["plugin"], COMPLETED
+
+        try:
+            _, plugin, _ = run_race([_indicator("Slow"), _indicator("Fast")], run)
+        finally:
+            release.set()
+        self.assertEqual(plugin, "Fast")
+
+    def test_race_skips_inconclusive_results(self):
+        run = self._runner({"A": FAILED, "B": COMPLETED}, [])
+        _, plugin, _ = run_race([_indicator("A"), _indicator("B")], run)
+        self.assertEqual(plugin, "B")
+
+    def test_race_returns_last_outcome_if_nothing_is_conclusive(self):
+        run = self._runner({"A": FAILED, "B": FAILED}, [])
+        _, plugin, _ = run_race([_indicator("A"), _indicator("B")], run)
+        self.assertEqual(plugin, "B")
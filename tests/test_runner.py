@@ -0,0 +1,274 @@
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+from resqui.cache import SingleFlight
+from resqui.config import Configuration
+from resqui.core import CheckResult, Context
+from resqui.plugins.base import IndicatorPlugin
+from resqui.runner import Runner
+from resqui.timings import TimingHistory
+
+from helpers import TestCase
+
+
+class FakePlugin(IndicatorPlugin):
+    name = "Fake"
+    version = "1.0"
+    indicators = ["quick", "slow", "hanging"]
+
+    def __init__(self, context):
+        self.cancelled = threading.Event()
+
+    def quick(self, url, branch_hash_or_tag):
+        return CheckResult(status_id="schema:CompletedActionStatus", success=True)
+
+    def slow(self, url, branch_hash_or_tag):
+        time.sleep(0.15)
+        return self.quick(url, branch_hash_or_tag)
+
+    def hanging(self, url, branch_hash_or_tag):
+        self.cancelled.wait(5)
+        return CheckResult(status_id="schema:CompletedActionStatus", success=True)
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class ReportPlugin(FakePlugin):
+    """Derives its indicators from one report, like OpenSSF Scorecard."""
+
+    indicators = ["first", "second"]
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.runs = 0
+        self._cache = SingleFlight()
+
+    def report(self, url, commit):
+        self.runs += 1
+        if self.cancelled.wait(5):
+            raise subprocess.CalledProcessError(137, ["docker", "run"])
+        return {}
+
+    def first(self, url, branch_hash_or_tag):
+        self._cache.do(url, self.report, url, branch_hash_or_tag)
+        return self.quick(url, branch_hash_or_tag)
+
+    second = first
+
+
+class OtherPlugin(FakePlugin):
+    pass
+
+
+class SlowInitPlugin(FakePlugin):
+    def __init__(self, context):
+        threading.Event().wait(0.5)
+
+
+def _indicator(name, plugin="FakePlugin", **kwargs):
+    return {
+        "name": name,
+        "plugin": plugin,
+        "@id": f"https://example.com/{name}",
+        **kwargs,
+    }
+
+
+class TestRunner(TestCase):
+    def _runner(self, cfg, timeout=None, history=None):
+        with patch("builtins.print"):
+            configuration = Configuration()
+        configuration._cfg = cfg
+        runner = Runner(
+            configuration,
+            Context(),
+            "https://example.com/repo",
+            "main",
+            timeout,
+            history,
+        )
+        classes = {
+            "FakePlugin": FakePlugin,
+            "OtherPlugin": OtherPlugin,
+            "ReportPlugin": ReportPlugin,
+            "SlowInitPlugin": SlowInitPlugin,
+        }
+        runner.plugin_class = classes.__getitem__
+        return runner
+
+    def test_runs_indicator(self):
+        runner = self._runner({"indicators": []})
+        result = runner.run_indicator(_indicator("quick"))
+        self.assertTrue(result.success)
+        self.assertTrue(runner.is_loaded("FakePlugin"))
+
+    def test_indicator_timeout_cancels_plugin(self):
+        runner = self._runner({"indicators": []})
+        result = runner.run_indicator(_indicator("hanging", timeout=0.05))
+        self.assertEqual(result.status_id, "schema:FailedActionStatus")
+        self.assertEqual(result.output, "timeout")
+        self.assertTrue(runner.plugin_instances["FakePlugin"].cancelled.is_set())
+
+    def test_plugin_timeout_applies_to_its_indicators(self):
+        runner = self._runner({"plugins": {"FakePlugin": {"timeout": 0.05}}})
+        result = runner.run_indicator(_indicator("hanging"))
+        self.assertEqual(result.output, "timeout")
+
+    def test_plugin_timeout_is_a_budget_for_all_indicators(self):
+        runner = self._runner({"plugins": {"FakePlugin": {"timeout": 0.25}}})
+        self.assertTrue(runner.run_indicator(_indicator("slow")).success)
+        self.assertEqual(runner.run_indicator(_indicator("slow")).output, "timeout")
+        self.assertEqual(runner.run_indicator(_indicator("quick")).output, "timeout")
+
+    def test_timed_out_backend_is_not_run_again(self):
+        runner = self._runner({"indicators": []})
+        first = runner.run_indicator(_indicator("first", "ReportPlugin", timeout=0.05))
+        start = time.monotonic()
+        second = runner.run_indicator(_indicator("second", "ReportPlugin"))
+        self.assertEqual(first.output, "timeout")
+        self.assertEqual(second.output, "timeout")
+        self.assertIn("'first' of the plugin timed out", second.evidence)
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertEqual(runner.plugin_instances["ReportPlugin"].runs, 1)
+
+    def test_errors_are_recorded_as_failed_results(self):
+        runner = self._runner({"indicators": []})
+        runner.load_plugin("ReportPlugin").cancelled.set()
+        result = runner.run_indicator(_indicator("first", "ReportPlugin"))
+        self.assertEqual(result.status_id, "schema:FailedActionStatus")
+        self.assertEqual(result.output, "error")
+        self.assertIn("CalledProcessError", result.evidence)
+
+    def test_plugin_initialisation_timeout(self):
+        runner = self._runner({"plugins": {"SlowInitPlugin": {"timeout": 0.05}}})
+        first = runner.run_indicator(_indicator("quick", "SlowInitPlugin"))
+        second = runner.run_indicator(_indicator("quick", "SlowInitPlugin"))
+        self.assertEqual(first.output, "timeout")
+        self.assertEqual(second.output, "timeout")
+        self.assertFalse(runner.is_loaded("SlowInitPlugin"))
+
+    def test_exhausted_run_budget(self):
+        runner = self._runner({"indicators": []}, timeout=0.05)
+        self.assertEqual(runner.run_indicator(_indicator("hanging")).output, "timeout")
+        # Nothing is started once the budget is used up.
+        self.assertEqual(runner.time_left(), 0)
+        self.assertEqual(runner.run_indicator(_indicator("quick")).output, "timeout")
+
+    def test_run_provider_turns_errors_into_results(self):
+        runner = self._runner({"indicators": []})
+        indicator, plugin_class, result = runner.run_provider(_indicator("unknown"))
+        self.assertIs(plugin_class, FakePlugin)
+        self.assertEqual(result.status_id, "missing")
+        self.assertIn("AttributeError", result.evidence)
+
+    def test_race_cancels_losing_provider(self):
+        license_id = "https://example.com/license"
+        runner = self._runner({"indicators": []})
+        runner.load_plugin("FakePlugin")
+        indicator, _, result = runner.run_alternatives(
+            "race",
+            [
+                _indicator("hanging", **{"@id": license_id}),
+                _indicator("quick", **{"@id": license_id}),
+            ],
+        )
+        self.assertEqual(indicator["name"], "quick")
+        self.assertTrue(runner.plugin_instances["FakePlugin"].cancelled.is_set())
+
+    def test_race_lets_loser_finish_for_its_other_indicators(self):
+        license_id = "https://example.com/license"
+        providers = [
+            _indicator("hanging", **{"@id": license_id}),
+            _indicator("quick", "OtherPlugin", **{"@id": license_id}),
+        ]
+        runner = self._runner(
+            {
+                "alternatives": {license_id: "race"},
+                "indicators": providers + [_indicator("quick")],
+            }
+        )
+        loser = runner.load_plugin("FakePlugin")
+        self.addCleanup(loser.cancelled.set)
+        indicator, _, _ = runner.run_alternatives("race", providers)
+        self.assertEqual(indicator["plugin"], "OtherPlugin")
+        self.assertFalse(loser.cancelled.is_set())
+
+        # Once nothing else needs the plugin, a losing provider is cancelled
+        runner.run_indicator(_indicator("quick"))
+        runner.run_alternatives("race", providers)
+        self.assertTrue(loser.cancelled.is_set())
+
+    def test_records_cost_of_all_indicators_of_a_plugin(self):
+        history = TimingHistory("/nonexistent/timings.json")
+        indicators = [_indicator("quick"), _indicator("hanging", timeout=0.05)]
+        runner = self._runner({"indicators": indicators}, history=history)
+        for indicator in indicators:
+            runner.run_indicator(indicator)
+        runner.record_indicators()
+        self.assertIsNotNone(history.estimate("FakePlugin"))
+        self.assertGreaterEqual(history.estimate("FakePlugin.indicators"), 0.05)
+
+        # Plugins which did not run all of their indicators are not recorded
+        history = TimingHistory("/nonexistent/timings.json")
+        runner = self._runner(
+            {"indicators": indicators + [_indicator("slow")]}, history=history
+        )
+        runner.run_indicator(indicators[0])
+        runner.record_indicators()
+        self.assertIsNone(history.estimate("FakePlugin.indicators"))
+
+    def test_schedule_keeps_the_steps_of_a_plugin_together(self):
+        history = TimingHistory("/nonexistent/timings.json")
+        history.record("FakePlugin", 10)
+        history.record("FakePlugin.indicators", 100)
+        history.record("OtherPlugin.indicators", 1)
+        runner = self._runner({"indicators": []}, history=history)
+        steps = [
+            (None, [_indicator("hanging")]),
+            (None, [_indicator("quick", "OtherPlugin")]),
+            (None, [_indicator("quick")]),
+            (None, [_indicator("first", "ReportPlugin")]),
+        ]
+        scheduled = runner.schedule(steps)
+        self.assertEqual(
+            [(s[1][0]["plugin"], s[1][0]["name"]) for s in scheduled],
+            [
+                ("ReportPlugin", "first"),
+                ("OtherPlugin", "quick"),
+                ("FakePlugin", "hanging"),
+                ("FakePlugin", "quick"),
+            ],
+        )
+        self.assertEqual(runner.estimate(*steps[0]), 110)
+        self.assertEqual(runner.estimate(*steps[2]), 110)
+        # The initialisation is not counted once the plugin is loaded, and
+        # the time its indicators took so far is deducted.
+        runner.load_plugin("FakePlugin")
+        self.assertEqual(runner.estimate(*steps[2]), 100)
+        runner.spent["FakePlugin"] = 40
+        self.assertEqual(runner.estimate(*steps[2]), 60)
+
+    def test_estimate_of_alternatives(self):
+        history = TimingHistory("/nonexistent/timings.json")
+        history.record("FakePlugin.indicators", 100)
+        history.record("OtherPlugin.indicators", 1)
+        runner = self._runner({"indicators": []}, history=history)
+        providers = [_indicator("hanging"), _indicator("quick", "OtherPlugin")]
+        self.assertEqual(runner.estimate("fallback", providers), 100)
+        self.assertEqual(runner.estimate("race", providers), 1)
+        self.assertEqual(runner.estimate("all", providers), 101)
+
+    def test_skips_steps_which_do_not_fit(self):
+        history = TimingHistory("/nonexistent/timings.json")
+        history.record("FakePlugin.indicators", 100)
+        runner = self._runner({"indicators": []}, timeout=60, history=history)
+        self.assertTrue(runner.fits(None, [_indicator("quick", "OtherPlugin")]))
+        self.assertFalse(runner.fits(None, [_indicator("hanging")]))
+        self.assertFalse(runner.fits(None, [_indicator("quick")]))
+        result = runner.skip(None, [_indicator("hanging")])
+        self.assertEqual(result.status_id, "schema:PotentialActionStatus")
+        self.assertEqual(result.output, "skipped")
+        self.assertIn("100s", result.evidence)
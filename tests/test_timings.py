@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from resqui.timings import TimingHistory
+
+from helpers import TestCase
+
+
+class TestTimingHistory(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "resqui", "timings.json")
+
+    def test_estimate_is_mean_of_recent_durations(self):
+        history = TimingHistory(self.path)
+        self.assertIsNone(history.estimate("Gitleaks.indicators"))
+        for duration in [100, 1, 2, 3, 4, 5]:
+            history.record("Gitleaks.indicators", duration)
+        self.assertEqual(history.durations["Gitleaks.indicators"], [1, 2, 3, 4, 5])
+        self.assertEqual(history.estimate("Gitleaks.indicators"), 3)
+
+    def test_indicators_key(self):
+        self.assertEqual(
+            TimingHistory.indicators_key("HowFairIs"), "HowFairIs.indicators"
+        )
+
+    def test_save_and_load(self):
+        history = TimingHistory(self.path)
+        history.record("SuperLinter", 42.1234)
+        history.save()
+        self.assertEqual(TimingHistory(self.path).estimate("SuperLinter"), 42.123)
+
+    def test_unreadable_history_is_empty(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(TimingHistory(self.path).durations, {})
+
+    def test_save_ignores_unwritable_location(self):
+        history = TimingHistory(self.path)
+        history.record("SuperLinter", 1)
+        with patch("os.makedirs", side_effect=OSError("read-only")):
+            history.save()  # must not raise
+
+    def test_default_path_honours_xdg_cache_home(self):
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": self.tmp_dir.name}):
+            history = TimingHistory()
+        self.assertEqual(
+            history.path, os.path.join(self.tmp_dir.name, "resqui", "timings.json")
+        )
+        history.record("RepoFiles", 0.5)
+        history.save()
+        with open(history.path) as f:
+            self.assertEqual(json.load(f), {"RepoFiles": [0.5]})
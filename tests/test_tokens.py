@@ -0,0 +1,108 @@
+import http.server
+import json
+import threading
+from unittest.mock import patch
+
+from resqui.core import Context
+from resqui.plugins.base import IndicatorPlugin
+from resqui.tokens import TokenPool
+
+from helpers import TestCase
+
+
+class FakeGitHub(http.server.BaseHTTPRequestHandler):
+    """Answers /rate_limit with `server.quotas[token]`, 401 for other tokens."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        token = self.headers["Authorization"].removeprefix("Bearer ")
+        self.server.probes.append(token)
+        quota = self.server.quotas.get(token)
+        if quota is None:
+            self.send_response(401)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        remaining, reset = quota
+        core = {"limit": 5000, "remaining": remaining, "reset": reset}
+        data = json.dumps({"resources": {"core": core}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTokenPool(TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+        self.server.probes = []
+        self.server.quotas = {"a": (1000, 3600), "b": (4000, 3600)}
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.now = 0
+        self.waits = []
+
+    def _pool(self, tokens):
+        pool = TokenPool(tokens, clock=lambda: self.now, sleep=self.waits.append)
+        pool.url = f"http://127.0.0.1:{self.server.server_address[1]}/rate_limit"
+        return pool
+
+    def test_healthiest_token_is_used(self):
+        pool = self._pool(["a", "b"])
+        self.assertEqual(pool.acquire(), "b")
+        self.assertEqual(pool.quotas["b"]["remaining"], 4000 - pool.cost)
+        self.assertEqual(sorted(self.server.probes), ["a", "b"])
+
+    def test_quotas_are_probed_again_after_refresh(self):
+        pool = self._pool(["a", "b"])
+        for _ in range(70):
+            pool.acquire()
+        self.assertEqual(len(self.server.probes), 2)
+        self.assertEqual(pool.quotas["a"]["remaining"], 1000 - 5 * pool.cost)
+
+        self.server.quotas["a"] = (5000, 3600)
+        self.now = pool.refresh
+        self.assertEqual(pool.acquire(), "a")
+        self.assertEqual(len(self.server.probes), 4)
+
+    def test_exhausted_tokens_wait_for_reset(self):
+        self.server.quotas = {"a": (10, 500), "b": (0, 300)}
+        pool = self._pool(["a", "b"])
+
+        def sleep(seconds):
+            self.waits.append(seconds)
+            self.now += seconds
+            self.server.quotas["b"] = (5000, 3900)
+
+        pool.sleep = sleep
+        with patch("builtins.print"):
+            self.assertEqual(pool.acquire(), "b")
+        self.assertEqual(self.waits, [300])
+
+    def test_rejected_tokens_are_not_used(self):
+        pool = self._pool(["a", "revoked"])
+        with patch("builtins.print"):
+            self.assertEqual(pool.acquire(), "a")
+            self.assertEqual(pool.rejected, {"revoked"})
+            with self.assertRaises(ValueError):
+                self._pool(["revoked"]).acquire()
+
+    def test_tokens_are_used_if_github_is_unreachable(self):
+        pool = self._pool(["a", "b"])
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertEqual(pool.acquire(), "a")
+        self.assertIsNone(pool.quotas["b"]["remaining"])
+
+    def test_plugins_take_a_token_of_the_pool(self):
+        plugin = IndicatorPlugin()
+        plugin.context = Context(github_token="a")
+        self.assertEqual(plugin.github_token(), "a")
+        plugin.context = Context(github_token="a", github_tokens=self._pool("ab"))
+        self.assertEqual(plugin.github_token(), "b")
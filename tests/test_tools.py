@@ -1,4 +1,5 @@
-import unittest
+import os
+import tempfile
 from resqui.tools import (
     is_zenodo_url,
     normalized,
@@ -9,13 +10,20 @@ from resqui.tools import (
     project_name_from_url,
     ensure_list,
     url_branch_from_full_url,
+    parse_duration,
+    call_with_timeout,
+    CallTimeoutError,
+    write_atomic,
 )
+import time
+
+from helpers import TestCase
 
 VALID_HASH = "a" * 40
 SHORT_HASH = "a" * 39
 
 
-class TestNormalized(unittest.TestCase):
+class TestNormalized(TestCase):
     def test_removes_leading_indentation(self):
         script = """
             print('hello')
@@ -34,7 +42,7 @@ class TestNormalized(unittest.TestCase):
         self.assertNotIn("\n\n", result)
 
 
-class TestIndented(unittest.TestCase):
+class TestIndented(TestCase):
     def test_single_line(self):
         self.assertEqual(indented("hello", 4), "    hello")
 
@@ -46,7 +54,7 @@ class TestIndented(unittest.TestCase):
         self.assertEqual(indented("hello", 0), "hello")
 
 
-class TestIsCommitHash(unittest.TestCase):
+class TestIsCommitHash(TestCase):
     def test_valid_hash(self):
         self.assertTrue(is_commit_hash(VALID_HASH))
 
@@ -66,7 +74,7 @@ class TestIsCommitHash(unittest.TestCase):
         self.assertTrue(is_commit_hash("0123456789abcdef" * 2 + "01234567"))
 
 
-class TestConstructFullUrl(unittest.TestCase):
+class TestConstructFullUrl(TestCase):
     BASE = "https://github.com/user/repo"
 
     def test_branch_uses_tree(self):
@@ -86,7 +94,7 @@ class TestConstructFullUrl(unittest.TestCase):
         self.assertNotIn(".git", url)
 
 
-class TestUrlBranchFromFullUrl(unittest.TestCase):
+class TestUrlBranchFromFullUrl(TestCase):
     BASE = "https://github.com/user/repo"
 
     def test_branch(self):
@@ -98,7 +106,7 @@ class TestUrlBranchFromFullUrl(unittest.TestCase):
         self.assertIn(VALID_HASH, url)
 
 
-class TestToHttps(unittest.TestCase):
+class TestToHttps(TestCase):
     def test_https_unchanged(self):
         url = "https://github.com/user/repo"
         self.assertEqual(to_https(url), url)
@@ -116,7 +124,7 @@ class TestToHttps(unittest.TestCase):
         self.assertEqual(result, "https://github.com/user/repo")
 
 
-class TestProjectNameFromUrl(unittest.TestCase):
+class TestProjectNameFromUrl(TestCase):
     def test_plain_url(self):
         self.assertEqual(
             project_name_from_url("https://github.com/user/myproject"), "myproject"
@@ -133,7 +141,7 @@ class TestProjectNameFromUrl(unittest.TestCase):
         )
 
 
-class TestEnsureList(unittest.TestCase):
+class TestEnsureList(TestCase):
     def test_list_is_returned_as_is(self):
         lst = [1, 2, 3]
         self.assertIs(ensure_list(lst), lst)
@@ -148,7 +156,7 @@ class TestEnsureList(unittest.TestCase):
         self.assertEqual(ensure_list(None), [None])
 
 
-class TestIsZenodoUrl(unittest.TestCase):
+class TestIsZenodoUrl(TestCase):
     def test_doi_url(self):
         self.assertTrue(is_zenodo_url("https://doi.org/10.5281/zenodo.87654321"))
 
@@ -157,3 +165,58 @@ class TestIsZenodoUrl(unittest.TestCase):
 
     def test_other_url(self):
         self.assertFalse(is_zenodo_url("https://example.com/"))
+
+
+class TestParseDuration(TestCase):
+    def test_none(self):
+        self.assertIsNone(parse_duration(None))
+
+    def test_numbers_are_seconds(self):
+        self.assertEqual(parse_duration(90), 90)
+        self.assertEqual(parse_duration("90"), 90)
+
+    def test_units(self):
+        self.assertEqual(parse_duration("45s"), 45)
+        self.assertEqual(parse_duration("10m"), 600)
+        self.assertEqual(parse_duration("1.5h"), 5400)
+        self.assertEqual(parse_duration("1h 30m"), 5400)
+
+    def test_invalid(self):
+        for value in ["", "ten", "10d", "5ms"]:
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_duration(value)
+
+
+class TestCallWithTimeout(TestCase):
+    def test_returns_result(self):
+        self.assertEqual(call_with_timeout(1, lambda x: x + 1, 41), 42)
+        self.assertEqual(call_with_timeout(None, lambda: "no timeout"), "no timeout")
+
+    def test_raises_exceptions_of_the_call(self):
+        def fail():
+            raise KeyError("narf")
+
+        with self.assertRaises(KeyError):
+            call_with_timeout(1, fail)
+
+    def test_times_out(self):
+        with self.assertRaises(CallTimeoutError):
+            call_with_timeout(0.05, time.sleep, 1)
+
+    def test_no_time_left_does_not_call(self):
+        calls = []
+        with self.assertRaises(CallTimeoutError):
+            call_with_timeout(0, calls.append, 1)
+        self.assertEqual(calls, [])
+
+
+class TestWriteAtomic(TestCase):
+    def test_replaces_file_without_leftovers(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "state.json")
+            write_atomic(path, "old")
+            write_atomic(path, "new")
+            with open(path) as f:
+                self.assertEqual(f.read(), "new")
+            self.assertEqual(os.listdir(tmp_dir), ["state.json"])
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import threading
+
+from resqui.cache import SingleFlight, LRUCache
+from resqui.trace import Tracer, timings_path
+import resqui.trace
+
+from helpers import TestCase
+
+
+class TestTracer(TestCase):
+    def test_disabled_by_default(self):
+        tracer = Tracer()
+        with tracer.span("clone"):
+            pass
+        self.assertEqual(tracer.spans, [])
+
+    def test_records_spans_with_attributes(self):
+        tracer = Tracer()
+        tracer.start()
+        with tracer.span("indicator", plugin="Gitleaks") as s:
+            with tracer.span("docker.run"):
+                pass
+            s.set(output=["valid"])
+        timings = tracer.timings()
+        self.assertEqual([t["name"] for t in timings], ["indicator", "docker.run"])
+        self.assertEqual(timings[0]["plugin"], "Gitleaks")
+        self.assertEqual(timings[0]["output"], ["valid"])
+        self.assertGreaterEqual(timings[0]["duration"], timings[1]["duration"])
+
+    def test_records_errors(self):
+        tracer = Tracer()
+        tracer.start()
+        with self.assertRaises(KeyError):
+            with tracer.span("plugin.init"):
+                raise KeyError("narf")
+        self.assertEqual(tracer.timings()[0]["error"], "KeyError")
+
+    def test_start_discards_previous_spans(self):
+        tracer = Tracer()
+        tracer.start()
+        with tracer.span("clone"):
+            pass
+        tracer.start()
+        self.assertEqual(tracer.spans, [])
+
+    def test_chrome_trace(self):
+        tracer = Tracer()
+        tracer.start()
+        with tracer.span("clone", url="https://example.com/repo"):
+            pass
+
+        def run():
+            with tracer.span("indicator"):
+                pass
+
+        worker = threading.Thread(target=run, name="worker")
+        worker.start()
+        worker.join()
+
+        events = tracer.chrome_trace()["traceEvents"]
+        complete = [e for e in events if e["ph"] == "X"]
+        self.assertEqual([e["name"] for e in complete], ["clone", "indicator"])
+        self.assertEqual(complete[0]["args"], {"url": "https://example.com/repo"})
+        self.assertNotEqual(complete[0]["tid"], complete[1]["tid"])
+        thread_names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+        self.assertIn("worker", thread_names)
+
+    def test_write(self):
+        tracer = Tracer()
+        tracer.start()
+        with tracer.span("summary.write", checks=3):
+            pass
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            trace_file = os.path.join(tmp_dir, "trace.json")
+            tracer.write(trace_file)
+            self.assertEqual(
+                timings_path(trace_file), os.path.join(tmp_dir, "trace.timings.json")
+            )
+            with open(trace_file) as f:
+                self.assertIn("traceEvents", json.load(f))
+            with open(timings_path(trace_file)) as f:
+                self.assertEqual(json.load(f)[0]["checks"], 3)
+
+
+class TestCacheSpans(TestCase):
+    def setUp(self):
+        resqui.trace.tracer.start()
+        self.addCleanup(setattr, resqui.trace.tracer, "enabled", False)
+
+    def test_cache_hits_are_recorded(self):
+        cache = SingleFlight(LRUCache(name="TestCacheSpans"))
+        cache.do("key", lambda: "report")
+        cache.do("key", lambda: "report")
+        spans = [t for t in resqui.trace.tracer.timings() if t["name"] == "cache.do"]
+        self.assertEqual([s["hit"] for s in spans], [False, True])
+        self.assertEqual(spans[0]["cache"], "TestCacheSpans")
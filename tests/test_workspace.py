@@ -1,12 +1,13 @@
 import os
 import tempfile
-import unittest
 from unittest.mock import patch
 
 from resqui.workspace import create_workspace
 
+from helpers import TestCase
 
-class TestWorkspace(unittest.TestCase):
+
+class TestWorkspace(TestCase):
     def test_local_workspace_mounts_temp_dir_to_requested_container_path(self):
         with patch.dict(os.environ, {}, clear=True):
             workspace = create_workspace(prefix="test-resqui-")
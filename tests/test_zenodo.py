@@ -0,0 +1,146 @@
+import http.server
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from resqui.zenodo import ZenodoResolver, git_repository, record_api_url
+
+from helpers import TestCase
+
+REPOSITORY = "https://github.com/EVERSE-ResearchSoftware/QualityPipelines"
+
+
+class FakeZenodo(http.server.BaseHTTPRequestHandler):
+    """
+    Serves record pages at /records/<id> with Signposting links to the API
+    records at /api/records/<id>, which link to `server.identifiers[id]`
+    and answer 304 to their ETag.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.server.requests.append(("HEAD", self.path))
+        record_id = self.path.rsplit("/", 1)[-1]
+        api_url = f"http://{self.headers['Host']}/api/records/{record_id}"
+        self.send_response(200)
+        self.send_header(
+            "Link", f'<{api_url}> ; rel="describedby" ; type="application/json"'
+        )
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+        identifier = self.server.identifiers[self.path.rsplit("/", 1)[-1]]
+        etag = f'"{hash(identifier)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        record = {"metadata": {"related_identifiers": [{"identifier": identifier}]}}
+        data = json.dumps(record).encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestZenodoResolver(TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeZenodo)
+        self.server.requests = []
+        self.server.identifiers = {
+            str(i): f"{REPOSITORY}/tree/v0.{i}.0" for i in range(10)
+        }
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/records/"
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache = os.path.join(tmp_dir.name, "zenodo.json")
+
+    def _resolver(self):
+        resolver = ZenodoResolver(self.cache)
+        self.addCleanup(resolver.session.close)
+        return resolver
+
+    def test_resolve_follows_signposting(self):
+        resolver = self._resolver()
+        self.assertEqual(resolver.resolve(self.url + "1"), (REPOSITORY, "v0.1.0"))
+        self.assertEqual(
+            self.server.requests, [("HEAD", "/records/1"), ("GET", "/api/records/1")]
+        )
+
+    def test_result_is_cached_on_disk(self):
+        self._resolver().resolve(self.url + "1")
+        self.server.requests.clear()
+        self.assertEqual(
+            self._resolver().resolve(self.url + "1"), (REPOSITORY, "v0.1.0")
+        )
+        self.assertEqual(self.server.requests, [])
+
+    def test_expired_result_is_revalidated(self):
+        resolver = self._resolver()
+        resolver.resolve(self.url + "1")
+        resolver.entries[self.url + "1"]["checked"] = time.time() - resolver.ttl
+        self.server.requests.clear()
+        self.assertEqual(resolver.resolve(self.url + "1"), (REPOSITORY, "v0.1.0"))
+        self.assertEqual(len(self.server.requests), 2)  # answered with 304
+        self.assertGreater(
+            resolver.entries[self.url + "1"]["checked"], time.time() - 60
+        )
+
+        # A changed record is downloaded again
+        self.server.identifiers["1"] = REPOSITORY
+        resolver.entries[self.url + "1"]["checked"] = 0
+        self.assertEqual(resolver.resolve(self.url + "1"), (REPOSITORY, None))
+
+    def test_expired_result_is_used_if_zenodo_is_unreachable(self):
+        resolver = self._resolver()
+        resolver.resolve(self.url + "1")
+        resolver.entries[self.url + "1"]["checked"] = 0
+        self.server.shutdown()
+        self.server.server_close()
+        resolver.max_retries = 0
+        resolver.session = ZenodoResolver.make_session()
+        self.assertEqual(resolver.resolve(self.url + "1"), (REPOSITORY, "v0.1.0"))
+        with self.assertRaises(requests.RequestException):
+            resolver.resolve(self.url + "2")
+
+    def test_resolve_many(self):
+        self.server.identifiers["9"] = "https://gitlab.com/example/repo"
+        urls = [self.url + str(i) for i in range(10)]
+        results = self._resolver().resolve_many(urls)
+        self.assertEqual(results[self.url + "3"], (REPOSITORY, "v0.3.0"))
+        self.assertIsInstance(results[self.url + "9"], ValueError)
+        with open(self.cache) as f:
+            self.assertEqual(len(json.load(f)), 9)
+
+
+class TestZenodoRecords(TestCase):
+    def test_record_api_url(self):
+        link = (
+            '<https://zenodo.org/records/1> ; rel="cite-as" , '
+            '<https://zenodo.org/api/records/1> ; rel="describedby" ; '
+            'type="application/json"'
+        )
+        self.assertEqual(record_api_url(link), "https://zenodo.org/api/records/1")
+        self.assertIsNone(record_api_url(""))
+
+    def test_git_repository_without_github_identifier(self):
+        record = {"metadata": {"related_identifiers": [{"identifier": "10.1/x"}]}}
+        with self.assertRaises(ValueError):
+            git_repository(record)